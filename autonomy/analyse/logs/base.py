@@ -34,5 +34,32 @@ LOG_ROW_REGEX = re.compile(
 ENTER_BEHAVIOUR_REGEX = re.compile(r"Entered in the \'([a-z_]+)\' behaviour")
 ENTER_ROUND_REGEX = re.compile(r"Entered in the \'([a-z_]+)\' round for period (\d+)")
 EXIT_ROUND_REGEX = re.compile(r"'([a-z_]+)' round is done with event: (Event\.[A-Z_]+)")
+# matches the header of each log block directly in the memory mapped log file
+LOG_HEADER_REGEX = re.compile(
+    rb"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{1,6})\] \[([A-Z]+)\](?: \[agent\])? ",
+    re.MULTILINE,
+)
+ENTER_PREFIX = "Entered in the '"
 
 LogRow = Tuple[datetime, str, str, int, str, str]
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """
+    Parse a timestamp in the `TIME_FORMAT` format.
+
+    This is equivalent to `datetime.strptime(timestamp, TIME_FORMAT)`, but much cheaper,
+    as the fields of the timestamps written by the agents are at fixed positions.
+
+    :param timestamp: the timestamp, e.g., `2023-01-23 15:38:30,233`.
+    :return: the parsed timestamp.
+    """
+    return datetime(
+        int(timestamp[0:4]),
+        int(timestamp[5:7]),
+        int(timestamp[8:10]),
+        int(timestamp[11:13]),
+        int(timestamp[14:16]),
+        int(timestamp[17:19]),
+        int(timestamp[20:26].ljust(6, "0")),
+    )
@@ -20,21 +20,21 @@
 """Log streams"""
 
 
-import re
+import mmap
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime
 from pathlib import Path
-from typing import Generator, List, Optional, TextIO, Tuple, cast
+from typing import Generator, Iterator, List, Tuple
 
 from autonomy.analyse.logs.base import (
     ENTER_BEHAVIOUR_REGEX,
+    ENTER_PREFIX,
     ENTER_ROUND_REGEX,
-    LOG_ROW_REGEX,
+    LOG_HEADER_REGEX,
     LogRow,
-    TIMESTAMP_REGEX,
-    TIME_FORMAT,
+    parse_timestamp,
 )
-from autonomy.analyse.logs.db import AgentLogsDB
+from autonomy.analyse.logs.db import AgentLogsDB, IngestionState
 
 
 class LogCollection(ABC):
@@ -59,51 +59,103 @@ class LogCollection(ABC):
     ) -> "LogCollection":
         """Create logs database."""
 
+    def ingest(
+        self, agent: str, db_path: Path, reset: bool = False
+    ) -> Tuple[int, float]:
+        """
+        Ingest the logs of an agent into its own database connection.
+
+        This can run in a worker process, so that the logs of several agents are ingested in parallel.
+
+        :param agent: the agent whose logs to ingest.
+        :param db_path: the path to the logs database.
+        :param reset: whether to reset the table of the agent, if it exists.
+        :return: the number of ingested rows and the time it took in seconds.
+        """
+        start = time.perf_counter()
+        db = AgentLogsDB(agent=agent, file=db_path)
+        try:
+            self.create_agent_db(agent=agent, db=db, reset=reset)
+        finally:
+            db.close()
+        return db.n_inserted, time.perf_counter() - start
+
     @staticmethod
-    def get_next_log_block(
-        fp: TextIO,
-        prev_line: Optional[str],
-    ) -> Tuple[Optional[str], Optional[str]]:
-        """Get next log block."""
-        if prev_line is None:
-            return None, None
-
-        line = prev_line
-        while True:
-            _line = fp.readline()
-            if _line == "":
-                return prev_line, None
-            if TIMESTAMP_REGEX.match(_line) is not None:
-                return line, _line
-            line += _line
+    def iter_log_blocks(
+        file: Path,
+        offset: int = 0,
+    ) -> Generator[Tuple[int, str, str, str], None, None]:
+        """
+        Iterate over the log blocks of a file, without reading it in memory.
+
+        A log block starts with a line carrying a timestamp and a log level
+        and spans all the following lines until the next such line, e.g., for tracebacks.
+
+        :param file: the log file.
+        :param offset: the byte offset of the file from which to start, at the start of a line.
+        :yield: the byte offset, the timestamp, the log level and the message of each log block.
+        """
+        with file.open(mode="rb") as fp:
+            if file.stat().st_size <= offset:
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                headers = LOG_HEADER_REGEX.finditer(mapped, offset)  # type: ignore
+                header = next(headers, None)
+                while header is not None:
+                    next_header = next(headers, None)
+                    end = len(mapped) if next_header is None else next_header.start()
+                    timestamp, log_level = header.groups()
+                    yield (
+                        header.start(),
+                        timestamp.decode(),
+                        log_level.decode(),
+                        mapped[header.end() : end].decode(
+                            encoding="utf-8", errors="replace"
+                        ),
+                    )
+                    header = next_header
 
     @classmethod
     def parse(cls, file: Path) -> Generator[LogRow, None, None]:
         """Parse logs and yield rows."""
-        with file.open(mode="r", encoding="utf-8") as fp:
-            prev_line: Optional[str] = fp.readline()
-            current_period = 0
-            current_round = "agent_startup"
-            current_behaviour = "agent_startup"
-            while True:
-                line, prev_line = cls.get_next_log_block(fp=fp, prev_line=prev_line)
-                if line is None and prev_line is None:
-                    break
-
-                match = LOG_ROW_REGEX.match(string=cast(str, line))
-                _timestamp, log_level, _, log_block, _ = cast(re.Match, match).groups()
-                timestamp = datetime.strptime(_timestamp, TIME_FORMAT)
+        for _, row in cls.parse_from(file=file, state=IngestionState()):
+            yield row
+
+    @classmethod
+    def parse_from(
+        cls, file: Path, state: IngestionState
+    ) -> Generator[Tuple[int, LogRow], None, None]:
+        """
+        Parse logs from the point up to which they have been ingested.
+
+        :param file: the log file.
+        :param state: the point from which to parse, and the parser state at that point.
+        :yield: the byte offset and the row of each log block.
+        """
+        current_period = state.period
+        current_round = state.round_name
+        current_behaviour = state.behaviour_name
+        for offset, _timestamp, log_level, log_block in cls.iter_log_blocks(
+            file, state.offset
+        ):
+            if log_block.startswith(ENTER_PREFIX):
                 match = ENTER_BEHAVIOUR_REGEX.match(string=log_block)
                 if match is not None:
                     (current_behaviour,) = match.groups()
 
                 match = ENTER_ROUND_REGEX.match(string=log_block)
                 if match is not None:
-                    (current_round, current_period) = cast(
-                        Tuple[str, int], match.groups()
-                    )
-
-                yield timestamp, log_level, log_block, current_period, current_round, current_behaviour
+                    current_round, _period = match.groups()
+                    current_period = int(_period)
+
+            yield offset, (
+                parse_timestamp(_timestamp),
+                log_level,
+                log_block,
+                current_period,
+                current_round,
+                current_behaviour,
+            )
 
 
 class FromDirectory(LogCollection):
@@ -127,13 +179,48 @@ class FromDirectory(LogCollection):
         db: AgentLogsDB,
         reset: bool = False,
     ) -> "FromDirectory":
-        """Create logs table for agent."""
+        """
+        Create logs table for agent, or ingest the logs appended since the last ingestion.
+
+        A log file smaller than when it was last ingested was rotated, so it is ingested from scratch.
+
+        :param agent: the agent whose log file to ingest.
+        :param db: the logs database of the agent.
+        :param reset: whether to ingest the log file from scratch.
+        :return: the log collection.
+        """
 
         log_file = self.directory / f"{agent}.txt"
-        db.create(reset=reset)
-        db.insert_many(
-            logs=self.parse(
-                file=log_file,
+        size = log_file.stat().st_size
+        state = None if reset else db.ingestion_state()
+        if state is None or size < state.size:
+            db.create(reset=True)
+            state = IngestionState()
+        elif size == state.size:
+            return self
+        else:
+            db.truncate(state.last_rowid)
+
+        last_block = state
+
+        def _track_last_block(
+            rows: Iterator[Tuple[int, LogRow]]
+        ) -> Generator[LogRow, None, None]:
+            """Keep track of the offset of the last block and of the parser state preceding it."""
+            nonlocal last_block
+            previous = last_block
+            for offset, row in rows:
+                last_block = previous._replace(offset=offset)
+                *_, period, round_name, behaviour_name = row
+                previous = IngestionState(
+                    period=period, round_name=round_name, behaviour_name=behaviour_name
+                )
+                yield row
+
+        db.insert_many(logs=_track_last_block(self.parse_from(log_file, state)))
+        db.set_ingestion_state(
+            last_block._replace(
+                size=size, last_rowid=db.last_rowid() if db.n_inserted > 0 else None
             )
         )
         return self
@@ -19,12 +19,27 @@
 
 """Database schemas and helpers"""
 
+import re
 import sqlite3
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Any, Iterator, List, Optional, Tuple
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple, cast
+
+from autonomy.analyse.logs.base import (
+    ENTER_BEHAVIOUR_REGEX,
+    ENTER_PREFIX,
+    ENTER_ROUND_REGEX,
+    EXIT_ROUND_REGEX,
+    LogRow,
+)
+
 
-from autonomy.analyse.logs.base import LogRow
+try:  # pragma: nocover
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: nocover
+    import sre_parse  # type: ignore  # pylint: disable=deprecated-module
 
 
 TIMESTAMP = "timestamp"
@@ -34,16 +49,191 @@ PERIOD = "period"
 ROUND = "round_name"
 BEHAVIOUR = "behaviour_name"
 EXIT_EVENT = "exit_event"
+LOG_ROWID = "log_rowid"
+ENTERED_AT = "entered_at"
+INDEXED_COLUMNS = (TIMESTAMP, PERIOD, ROUND, BEHAVIOUR)
+# the shortest substring which can be looked up in the trigram full-text index
+MIN_INDEXED_SUBSTRING = 3
 
 QUERY_CREATE_LOG_TABLE = (
     "CREATE TABLE {agent} "
     + f"({TIMESTAMP} TIMESTAMP, {LOG_LEVEL} TEXT, {MESSAGE} TEXT, {PERIOD} INTEGER, {ROUND} TEXT, {BEHAVIOUR} TEXT);"
 )
+QUERY_CREATE_INDEX = (
+    "CREATE INDEX IF NOT EXISTS {agent}_{column} ON {agent} ({column});"
+)
+QUERY_CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE {agent}_fts USING fts5"
+    + f"({MESSAGE}, content='{{agent}}', content_rowid='rowid', tokenize='trigram case_sensitive 1');"
+)
+# the inserted logs are indexed a batch at a time, which is several times faster than with a trigger per row
+QUERY_INDEX_LOGS_AFTER = f"INSERT INTO {{agent}}_fts (rowid, {MESSAGE}) SELECT rowid, {MESSAGE} FROM {{agent}} WHERE rowid > ?;"
+QUERY_CREATE_FTS_DELETE_TRIGGER = (
+    "CREATE TRIGGER {agent}_fts_delete AFTER DELETE ON {agent} BEGIN "
+    + f"INSERT INTO {{agent}}_fts ({{agent}}_fts, rowid, {MESSAGE}) VALUES ('delete', old.rowid, old.{MESSAGE}); END;"
+)
 QUERY_CHECK_TABLE_EXISTS = (
     "SELECT name FROM sqlite_master WHERE type='table' AND name=?;"
 )
 QUERY_DROP_TABLE = "DROP TABLE {agent};"
+QUERY_DROP_FTS_TABLE = "DROP TABLE IF EXISTS {agent}_fts;"
 QUERY_INSERT_LOG = "INSERT INTO {agent} VALUES (?, ?, ?, ?, ?, ?);"
+QUERY_DELETE_LOGS_FROM = "DELETE FROM {agent} WHERE rowid >= ?;"
+QUERY_LAST_ROWID = "SELECT MAX(rowid) FROM {agent};"
+
+# the round transitions, extracted from the logs at ingestion time; a transition without an exit event enters a round
+QUERY_CREATE_TRANSITIONS_TABLE = (
+    "CREATE TABLE {agent}_transitions "
+    + f"({LOG_ROWID} INTEGER PRIMARY KEY, {TIMESTAMP} TIMESTAMP, {PERIOD} INTEGER, {ROUND} TEXT, "
+    + f"{EXIT_EVENT} TEXT, {ENTERED_AT} TIMESTAMP);"
+)
+QUERY_CREATE_TRANSITIONS_INDEX = "CREATE INDEX IF NOT EXISTS {agent}_transitions_{column} ON {agent}_transitions ({column});"
+QUERY_DROP_TRANSITIONS_TABLE = "DROP TABLE IF EXISTS {agent}_transitions;"
+QUERY_INSERT_TRANSITION = "INSERT INTO {agent}_transitions VALUES (?, ?, ?, ?, ?, ?);"
+QUERY_DELETE_TRANSITIONS_FROM = (
+    "DELETE FROM {agent}_transitions WHERE " + f"{LOG_ROWID} >= ?;"
+)
+QUERY_LAST_ENTERED_ROUND = (
+    f"SELECT {ROUND}, {TIMESTAMP} FROM {{agent}}_transitions WHERE {EXIT_EVENT} IS NULL "
+    + f"ORDER BY {LOG_ROWID} DESC LIMIT 1;"
+)
+QUERY_ROUND_OCCURRENCES = (
+    f"SELECT {PERIOD}, {ROUND}, {ENTERED_AT}, {TIMESTAMP}, {EXIT_EVENT} FROM {{agent}}_transitions "
+    + f"WHERE {EXIT_EVENT} IS NOT NULL AND {ENTERED_AT} IS NOT NULL ORDER BY {LOG_ROWID};"
+)
+QUERY_EXECUTION_PATH = (
+    f"SELECT {PERIOD}, {ROUND}, {EXIT_EVENT} FROM {{agent}}_transitions"
+)
+# the julian days are converted to seconds
+QUERY_ROUND_DURATIONS = (
+    f"SELECT {ROUND}, COUNT(*), AVG(duration), MIN(duration), MAX(duration) FROM "
+    + f"(SELECT {ROUND}, (julianday({TIMESTAMP}) - julianday({ENTERED_AT})) * 86400.0 AS duration "
+    + f"FROM {{agent}}_transitions WHERE {EXIT_EVENT} IS NOT NULL AND {ENTERED_AT} IS NOT NULL) "
+    + f"GROUP BY {ROUND} ORDER BY {ROUND};"
+)
+
+QUERY_CREATE_INGESTION_STATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS ingestion_state (agent TEXT PRIMARY KEY, size INTEGER, offset INTEGER, "
+    + f"last_rowid INTEGER, {PERIOD} INTEGER, {ROUND} TEXT, {BEHAVIOUR} TEXT);"
+)
+QUERY_SELECT_INGESTION_STATE = (
+    "SELECT size, offset, last_rowid, "
+    + f"{PERIOD}, {ROUND}, {BEHAVIOUR} FROM ingestion_state WHERE agent=?;"
+)
+QUERY_UPSERT_INGESTION_STATE = (
+    "INSERT OR REPLACE INTO ingestion_state VALUES (?, ?, ?, ?, ?, ?, ?);"
+)
+QUERY_DELETE_INGESTION_STATE = "DELETE FROM ingestion_state WHERE agent=?;"
+
+INSERT_BATCH_SIZE = 10_000
+# the agents are ingested in parallel, so a connection may need to wait for the others to release the database
+DB_TIMEOUT = 60.0
+
+
+class RoundDurations(NamedTuple):
+    """The durations in seconds of the occurrences of a round."""
+
+    round_name: str
+    occurrences: int
+    mean: float
+    min: float
+    max: float
+
+
+class IngestionState(NamedTuple):
+    """
+    The point up to which the log file of an agent has been ingested.
+
+    The last log block may still be extended by the agent, e.g., with the rest of a traceback,
+    so it is ingested again when resuming, from its offset and with the parser state preceding it.
+    """
+
+    size: int = 0
+    offset: int = 0
+    last_rowid: Optional[int] = None
+    period: int = 0
+    round_name: str = "agent_startup"
+    behaviour_name: str = "agent_startup"
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str) -> "re.Pattern[str]":
+    """Compile a regex, once per pattern."""
+    return re.compile(pattern)
+
+
+def _regexp(pattern: str, message: Optional[str]) -> bool:
+    """Implement the `REGEXP` SQL operator, with the `re.match` semantics."""
+    return message is not None and _compile(pattern).match(message) is not None
+
+
+def required_substring(pattern: str) -> Optional[str]:
+    """
+    Get the longest literal substring which every message matching a regex must contain.
+
+    Only the top level literals of the regex are considered, as any of them is required for a match.
+
+    :param pattern: the regex.
+    :return: the substring, if one can be looked up in the full-text index.
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+
+    longest, current = "", ""
+    for op, value in parsed:
+        if op == sre_parse.LITERAL:
+            current += chr(value)
+            longest = max(longest, current, key=len)
+            continue
+        current = ""
+    return longest if len(longest) >= MIN_INDEXED_SUBSTRING else None
+
+
+def _extract_transitions(
+    logs: List[LogRow],
+    first_rowid: int,
+    last_entered: Optional[Tuple[str, datetime]],
+) -> Tuple[List[Tuple[Any, ...]], Optional[Tuple[str, datetime]]]:
+    """
+    Extract the round transitions from consecutive logs.
+
+    :param logs: the logs.
+    :param first_rowid: the rowid of the first log.
+    :param last_entered: the last round entered before the logs, and when.
+    :return: the transitions, and the last round entered after the logs, and when.
+    """
+    transitions: List[Tuple[Any, ...]] = []
+    for rowid, (timestamp, _, message, period, round_name, _) in enumerate(
+        logs, first_rowid
+    ):
+        if message.startswith(ENTER_PREFIX):
+            if ENTER_ROUND_REGEX.match(message) is not None:
+                transitions.append(
+                    (rowid, timestamp, period, round_name, None, timestamp)
+                )
+                last_entered = round_name, timestamp
+            continue
+
+        if not message.startswith("'"):
+            continue
+        match = EXIT_ROUND_REGEX.match(message)
+        if match is None:
+            continue
+        exited_round, exit_event = match.groups()
+        entered_at = None
+        if last_entered is not None and last_entered[0] == exited_round:
+            entered_at = last_entered[1]
+        transitions.append(
+            (rowid, timestamp, period, exited_round, exit_event, entered_at)
+        )
+    return transitions, last_entered
+
+
+def _glob_substring(substring: str) -> str:
+    """Get the `GLOB` pattern matching the messages which contain a substring."""
+    escaped = re.sub(r"([*?\[])", r"[\1]", substring)
+    return f"*{escaped}*"
 
 
 class AgentLogsDB:
@@ -55,13 +245,17 @@ class AgentLogsDB:
         """Initialize object."""
 
         self.agent = agent
+        self.n_inserted = 0
         self._db_path = file
         self._db = sqlite3.connect(
             database=self._db_path,
             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            timeout=DB_TIMEOUT,
         )
+        self._db.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self._db.execute(QUERY_CREATE_INGESTION_STATE_TABLE)
 
-    def select(  # pylint: disable=too-many-arguments
+    def iter_select(  # pylint: disable=too-many-arguments,too-many-locals
         self,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
@@ -69,51 +263,173 @@ class AgentLogsDB:
         period: Optional[int] = None,
         round_name: Optional[str] = None,
         behaviour_name: Optional[str] = None,
-    ) -> List[LogRow]:
-        """Build select query."""
-
-        query = f"SELECT * from {self.agent}"  # nosec
+        contains: Optional[str] = None,
+        include_regexes: Sequence[str] = (),
+        exclude_regexes: Sequence[str] = (),
+    ) -> Iterator[LogRow]:
+        """
+        Select the logs matching the given filters, streaming them from a cursor.
+
+        All the filters are applied by SQLite: the indexed columns and the full-text index narrow down
+        the rows, and the regexes are only evaluated on these.
+
+        :param start_time: keep the logs after this time.
+        :param end_time: keep the logs before this time.
+        :param log_level: keep the logs of this level.
+        :param period: keep the logs of this period.
+        :param round_name: keep the logs of this round.
+        :param behaviour_name: keep the logs of this behaviour.
+        :param contains: keep the logs whose message contains this substring.
+        :param include_regexes: keep the logs whose message matches any of these regexes.
+        :param exclude_regexes: drop the logs whose message matches all of these regexes.
+        :return: an iterator over the selected logs, in the order in which they were logged.
+        """
+
+        conditions: List[str] = []
         paramaters: List[Any] = []
 
-        def _append_condition(_query: str, condition: str) -> str:
-            """Append condition at the end of the query."""
-            if "WHERE" in query:
-                return query + " AND " + condition
-            return query + " WHERE " + condition
+        def _append_condition(condition: str, *values: Any) -> None:
+            """Append a condition to the query."""
+            conditions.append(condition)
+            paramaters.extend(values)
+
+        for column, operator, value in (
+            (TIMESTAMP, ">", start_time),
+            (TIMESTAMP, "<", end_time),
+            (LOG_LEVEL, "=", log_level),
+            (PERIOD, "=", period),
+            (ROUND, "=", round_name),
+            (BEHAVIOUR, "=", behaviour_name),
+        ):
+            if value is not None:
+                _append_condition(f"{column}{operator}?", value)
+
+        # the groups of substrings, one of which the messages must contain
+        substring_groups: List[List[str]] = [] if contains is None else [[contains]]
+        if len(include_regexes) > 0:
+            _append_condition(
+                "(" + " OR ".join([f"{MESSAGE} REGEXP ?"] * len(include_regexes)) + ")",
+                *include_regexes,
+            )
+            required = list(map(required_substring, include_regexes))
+            if all(substring is not None for substring in required):
+                substring_groups.append(cast(List[str], required))
+
+        if len(exclude_regexes) > 0:
+            _append_condition(
+                "("
+                + " OR ".join([f"NOT {MESSAGE} REGEXP ?"] * len(exclude_regexes))
+                + ")",
+                *exclude_regexes,
+            )
 
-        if start_time is not None:
-            query = _append_condition(_query=query, condition=f"{TIMESTAMP}>?")
-            paramaters.append(start_time)
+        for substrings in substring_groups:
+            _append_condition(*self._substring_condition(substrings))
 
-        if end_time is not None:
-            query = _append_condition(_query=query, condition=f"{TIMESTAMP}<?")
-            paramaters.append(end_time)
+        query = f"SELECT * FROM {self.agent}"  # nosec
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY rowid;"
+        return self.cursor.execute(query, paramaters)
 
-        if log_level is not None:
-            query = _append_condition(_query=query, condition=f"{LOG_LEVEL}=?")
-            paramaters.append(log_level)
+    def select(  # pylint: disable=too-many-arguments
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        log_level: Optional[str] = None,
+        period: Optional[int] = None,
+        round_name: Optional[str] = None,
+        behaviour_name: Optional[str] = None,
+    ) -> List[LogRow]:
+        """Build select query."""
 
-        if period is not None:
-            query = _append_condition(_query=query, condition=f"{PERIOD}=?")
-            paramaters.append(period)
+        return list(
+            self.iter_select(
+                start_time=start_time,
+                end_time=end_time,
+                log_level=log_level,
+                period=period,
+                round_name=round_name,
+                behaviour_name=behaviour_name,
+            )
+        )
 
-        if round_name is not None:
-            query = _append_condition(_query=query, condition=f"{ROUND}=?")
-            paramaters.append(round_name)
+    def _substring_condition(self, substrings: List[str]) -> Tuple[str, ...]:
+        """Get a condition keeping the messages which contain any of the given substrings."""
+        if not self.has_fts():
+            condition = " OR ".join([f"instr({MESSAGE}, ?) > 0"] * len(substrings))
+            return (f"({condition})", *substrings)
 
-        if behaviour_name is not None:
-            query = _append_condition(_query=query, condition=f"{BEHAVIOUR}=?")
-            paramaters.append(behaviour_name)
+        fts_query = (
+            f"SELECT rowid FROM {self.agent}_fts WHERE {MESSAGE} GLOB ?"  # nosec
+        )
+        return (
+            f"rowid IN ({' UNION '.join([fts_query] * len(substrings))})",
+            *map(_glob_substring, substrings),
+        )
 
-        query += ";"
+    def execution_path(  # pylint: disable=too-many-arguments
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        period: Optional[int] = None,
+        round_name: Optional[str] = None,
+        with_entries: bool = False,
+    ) -> List[Tuple[int, str, Optional[str]]]:
+        """
+        Extraction FSM execution path
+
+        :param start_time: keep the transitions after this time.
+        :param end_time: keep the transitions before this time.
+        :param period: keep the transitions of this period.
+        :param round_name: keep the transitions of this round.
+        :param with_entries: whether to also get the entries in the rounds, which have no exit event.
+        :return: the period, the round and the exit event of each transition, in order.
+        """
+        conditions = [] if with_entries else [f"{EXIT_EVENT} IS NOT NULL"]
+        paramaters: List[Any] = []
+        for column, operator, value in (
+            (TIMESTAMP, ">", start_time),
+            (TIMESTAMP, "<", end_time),
+            (PERIOD, "=", period),
+            (ROUND, "=", round_name),
+        ):
+            if value is not None:
+                conditions.append(f"{column}{operator}?")
+                paramaters.append(value)
+
+        query = QUERY_EXECUTION_PATH.format(agent=self.agent)
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {LOG_ROWID};"
         return self.cursor.execute(query, paramaters).fetchall()
 
-    def execution_path(self) -> List[Tuple[int, str, str]]:
-        """Extraction FSM execution path"""
+    def round_occurrences(
+        self,
+    ) -> List[Tuple[int, str, datetime, datetime, str]]:
+        """Get the period, the round, the entry and exit times, and the exit event of each completed round."""
         return self.cursor.execute(
-            f"SELECT {PERIOD}, {ROUND}, MAX({EXIT_EVENT}) from {self.agent} GROUP BY {ROUND};"
+            QUERY_ROUND_OCCURRENCES.format(agent=self.agent)
         ).fetchall()
 
+    def behaviour_entries(self) -> List[Tuple[datetime, str]]:
+        """Get the time at which each behaviour was entered, and the behaviour."""
+        return [
+            (timestamp, behaviour_name)
+            for timestamp, *_, behaviour_name in self.iter_select(
+                include_regexes=[ENTER_BEHAVIOUR_REGEX.pattern]
+            )
+        ]
+
+    def round_durations(self) -> List[RoundDurations]:
+        """Get the durations of the rounds, from their entry to their exit."""
+        return [
+            RoundDurations(*row)
+            for row in self.cursor.execute(
+                QUERY_ROUND_DURATIONS.format(agent=self.agent)
+            )
+        ]
+
     @property
     def cursor(self) -> sqlite3.Cursor:
         """Creates and returns a database cursor."""
@@ -127,13 +443,37 @@ class AgentLogsDB:
             is not None
         )
 
+    def has_transitions(self) -> bool:
+        """Check if the table of the round transitions exists."""
+
+        return (
+            self.cursor.execute(
+                QUERY_CHECK_TABLE_EXISTS, (f"{self.agent}_transitions",)
+            ).fetchone()
+            is not None
+        )
+
+    def has_fts(self) -> bool:
+        """Check if the full-text index of the messages exists."""
+
+        return (
+            self.cursor.execute(
+                QUERY_CHECK_TABLE_EXISTS, (f"{self.agent}_fts",)
+            ).fetchone()
+            is not None
+        )
+
     def delete(self) -> "AgentLogsDB":
         """Delete table"""
-        self.cursor.execute(QUERY_DROP_TABLE.format(agent=self.agent))
+        with self._db:
+            self._db.execute(QUERY_DROP_TABLE.format(agent=self.agent))
+            self._db.execute(QUERY_DROP_FTS_TABLE.format(agent=self.agent))
+            self._db.execute(QUERY_DROP_TRANSITIONS_TABLE.format(agent=self.agent))
+            self._db.execute(QUERY_DELETE_INGESTION_STATE, (self.agent,))
         return self
 
     def create(self, reset: bool = False) -> "AgentLogsDB":
-        """Create agent table"""
+        """Create agent table, along with its indexes"""
 
         exists = self.exists()
         if exists and not reset:
@@ -142,20 +482,97 @@ class AgentLogsDB:
         if exists and reset:
             self.delete()
 
-        self.cursor.execute(QUERY_CREATE_LOG_TABLE.format(agent=self.agent))
-        self._db.commit()
+        with self._db:
+            self._db.execute(QUERY_CREATE_LOG_TABLE.format(agent=self.agent))
+            for column in INDEXED_COLUMNS:
+                self._db.execute(
+                    QUERY_CREATE_INDEX.format(agent=self.agent, column=column)
+                )
+            self._db.execute(QUERY_CREATE_TRANSITIONS_TABLE.format(agent=self.agent))
+            for column in (PERIOD, ROUND):
+                self._db.execute(
+                    QUERY_CREATE_TRANSITIONS_INDEX.format(
+                        agent=self.agent, column=column
+                    )
+                )
+
+        try:
+            with self._db:
+                self._db.execute(QUERY_CREATE_FTS_TABLE.format(agent=self.agent))
+                self._db.execute(
+                    QUERY_CREATE_FTS_DELETE_TRIGGER.format(agent=self.agent)
+                )
+        except sqlite3.OperationalError:  # pragma: nocover
+            # the SQLite library does not support FTS5 or its trigram tokenizer,
+            # substring searches fall back to scanning the messages
+            pass
+
+        return self
 
+    def ingestion_state(self) -> Optional[IngestionState]:
+        """Get the point up to which the logs have been ingested, if they have been."""
+        row = self.cursor.execute(
+            QUERY_SELECT_INGESTION_STATE, (self.agent,)
+        ).fetchone()
+        # the logs ingested before the transitions were extracted need to be ingested again
+        if row is None or not self.exists() or not self.has_transitions():
+            return None
+        return IngestionState(*row)
+
+    def set_ingestion_state(self, state: IngestionState) -> None:
+        """Set the point up to which the logs have been ingested."""
+        with self._db:
+            self._db.execute(QUERY_UPSERT_INGESTION_STATE, (self.agent, *state))
+
+    def last_rowid(self) -> Optional[int]:
+        """Get the rowid of the last ingested log."""
+        return self.cursor.execute(
+            QUERY_LAST_ROWID.format(agent=self.agent)
+        ).fetchone()[0]
+
+    def truncate(self, rowid: Optional[int]) -> "AgentLogsDB":
+        """Delete the logs from the given rowid onwards."""
+        if rowid is not None:
+            with self._db:
+                self._db.execute(
+                    QUERY_DELETE_LOGS_FROM.format(agent=self.agent), (rowid,)
+                )
+                self._db.execute(
+                    QUERY_DELETE_TRANSITIONS_FROM.format(agent=self.agent), (rowid,)
+                )
         return self
 
     def insert_many(
         self,
         logs: Iterator[LogRow],
+        batch_size: int = INSERT_BATCH_SIZE,
     ) -> "AgentLogsDB":
-        """Insert a record"""
-        for timestamp, log_level, message, period, round_name, behaviour_name in logs:
-            self.cursor.execute(
-                QUERY_INSERT_LOG.format(agent=self.agent),
-                (timestamp, log_level, message, period, round_name, behaviour_name),
-            )
-        self._db.commit()
+        """Insert records, in batches which are committed one at a time to bound the memory usage."""
+        query = QUERY_INSERT_LOG.format(agent=self.agent)
+        index_query = QUERY_INDEX_LOGS_AFTER.format(agent=self.agent)
+        transition_query = QUERY_INSERT_TRANSITION.format(agent=self.agent)
+        has_fts = self.has_fts()
+        last_entered = self.cursor.execute(
+            QUERY_LAST_ENTERED_ROUND.format(agent=self.agent)
+        ).fetchone()
+        logs = iter(logs)
+        while True:
+            batch = list(islice(logs, batch_size))
+            if len(batch) == 0:
+                break
+            with self._db:
+                last_rowid = self.last_rowid() or 0
+                self._db.executemany(query, batch)
+                if has_fts:
+                    self._db.execute(index_query, (last_rowid,))
+                # the rowids of the appended logs follow the last one
+                transitions, last_entered = _extract_transitions(
+                    batch, last_rowid + 1, last_entered
+                )
+                self._db.executemany(transition_query, transitions)
+            self.n_inserted += len(batch)
         return self
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._db.close()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Latency analytics over the logs of the agents of a service, aligned on their round transitions."""
+
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import DefaultDict, Dict, List, Optional, Sequence, Tuple
+
+from autonomy.analyse.logs.db import AgentLogsDB
+
+
+ROUNDS = "round"
+BEHAVIOURS = "behaviour"
+CONSENSUS = "consensus"
+STRAGGLERS = "straggler"
+
+# a round occurrence is identified by its period, its name, and how many times it was entered before in that period
+RoundKey = Tuple[int, str, int]
+
+
+@dataclass(frozen=True)
+class LatencyStats:  # pylint: disable=too-many-instance-attributes
+    """
+    The distribution of a latency, in seconds.
+
+    For the stragglers, the latency is how long an agent exited the rounds after the first agent,
+    and `slowest` counts the rounds which the agent exited last.
+    """
+
+    section: str
+    name: str
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    slowest: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AlignedTransition:  # pylint: disable=too-many-instance-attributes
+    """The occurrence of a round for an agent, aligned with its occurrences for the other agents."""
+
+    period: int
+    round_name: str
+    occurrence: int
+    agent: str
+    entered_at: datetime
+    exited_at: datetime
+    exit_event: str
+    entry_lag: float
+    exit_lag: float
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """
+    Get a percentile of some values, interpolating linearly between the closest ranks.
+
+    :param values: the values, which must not be empty.
+    :param percent: the percentile, between 0 and 100.
+    :return: the percentile.
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarise(
+    section: str, name: str, values: Sequence[float], slowest: Optional[int] = None
+) -> LatencyStats:
+    """Summarise the distribution of a latency."""
+    return LatencyStats(
+        section=section,
+        name=name,
+        count=len(values),
+        mean=statistics.mean(values),
+        p50=percentile(values, 50),
+        p95=percentile(values, 95),
+        p99=percentile(values, 99),
+        max=max(values),
+        slowest=slowest,
+    )
+
+
+class RoundTimeline:
+    """
+    The logs of the agents of a service, aligned on their round transitions.
+
+    The occurrences of the rounds are aligned across the agents by period, round and occurrence in the period,
+    as all the agents go through the same rounds, which are ended by the same blocks.
+    """
+
+    def __init__(self, dbs: Dict[str, AgentLogsDB]) -> None:
+        """
+        Initialize the timeline.
+
+        :param dbs: the logs databases of the agents.
+        """
+        self._dbs = dbs
+        self.rounds: Dict[RoundKey, Dict[str, Tuple[datetime, datetime, str]]] = {}
+        for agent, db in dbs.items():
+            occurrences: DefaultDict[Tuple[int, str], int] = defaultdict(int)
+            for occurrence in db.round_occurrences():
+                period, round_name, entered_at, exited_at, event = occurrence
+                key = (period, round_name, occurrences[period, round_name])
+                occurrences[period, round_name] += 1
+                self.rounds.setdefault(key, {})[agent] = (entered_at, exited_at, event)
+
+    def transitions(self) -> List[AlignedTransition]:
+        """Get the aligned occurrences of the rounds, with the lags of each agent behind the first one."""
+        transitions = []
+        for (period, round_name, occurrence), agents in self.rounds.items():
+            first_entry = min(entered_at for entered_at, _, _ in agents.values())
+            first_exit = min(exited_at for _, exited_at, _ in agents.values())
+            for agent, (entered_at, exited_at, event) in sorted(agents.items()):
+                transitions.append(
+                    AlignedTransition(
+                        period=period,
+                        round_name=round_name,
+                        occurrence=occurrence,
+                        agent=agent,
+                        entered_at=entered_at,
+                        exited_at=exited_at,
+                        exit_event=event,
+                        entry_lag=(entered_at - first_entry).total_seconds(),
+                        exit_lag=(exited_at - first_exit).total_seconds(),
+                    )
+                )
+        return transitions
+
+    def round_latencies(self) -> List[LatencyStats]:
+        """Get the distributions of the durations of the rounds, across all the agents."""
+        durations: DefaultDict[str, List[float]] = defaultdict(list)
+        for (_, round_name, _), agents in self.rounds.items():
+            for entered_at, exited_at, _ in agents.values():
+                durations[round_name].append((exited_at - entered_at).total_seconds())
+        return [
+            summarise(ROUNDS, round_name, values)
+            for round_name, values in sorted(durations.items())
+        ]
+
+    def behaviour_latencies(self) -> List[LatencyStats]:
+        """Get the distributions of the durations of the behaviours, from their entry to the next behaviour's."""
+        durations: DefaultDict[str, List[float]] = defaultdict(list)
+        for db in self._dbs.values():
+            entries = db.behaviour_entries()
+            for (entered_at, behaviour), (next_entered_at, _) in zip(
+                entries, entries[1:]
+            ):
+                durations[behaviour].append(
+                    (next_entered_at - entered_at).total_seconds()
+                )
+        return [
+            summarise(BEHAVIOURS, behaviour, values)
+            for behaviour, values in sorted(durations.items())
+        ]
+
+    def time_to_consensus(self) -> List[LatencyStats]:
+        """Get the distributions of the times from the first agent entering a round to the agents agreeing to exit it."""
+        durations: DefaultDict[str, List[float]] = defaultdict(list)
+        for (_, round_name, _), agents in self.rounds.items():
+            first_entry = min(entered_at for entered_at, _, _ in agents.values())
+            first_exit = min(exited_at for _, exited_at, _ in agents.values())
+            durations[round_name].append((first_exit - first_entry).total_seconds())
+        return [
+            summarise(CONSENSUS, round_name, values)
+            for round_name, values in sorted(durations.items())
+        ]
+
+    def stragglers(self) -> List[LatencyStats]:
+        """Get the distributions of the lags of the agents behind the first agent exiting each round."""
+        lags: DefaultDict[str, List[float]] = defaultdict(list)
+        slowest: DefaultDict[str, int] = defaultdict(int)
+        for agents in self.rounds.values():
+            if len(agents) < 2:
+                continue
+            first_exit = min(exited_at for _, exited_at, _ in agents.values())
+            for agent, (_, exited_at, _) in agents.items():
+                lags[agent].append((exited_at - first_exit).total_seconds())
+            last_agent, (_, last_exit, _) = max(
+                agents.items(), key=lambda item: item[1][1]
+            )
+            if last_exit > first_exit:
+                slowest[last_agent] += 1
+        return [
+            summarise(STRAGGLERS, agent, values, slowest[agent])
+            for agent, values in sorted(lags.items())
+        ]
+
+    def latencies(self) -> List[LatencyStats]:
+        """Get all the latency distributions."""
+        return [
+            *self.round_latencies(),
+            *self.behaviour_latencies(),
+            *self.time_to_consensus(),
+            *self.stragglers(),
+        ]
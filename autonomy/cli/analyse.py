@@ -20,7 +20,7 @@
 """Analyse CLI module."""
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, cast
+from typing import Any, List, Optional, Sequence, cast
 from warnings import filterwarnings
 
 import click
@@ -35,8 +35,11 @@ from autonomy.analyse.handlers import check_handlers
 from autonomy.analyse.logs.base import TIME_FORMAT
 from autonomy.chain.config import ChainType
 from autonomy.cli.helpers.analyse import (
+    EXPORT_FORMATS,
     ParseLogs,
+    TABLE,
     check_service_readiness,
+    export_records,
     list_all_skill_yaml_files,
     load_package_tree,
     run_dialogues_check,
@@ -185,6 +188,12 @@ def docstrings(ctx: Context, update: bool) -> None:
     is_flag=True,
     help="Use this flag to reset the log database.",
 )
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Number of worker processes ingesting the agent logs in parallel, defaults to the number of CPUs.",
+)
 @click.option(
     "-a",
     "--agent",
@@ -236,6 +245,11 @@ def docstrings(ctx: Context, update: bool) -> None:
     type=str,
     help="Print only the FSM execution path",
 )
+@click.option(
+    "--contains",
+    type=str,
+    help="Substring which the messages must contain, looked up in the full-text index.",
+)
 @click.option(
     "-ir",
     "--include-regex",
@@ -263,8 +277,10 @@ def _parse_logs(  # pylint: disable=too-many-arguments
     behaviour_name: Optional[str],
     include_regexes: List[str],
     exclude_regexes: List[str],
+    contains: Optional[str] = None,
     reset_db: bool = False,
     fsm_path: bool = False,
+    workers: Optional[int] = None,
 ) -> None:
     """A tool for analysing autonomous agent runtime logs"""
 
@@ -279,7 +295,7 @@ def _parse_logs(  # pylint: disable=too-many-arguments
             f"Please provide agent IDs to select logs; Available agents: {parser.agents}"
         )
 
-    parser.create_tables(reset=reset_db)
+    parser.create_tables(reset=reset_db, workers=workers)
     selection = (
         parser.select(
             agents=agents,
@@ -289,6 +305,7 @@ def _parse_logs(  # pylint: disable=too-many-arguments
             period=period,
             round_name=round_name,
             behaviour_name=behaviour_name,
+            contains=contains,
         )
         .re_include(regexes=include_regexes)
         .re_exclude(regexes=exclude_regexes)
@@ -300,6 +317,91 @@ def _parse_logs(  # pylint: disable=too-many-arguments
     return selection.table()
 
 
+@analyse_group.command("latency")
+@click.option(
+    "--from-dir",
+    "logs_dir",
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    required=True,
+    help="Path to logs directory",
+)
+@click.option(
+    "--reset-db",
+    is_flag=True,
+    help="Use this flag to reset the log database.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Number of worker processes ingesting the agent logs in parallel, defaults to the number of CPUs.",
+)
+@click.option(
+    "-a",
+    "--agent",
+    "agents",
+    type=str,
+    multiple=True,
+    help="Agent IDs to include in analysis, defaults to all the agents.",
+)
+@click.option(
+    "--timeline",
+    is_flag=True,
+    help="Export the round transitions of the agents aligned with each other, instead of the latency distributions.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(choices=EXPORT_FORMATS),
+    default=TABLE,
+    help="Output format.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Path to the file to export to, defaults to the standard output.",
+)
+def _analyse_latency(  # pylint: disable=too-many-arguments
+    logs_dir: str,
+    agents: List[str],
+    output_format: str,
+    output: Optional[str],
+    reset_db: bool = False,
+    workers: Optional[int] = None,
+    timeline: bool = False,
+) -> None:
+    """Analyse the round and behaviour latencies of an agent service, aligning the logs of its agents."""
+
+    parser = ParseLogs().from_dir(logs_dir=Path(logs_dir))
+    if parser.n_agents == 0:
+        raise click.ClickException(f"Cannot find agent log data in {logs_dir}")
+
+    unknown_agents = set(agents) - set(parser.agents)
+    if len(unknown_agents) > 0:
+        raise click.ClickException(
+            f"Cannot find the logs of {sorted(unknown_agents)}; Available agents: {parser.agents}"
+        )
+
+    parser.create_tables(reset=reset_db, workers=workers)
+    round_timeline = parser.round_timeline(
+        agents=sorted(agents) if len(agents) > 0 else sorted(parser.agents)
+    )
+    if timeline:
+        records: Sequence[Any] = round_timeline.transitions()
+    else:
+        records = round_timeline.latencies()
+    export_records(
+        records=records,
+        output_format=output_format,
+        output=None if output is None else Path(output),
+    )
+
+
 @analyse_group.command(name="handlers")
 @pass_ctx
 @click.option(
@@ -19,11 +19,18 @@
 
 """Helpers for analyse command"""
 
+import csv
+import io
+import json
+import os
 import re
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, cast
 
 import click
 from aea.components.base import load_aea_package
@@ -45,14 +52,10 @@ from aea.package_manager.v1 import PackageManagerV1
 from aea_cli_ipfs.ipfs_utils import IPFSTool
 
 from autonomy.analyse.dialogues import check_dialogues_in_a_skill_package
-from autonomy.analyse.logs.base import (
-    ENTER_ROUND_REGEX,
-    EXIT_ROUND_REGEX,
-    LOGS_DB,
-    LogRow,
-)
+from autonomy.analyse.logs.base import LOGS_DB, LogRow
 from autonomy.analyse.logs.collection import FromDirectory, LogCollection
 from autonomy.analyse.logs.db import AgentLogsDB
+from autonomy.analyse.logs.latency import RoundTimeline
 from autonomy.analyse.service import ServiceAnalyser, ServiceValidationFailed
 from autonomy.chain.config import ChainType, ContractConfigs
 from autonomy.chain.exceptions import FailedToRetrieveComponentMetadata
@@ -63,6 +66,12 @@ from autonomy.configurations.base import PACKAGE_TYPE_TO_CONFIG_CLASS, Service
 from autonomy.constants import ABSTRACT_ROUND_ABCI_SKILL_WITH_HASH
 
 
+TABLE = "table"
+CSV = "csv"
+JSON = "json"
+EXPORT_FORMATS = (TABLE, CSV, JSON)
+
+
 def load_package_tree(packages_dir: Path) -> None:
     """Load package tree."""
 
@@ -109,6 +118,11 @@ def run_dialogues_check(
         raise click.ClickException(str(e))
 
 
+def _rate(n_rows: int, elapsed: float) -> str:
+    """Format the ingestion rate of log rows."""
+    return f"{n_rows / elapsed:.0f}" if elapsed > 0 else "-"
+
+
 class ParseLogs:
     """Parse agent logs."""
 
@@ -116,11 +130,14 @@ class ParseLogs:
     _collection: LogCollection
     _db_path: Path
 
-    results: Dict[str, List[LogRow]]
-
     def __init__(self) -> None:
         """Initialize object."""
 
+        self._selected_agents: List[str] = []
+        self._filters: Dict[str, Any] = {}
+        self._include_regexes: List[str] = []
+        self._exclude_regexes: List[str] = []
+
     @property
     def agents(self) -> List[str]:
         """Available agents."""
@@ -145,20 +162,48 @@ class ParseLogs:
 
         return self
 
-    def create_tables(self, reset: bool = False) -> "ParseLogs":
-        """Create required tables."""
+    def create_tables(
+        self, reset: bool = False, workers: Optional[int] = None
+    ) -> "ParseLogs":
+        """Create required tables, ingesting the logs of the agents in parallel worker processes."""
 
-        for agent, db in self._dbs.items():
-            db_exists = db.exists()
-            if db_exists and not reset:
-                continue
+        # the logs which were already ingested are only ingested from their last ingested log block onwards
+        agents = list(self._dbs)
+        if len(agents) == 0:
+            return self
 
-            self._collection.create_agent_db(
-                agent=agent,
-                db=db,
-                reset=reset,
-            )
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(agents))
+        start = time.perf_counter()
+        if workers == 1:
+            results = [
+                self._collection.ingest(agent=agent, db_path=self._db_path, reset=reset)
+                for agent in agents
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(
+                        self._collection.ingest,
+                        agents,
+                        [self._db_path] * len(agents),
+                        [reset] * len(agents),
+                    )
+                )
 
+        for agent, (n_rows, elapsed) in zip(agents, results):
+            click.echo(
+                f"Ingested {n_rows} log rows of {agent} in {elapsed:.2f}s ({_rate(n_rows, elapsed)} rows/s)",
+                err=True,
+            )
+        n_rows = sum(n_rows for n_rows, _ in results)
+        elapsed = time.perf_counter() - start
+        click.echo(
+            f"Ingested {n_rows} log rows of {len(agents)} agents with {workers} workers "
+            f"in {elapsed:.2f}s ({_rate(n_rows, elapsed)} rows/s)",
+            err=True,
+        )
         return self
 
     def select(  # pylint: disable=too-many-arguments
@@ -170,71 +215,76 @@ class ParseLogs:
         period: Optional[int],
         round_name: Optional[str],
         behaviour_name: Optional[str],
+        contains: Optional[str] = None,
     ) -> "ParseLogs":
-        """Query and return results."""
-
-        results = {}
-        for agent in agents:
-            results[agent] = self._dbs[agent].select(
-                start_time=start_time,
-                end_time=end_time,
-                log_level=log_level,
-                period=period,
-                round_name=round_name,
-                behaviour_name=behaviour_name,
-            )
-
-        self.results = results
+        """Select the agents and the filters for the results."""
+
+        self._selected_agents = list(agents)
+        self._filters = dict(
+            start_time=start_time,
+            end_time=end_time,
+            log_level=log_level,
+            period=period,
+            round_name=round_name,
+            behaviour_name=behaviour_name,
+            contains=contains,
+        )
+        self._include_regexes = []
+        self._exclude_regexes = []
         return self
 
     def re_include(self, regexes: List[str]) -> "ParseLogs":
-        """Apply a set of regexes on the result."""
-        if len(regexes) == 0:
-            return self
-
-        compiled_re = [re.compile(pattern) for pattern in regexes]
-
-        def _apply_filter(row: LogRow) -> bool:
-            return any(map(lambda _re: _re.match(row[2]) is not None, compiled_re))
-
-        for agent, logs in self.results.items():
-            self.results[agent] = list(filter(_apply_filter, logs))
+        """Keep the logs matching any of the given regexes."""
 
+        for pattern in regexes:
+            re.compile(pattern)
+        self._include_regexes.extend(regexes)
         return self
 
     def re_exclude(self, regexes: List[str]) -> "ParseLogs":
-        """Apply a set of regexes on the result."""
+        """Drop the logs matching all of the given regexes."""
 
-        if len(regexes) == 0:
-            return self
+        for pattern in regexes:
+            re.compile(pattern)
+        self._exclude_regexes.extend(regexes)
+        return self
 
-        compiled_re = [re.compile(pattern) for pattern in regexes]
+    @property
+    def results(self) -> Dict[str, Iterator[LogRow]]:
+        """The selected logs of each agent, streamed from the database as they are consumed."""
+
+        return {
+            agent: self._dbs[agent].iter_select(
+                **self._filters,
+                include_regexes=self._include_regexes,
+                exclude_regexes=self._exclude_regexes,
+            )
+            for agent in self._selected_agents
+        }
 
-        def _apply_filter(row: LogRow) -> bool:
-            return any(map(lambda _re: _re.match(row[2]) is None, compiled_re))
+    def round_timeline(self, agents: List[str]) -> RoundTimeline:
+        """Align the logs of the given agents on their round transitions."""
 
-        for agent, logs in self.results.items():
-            self.results[agent] = list(filter(_apply_filter, logs))
-
-        return self
+        return RoundTimeline(dbs={agent: self._dbs[agent] for agent in agents})
 
     def execution_path(self) -> None:
         """Output FSM path"""
-        for agent, logs in self.results.items():
-            period = -1
+        for agent in self._selected_agents:
+            period = None
             click.echo(f"Agent {agent}")
-            for _, _, message, _, _, _ in logs:
-                match = ENTER_ROUND_REGEX.match(message)
-                if match is not None:
-                    _, _period = cast(Tuple[str, int], match.groups())
+            for _period, round_name, exit_event in self._dbs[agent].execution_path(
+                start_time=self._filters.get("start_time"),
+                end_time=self._filters.get("end_time"),
+                period=self._filters.get("period"),
+                round_name=self._filters.get("round_name"),
+                with_entries=True,
+            ):
+                if exit_event is None:
                     if _period != period:
                         period = _period
                         click.echo(f"|_ Period {period}")
-
-                match = EXIT_ROUND_REGEX.match(message)
-                if match is not None:
-                    round_name, exit_event = match.groups()
-                    click.echo(f"| |_ {round_name} | {exit_event}")
+                    continue
+                click.echo(f"| |_ {round_name} | {exit_event}")
             click.echo("|_ End\n")
 
     def table(self) -> None:
@@ -247,6 +297,51 @@ class ParseLogs:
             click.echo("--- End ---")
 
 
+def _format_cell(value: Any) -> str:
+    """Format a cell of a table."""
+    if value is None:
+        return "-"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+def export_records(
+    records: Sequence[Any], output_format: str, output: Optional[Path] = None
+) -> None:
+    """Export records, i.e., dataclass instances of the same type, to a file or to the standard output."""
+
+    rows = [
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in asdict(record).items()
+        }
+        for record in records
+    ]
+    columns = [field.name for field in fields(records[0])] if len(records) > 0 else []
+    if output_format == JSON:
+        content = json.dumps(rows, indent=2)
+    elif output_format == CSV:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        content = buffer.getvalue().rstrip("\n")
+    else:
+        cells = [columns] + [
+            [_format_cell(value) for value in row.values()] for row in rows
+        ]
+        widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+        content = "\n".join(
+            "  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+            for line in cells
+        )
+
+    if output is None:
+        click.echo(content)
+        return
+    output.write_text(content + "\n", encoding="utf-8")
+    click.echo(f"Exported {len(records)} records to {output}", err=True)
+
+
 def _get_content_from_ipfs(package_id: PackageId, file: str) -> bytes:
     """Read content from the IPFS registry."""
     try:
@@ -18,18 +18,20 @@
 # ------------------------------------------------------------------------------
 """Connection to interact with an ABCI server."""
 import asyncio
+import concurrent.futures
 import json
 import logging
 import os
 import platform
 import signal
 import subprocess  # nosec
+import time
 from asyncio import AbstractEventLoop, AbstractServer, CancelledError, Task
 from io import BytesIO
 from logging import Logger
 from pathlib import Path
 from threading import Event, Thread
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
 
 import grpc
 from aea.configurations.base import PublicId
@@ -68,6 +70,7 @@ from packages.valory.connections.abci.tendermint.abci.types_pb2 import (  # type
     ResponseDeliverTx,
     ResponseEcho,
     ResponseEndBlock,
+    ResponseException,
     ResponseFlush,
     ResponseInfo,
     ResponseInitChain,
@@ -100,8 +103,105 @@ DEFAULT_P2P_LISTEN_ADDRESS = f"{_TCP}{DEFAULT_LISTEN_ADDRESS}:{DEFAULT_P2P_PORT}
 DEFAULT_RPC_LISTEN_ADDRESS = f"{_TCP}{LOCALHOST}:{DEFAULT_RPC_PORT}"
 MAX_READ_IN_BYTES = 2**20  # Max we'll consume on a read stream (1 MiB)
 MAX_VARINT_BYTES = 10  # Max size of varint we support
+DEFAULT_READ_CHUNK_SIZE = 2**16  # Size of the buffered reads (64 KiB)
+DEFAULT_WRITE_HIGH_WATER = 2**20  # Max bytes buffered by the writer (1 MiB)
+DEFAULT_DRAIN_TIMEOUT = 5.0  # Max seconds to write the responses on disconnect
 DEFAULT_TENDERMINT_LOG_FILE = "tendermint.log"
 
+# a direct handler answers the requests of the Tendermint node in-process, bypassing the envelopes and the dialogues;
+# given the requests received together, it answers them in order and returns the responses,
+# until a request which has to be forwarded to the skill as usual, which is left unanswered together with the next ones
+DirectHandler = Callable[[Sequence[Request]], List[Response]]
+# the direct handlers, by agent address and target skill id, with the event loop of the agent which they run on
+_DIRECT_HANDLERS: Dict[
+    Tuple[str, str], Tuple[DirectHandler, Optional[AbstractEventLoop]]
+] = {}
+
+
+def register_direct_handler(
+    agent_address: str, skill_id: PublicId, handler: DirectHandler
+) -> None:
+    """
+    Register the handler to which the ABCI connection of an agent dispatches the requests directly.
+
+    The handler is only used if the connection is configured with `direct_dispatch`.
+    It is invoked on the event loop which is running when it is registered, i.e., the agent's one,
+    so that it never runs concurrently with the handlers and the behaviours of the agent,
+    even if the connection runs in a thread of its own, as in the `threaded` runtime mode.
+
+    :param agent_address: the address of the agent.
+    :param skill_id: the public id of the skill of the handler.
+    :param handler: the handler.
+    """
+    try:
+        loop: Optional[AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    _DIRECT_HANDLERS[(agent_address, str(skill_id.without_hash()))] = (handler, loop)
+
+
+def unregister_direct_handler(agent_address: str, skill_id: PublicId) -> None:
+    """
+    Unregister the direct handler of a skill.
+
+    :param agent_address: the address of the agent.
+    :param skill_id: the public id of the skill of the handler.
+    """
+    _DIRECT_HANDLERS.pop((agent_address, str(skill_id.without_hash())), None)
+
+
+def get_direct_handler(
+    agent_address: str, skill_id: PublicId
+) -> Optional[DirectHandler]:
+    """
+    Get the direct handler of a skill, if registered.
+
+    :param agent_address: the address of the agent.
+    :param skill_id: the public id of the skill of the handler.
+    :return: the handler.
+    """
+    handler, _loop = _DIRECT_HANDLERS.get(
+        (agent_address, str(skill_id.without_hash())), (None, None)
+    )
+    return handler
+
+
+async def call_direct_handler(
+    agent_address: str, skill_id: PublicId, requests: Sequence[Request]
+) -> List[Response]:
+    """
+    Call the direct handler of a skill on the event loop of its agent, and wait for its responses.
+
+    :param agent_address: the address of the agent.
+    :param skill_id: the public id of the skill of the handler.
+    :param requests: the requests, in the order they were received.
+    :return: the responses to the first requests, in order. The rest of the requests have to be forwarded to the skill,
+        e.g., all of them if no handler is registered or the agent's loop is not running anymore.
+    """
+    handler, loop = _DIRECT_HANDLERS.get(
+        (agent_address, str(skill_id.without_hash())), (None, None)
+    )
+    if handler is None:
+        return []
+    if loop is None or loop is asyncio.get_running_loop():
+        return handler(requests)
+    if not loop.is_running():
+        return []
+
+    future: "concurrent.futures.Future[List[Response]]" = concurrent.futures.Future()
+
+    def call() -> None:
+        """Call the handler, on the agent's loop."""
+        if not future.set_running_or_notify_cancel():  # pragma: nocover
+            return
+        try:
+            future.set_result(cast(DirectHandler, handler)(requests))
+        except Exception as e:  # pylint: disable=broad-except
+            future.set_exception(e)
+
+    loop.call_soon_threadsafe(call)
+    return await asyncio.wrap_future(future)
+
 
 class DecodeVarintError(Exception):
     """This exception is raised when an error occurs while decoding a varint."""
@@ -157,16 +257,12 @@ class _TendermintABCISerializer:
             raise EncodeVarintError(f"{log_msg}: {number}")
 
         number <<= 1  # Shift to int64
-        buf = b""
-        while True:
-            towrite = number & 0x7F
+        buf = bytearray()
+        while number > 0x7F:
+            buf.append((number & 0x7F) | 0x80)
             number >>= 7
-            if number:
-                buf += bytes((towrite | 0x80,))
-            else:
-                buf += bytes((towrite,))
-                break
-        return buf
+        buf.append(number)
+        return bytes(buf)
 
     @classmethod
     async def decode_varint(
@@ -203,6 +299,32 @@ class _TendermintABCISerializer:
             raise DecodeVarintError("could not decode varint")
         return result >> 1
 
+    @classmethod
+    def parse_varint(
+        cls, buffer: memoryview, offset: int = 0, max_length: int = MAX_VARINT_BYTES
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Decode a number from its varint coding, from an in-memory buffer.
+
+        :param buffer: the buffer to read from.
+        :param offset: the position of the varint in the buffer.
+        :param max_length: the max number of bytes that can be read.
+        :return: the decoded int and the position right after the varint, or None if the buffer ends before the varint does.
+
+        :raise: DecodeVarintError if the varint could not be decoded.
+        """
+        shift = 0
+        result = 0
+        for position in range(offset, min(len(buffer), offset + max_length)):
+            byte = buffer[position]
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result >> 1, position + 1
+            shift += 7
+        if len(buffer) - offset >= max_length:
+            raise DecodeVarintError("could not decode varint")
+        return None
+
     @classmethod
     async def _read_one(cls, buffer: asyncio.StreamReader) -> Optional[int]:
         """
@@ -219,12 +341,8 @@ class _TendermintABCISerializer:
     @classmethod
     def write_message(cls, message: Response) -> bytes:
         """Write a message in a buffer."""
-        buffer = BytesIO(b"")
         protobuf_bytes = message.SerializeToString()
-        encoded = cls.encode_varint(len(protobuf_bytes))
-        buffer.write(encoded)
-        buffer.write(protobuf_bytes)
-        return buffer.getvalue()
+        return cls.encode_varint(len(protobuf_bytes)) + protobuf_bytes
 
 
 class VarintMessageReader:  # pylint: disable=too-few-public-methods
@@ -255,6 +373,211 @@ class VarintMessageReader:  # pylint: disable=too-few-public-methods
         return result.getvalue()
 
 
+class BufferedVarintMessageReader:  # pylint: disable=too-few-public-methods
+    """
+    Buffered varint message reader.
+
+    Unlike the `VarintMessageReader`, it does not await the stream for every byte of the varint prefixes.
+    Instead, it reads the stream in large chunks and slices the length-delimited messages out of them.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, chunk_size: int = DEFAULT_READ_CHUNK_SIZE
+    ) -> None:
+        """
+        Initialize the reader.
+
+        :param reader: the stream to read from.
+        :param chunk_size: the number of bytes to request from the stream on every read.
+        """
+        enforce(chunk_size >= 1, "chunk size must be at least one")
+        self._reader = reader
+        self._chunk_size = chunk_size
+        self._view = memoryview(b"")
+        self._offset = 0
+
+    def _append(self, chunk: bytes) -> None:
+        """Append a chunk to the bytes that have not been consumed yet."""
+        remaining = self._view[self._offset :]
+        # only the bytes of a partially received message are copied
+        self._view = memoryview(bytes(remaining) + chunk if remaining else chunk)
+        self._offset = 0
+
+    async def read_next_message(self) -> memoryview:
+        """
+        Read next message.
+
+        The returned message is a read-only view of the buffered chunk, so it is not copied.
+
+        :return: the next message.
+        """
+        parsed = _TendermintABCISerializer.parse_varint(self._view, self._offset)
+        while parsed is None:
+            chunk = await self._reader.read(self._chunk_size)
+            if chunk == b"":
+                if self._offset == len(self._view):
+                    raise EOFError()
+                raise DecodeVarintError("could not decode varint")
+            self._append(chunk)
+            parsed = _TendermintABCISerializer.parse_varint(self._view, self._offset)
+
+        varint, start = parsed
+        if varint > MAX_READ_IN_BYTES:
+            raise TooLargeVarint(received_size=varint, max_size=MAX_READ_IN_BYTES)
+        end = start + varint
+        missing = end - len(self._view)
+        if missing > 0:
+            try:
+                chunk = await self._reader.readexactly(missing)
+            except asyncio.IncompleteReadError as e:
+                message_bytes = bytes(self._view[start:]) + e.partial
+                self._view, self._offset = memoryview(b""), 0
+                raise ShortBufferLengthError(varint, message_bytes) from e
+            # the bytes before the message are dropped when appending the rest of it
+            start, end = start - self._offset, end - self._offset
+            self._append(chunk)
+
+        self._offset = end
+        return self._view[start:end]
+
+    def read_buffered_messages(self) -> List[memoryview]:
+        """
+        Read the messages which have already been received in full, without waiting for the stream.
+
+        :return: the buffered messages, as read-only views of the buffered chunk.
+        """
+        messages: List[memoryview] = []
+        while True:
+            parsed = _TendermintABCISerializer.parse_varint(self._view, self._offset)
+            if parsed is None:
+                return messages
+            varint, start = parsed
+            end = start + varint
+            if varint > MAX_READ_IN_BYTES or end > len(self._view):
+                # the message is left to `read_next_message`, which waits for the rest of it or rejects it
+                return messages
+            self._offset = end
+            messages.append(self._view[start:end])
+
+
+class BufferedStreamWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Buffered stream writer.
+
+    The messages written during the same iteration of the event loop are coalesced into a single buffer,
+    which is flushed to the stream with a single write, and the stream is drained before flushing the next buffer.
+    """
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        high_water: int = DEFAULT_WRITE_HIGH_WATER,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        :param writer: the stream to write to.
+        :param high_water: the number of buffered bytes above which writing waits for the buffer to be flushed.
+        :param logger: the logger.
+        """
+        self._writer = writer
+        self._high_water = high_water
+        self.logger = logger or logging.getLogger()
+        self._buffer: List[bytes] = []
+        self._buffered_at: List[float] = []
+        self._buffered_bytes = 0
+        self._flush_task: Optional[Task] = None
+        # metrics
+        self.max_queue_depth = 0
+        self.n_messages = 0
+        self.n_flushes = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of messages waiting to be flushed."""
+        return len(self._buffer)
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """Get the metrics of the writer, with the latencies between buffering and flushing the messages in seconds."""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "n_messages": self.n_messages,
+            "n_flushes": self.n_flushes,
+            "avg_latency": self.total_latency / self.n_messages
+            if self.n_messages
+            else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+    async def write(self, data: bytes) -> None:
+        """
+        Buffer a message, to be flushed on the next iteration of the event loop.
+
+        :param data: the message to write.
+        """
+        self._buffer.append(data)
+        self._buffered_at.append(time.perf_counter())
+        self._buffered_bytes += len(data)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+        if self._buffered_bytes > self._high_water:
+            # apply backpressure, if the stream cannot keep up with the messages
+            await self.drain()
+
+    async def _flush(self) -> None:
+        """Flush the buffered messages, until there are none left."""
+        while self._buffer:
+            buffer, buffered_at = self._buffer, self._buffered_at
+            self._buffer, self._buffered_at, self._buffered_bytes = [], [], 0
+            try:
+                self._writer.write(b"".join(buffer))
+                flushed_at = time.perf_counter()
+                self.n_messages += len(buffer)
+                self.n_flushes += 1
+                self.total_latency += sum(flushed_at - at for at in buffered_at)
+                self.max_latency = max(self.max_latency, flushed_at - buffered_at[0])
+                await self._writer.drain()
+            except ConnectionError as e:
+                self.logger.error(
+                    f"Could not write to the stream: {type(e).__name__}: {e}. "
+                    f"The {self.queue_depth} buffered messages will be dropped."
+                )
+                self._buffer, self._buffered_at, self._buffered_bytes = [], [], 0
+            except Exception as e:  # pylint: disable=broad-except
+                # nothing awaits the flushing task, so its failures are handled here
+                self.logger.exception(
+                    f"Unexpected error while writing to the stream: {type(e).__name__}: {e}. "
+                    f"The stream will be closed and the {self.queue_depth} buffered messages will be dropped."
+                )
+                self._buffer, self._buffered_at, self._buffered_bytes = [], [], 0
+                self._writer.close()
+
+    async def drain(self) -> None:
+        """Wait until all the buffered messages have been flushed to the stream."""
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def close(self) -> None:
+        """Stop flushing the buffered messages, dropping those which have not been written to the stream yet."""
+        flush_task, self._flush_task = self._flush_task, None
+        self._buffer, self._buffered_at, self._buffered_bytes = [], [], 0
+        if flush_task is None or flush_task.done():
+            return
+        flush_task.cancel()
+        try:
+            await flush_task
+        except CancelledError:
+            self.logger.debug(
+                "The flushing of the buffered messages has been cancelled."
+            )
+
+
 class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
     """Implements the gRPC servicer (handler)"""
 
@@ -274,23 +597,8 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         self._request_queue = request_queue
         self._dialogues = dialogues
         self._target_skill = target_skill
-        self._response_queues: Dict[str, asyncio.Queue] = {
-            AbciMessage.Performative.RESPONSE_ECHO: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_FLUSH: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_INFO: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_SET_OPTION: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_DELIVER_TX: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_CHECK_TX: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_QUERY: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_COMMIT: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_INIT_CHAIN: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_BEGIN_BLOCK: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_END_BLOCK: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_LIST_SNAPSHOTS: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_OFFER_SNAPSHOT: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_APPLY_SNAPSHOT_CHUNK: asyncio.Queue(),
-            AbciMessage.Performative.RESPONSE_LOAD_SNAPSHOT_CHUNK: asyncio.Queue(),
-        }
+        # the requests forwarded to the skill which are waiting for a response, by dialogue
+        self._pending_responses: Dict[str, asyncio.Future] = {}
 
     async def send(self, envelope: Envelope) -> Response:
         """
@@ -304,7 +612,31 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
             logging.warning(f"Could not create dialogue for message={message}")
             return
 
-        await self._response_queues[message.performative].put(envelope)
+        future = self._pending_responses.get(message.dialogue_reference[0])
+        if future is None or future.done():  # pragma: nocover
+            logging.warning(f"No request is waiting for the response {message}")
+            return
+        future.set_result(message)
+
+    async def _get_response(self, message: AbciMessage) -> AbciMessage:
+        """
+        Forward a request to the skill and wait for its response.
+
+        The response is matched to the request by their dialogue,
+        so that concurrent calls, e.g., the `CheckTx` calls of the mempool, each get their own response.
+
+        :param message: the request.
+        :return: the response.
+        """
+        reference = message.dialogue_reference[0]
+        future = asyncio.get_running_loop().create_future()
+        self._pending_responses[reference] = future
+        envelope = Envelope(to=message.to, sender=message.sender, message=message)
+        try:
+            await self._request_queue.put(envelope)
+            return await future
+        finally:
+            self._pending_responses.pop(reference, None)
 
     async def Echo(
         self, request: RequestEcho, context: grpc.ServicerContext
@@ -320,17 +652,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_echo(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_ECHO
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_echo(message)
         context.set_code(grpc.StatusCode.OK)
@@ -351,17 +673,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_flush(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_FLUSH
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_flush(message)
         context.set_code(grpc.StatusCode.OK)
@@ -382,17 +694,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_info(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_INFO
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_info(message)
         context.set_code(grpc.StatusCode.OK)
@@ -413,17 +715,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_set_option(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_SET_OPTION
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_set_option(message)
         context.set_code(grpc.StatusCode.OK)
@@ -444,17 +736,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_deliver_tx(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_DELIVER_TX
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_deliver_tx(message)
         context.set_code(grpc.StatusCode.OK)
@@ -475,17 +757,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_check_tx(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_CHECK_TX
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_check_tx(message)
         context.set_code(grpc.StatusCode.OK)
@@ -506,17 +778,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_query(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_QUERY
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_query(message)
         context.set_code(grpc.StatusCode.OK)
@@ -537,17 +799,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_commit(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_COMMIT
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_commit(message)
         context.set_code(grpc.StatusCode.OK)
@@ -568,17 +820,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_init_chain(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_INIT_CHAIN
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_init_chain(message)
         context.set_code(grpc.StatusCode.OK)
@@ -599,17 +841,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_begin_block(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_BEGIN_BLOCK
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_begin_block(message)
         context.set_code(grpc.StatusCode.OK)
@@ -630,17 +862,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_end_block(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_END_BLOCK
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_end_block(message)
         context.set_code(grpc.StatusCode.OK)
@@ -661,17 +883,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_list_snapshots(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_LIST_SNAPSHOTS
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_list_snapshots(message)
         context.set_code(grpc.StatusCode.OK)
@@ -692,17 +904,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_offer_snapshot(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_OFFER_SNAPSHOT
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_offer_snapshot(message)
         context.set_code(grpc.StatusCode.OK)
@@ -723,17 +925,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_load_snapshot_chunk(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_LOAD_SNAPSHOT_CHUNK
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_load_snapshot_chunk(message)
         context.set_code(grpc.StatusCode.OK)
@@ -754,17 +946,7 @@ class ABCIApplicationServicer(types_pb2_grpc.ABCIApplicationServicer):
         message, _ = _TendermintProtocolDecoder.request_apply_snapshot_chunk(
             packed_req, self._dialogues, self._target_skill
         )
-        envelope = Envelope(to=message.to, sender=message.sender, message=message)
-
-        await self._request_queue.put(envelope)
-        message = cast(
-            AbciMessage,
-            (
-                await self._response_queues[
-                    AbciMessage.Performative.RESPONSE_APPLY_SNAPSHOT_CHUNK
-                ].get()
-            ).message,
-        )
+        message = await self._get_response(message)
 
         response = _TendermintProtocolEncoder.response_apply_snapshot_chunk(message)
         context.set_code(grpc.StatusCode.OK)
@@ -809,6 +991,11 @@ class GrpcServerChannel:  # pylint: disable=too-many-instance-attributes
         """Check that the channel is stopped."""
         return self._is_stopped
 
+    @property
+    def n_live_dialogues(self) -> int:
+        """Get the number of the dialogues of the requests forwarded to the skill which are waiting for a response."""
+        return self._dialogues.n_live_dialogues
+
     async def _start_server(self) -> None:
         """Start the gRPC server."""
         self.logger = cast(Logger, self.logger)
@@ -862,12 +1049,14 @@ class GrpcServerChannel:  # pylint: disable=too-many-instance-attributes
 class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
     """TCP server channel to handle incoming communication from the Tendermint node."""
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         target_skill_id: PublicId,
         address: str,
         port: int,
         logger: Optional[Logger] = None,
+        agent_address: str = "",
+        direct_dispatch: bool = False,
     ):
         """
         Initialize the TCP server.
@@ -876,11 +1065,16 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         :param address: the listen address.
         :param port: the port to listen from.
         :param logger: the logger.
+        :param agent_address: the address of the agent, which identifies its direct handler.
+        :param direct_dispatch: whether to dispatch the requests to the direct handler of the target skill, if any.
         """
         self.target_skill_id = target_skill_id
         self.address = address
         self.port = port
         self.logger = logger or logging.getLogger()
+        self.agent_address = agent_address
+        self.direct_dispatch = direct_dispatch
+        self.drain_timeout = DEFAULT_DRAIN_TIMEOUT
 
         # channel state
         self._loop: Optional[AbstractEventLoop] = None
@@ -894,17 +1088,34 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         # this dictionary keeps track of the reader-writer stream pair
         # by socket name (ip address and port)
         self._streams_by_socket: Dict[
-            str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+            str, Tuple[asyncio.StreamReader, BufferedStreamWriter]
         ] = {}
         # this dictionary associates requests to socket name
         # such that responses are sent to the right receiver
         self._request_id_to_socket: Dict[DialogueLabel, str] = {}
+        # the number of requests forwarded to the skill and still waiting for a response, by socket name.
+        # The requests of a socket are dispatched directly only when none is pending,
+        # so that the skill handles them in the order in which they were received
+        self._n_pending_by_socket: Dict[str, int] = {}
 
     @property
     def is_stopped(self) -> bool:
         """Check that the channel is stopped."""
         return self._is_stopped
 
+    @property
+    def n_live_dialogues(self) -> int:
+        """Get the number of the dialogues of the requests forwarded to the skill which are waiting for a response."""
+        return self._dialogues.n_live_dialogues
+
+    @property
+    def write_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Get the metrics of the response writers, by socket name."""
+        return {
+            peer_name: writer.metrics
+            for peer_name, (_reader, writer) in self._streams_by_socket.items()
+        }
+
     async def connect(self, loop: AbstractEventLoop) -> None:
         """
         Connect.
@@ -927,6 +1138,27 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         if self.is_stopped:  # pragma: nocover
             return
         self._is_stopped = True
+        # write the pending responses before closing the connections,
+        # without waiting forever for a peer which has stopped reading
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *(
+                        writer.drain()
+                        for _reader, writer in self._streams_by_socket.values()
+                    )
+                ),
+                timeout=self.drain_timeout,
+            )
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f"The pending responses could not be written within {self.drain_timeout} seconds, "
+                "they will be dropped."
+            )
+        # the flushing tasks are only shielded from the timeout, so they are stopped here
+        await asyncio.gather(
+            *(writer.close() for _reader, writer in self._streams_by_socket.values())
+        )
         self._server = cast(AbstractServer, self._server)
         self._server.close()
         await self._server.wait_closed()
@@ -935,6 +1167,7 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         self._server = None
         self._streams_by_socket = {}
         self._request_id_to_socket = {}
+        self._n_pending_by_socket = {}
 
     async def receive_messages(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
@@ -944,10 +1177,21 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         self.queue = cast(asyncio.Queue, self.queue)
         ip_address, socket, *_ = writer.get_extra_info("peername")
         peer_name = f"{ip_address}:{socket}"
-        self._streams_by_socket[peer_name] = (reader, writer)
+        self._streams_by_socket[peer_name] = (
+            reader,
+            BufferedStreamWriter(writer, logger=self.logger),
+        )
         self.logger.debug(f"Connection with Tendermint @ {peer_name}")
+        try:
+            await self._receive_messages(reader, peer_name)
+        finally:
+            self._forget_peer(peer_name)
 
-        varint_message_reader = VarintMessageReader(reader)
+    async def _receive_messages(
+        self, reader: asyncio.StreamReader, peer_name: str
+    ) -> None:
+        """Receive the incoming messages of a peer, until its connection is closed."""
+        varint_message_reader = BufferedVarintMessageReader(reader)
         while not self.is_stopped:
             try:
                 message_bytes = await varint_message_reader.read_next_message()
@@ -958,13 +1202,16 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
                     # break to the _stop if the connection stops
                     break  # pragma: nocover
                 self.logger.debug(
-                    f"Received {len(message_bytes)} bytes from connection {peer_name}"
+                    "Received %s bytes from connection %s",
+                    len(message_bytes),
+                    peer_name,
                 )
                 message = Request()
                 message.ParseFromString(message_bytes)
             except (
                 DecodeVarintError,
                 DecodeError,
+                ShortBufferLengthError,
             ) as e:  # pragma: nocover
                 self.logger.error(
                     f"an error occurred while reading a message: "
@@ -989,10 +1236,35 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
             except CancelledError:  # pragma: nocover
                 self.logger.debug(f"Read task for peer {peer_name} cancelled.")
                 return
-            await self._handle_message(message, peer_name)
+            messages = [message]
+            if self.direct_dispatch:
+                # the requests received together, e.g., the ones of a block, are dispatched together
+                messages.extend(self._read_buffered_requests(varint_message_reader))
+            n_dispatched = await self._dispatch_directly(messages, peer_name)
+            for message in messages[n_dispatched:]:
+                await self._handle_message(message, peer_name)
+
+    def _read_buffered_requests(
+        self, varint_message_reader: BufferedVarintMessageReader
+    ) -> List[Request]:
+        """Read the requests which have already been received in full, ignoring the ones which cannot be decoded."""
+        messages: List[Request] = []
+        for message_bytes in varint_message_reader.read_buffered_messages():
+            message = Request()
+            try:
+                message.ParseFromString(message_bytes)
+            except DecodeError as e:  # pragma: nocover
+                self.logger.error(
+                    f"an error occurred while reading a message: "
+                    f"{type(e).__name__}: {e}. "
+                    f"The message will be ignored."
+                )
+                continue
+            messages.append(message)
+        return messages
 
     async def _handle_message(self, message: Request, peer_name: str) -> None:
-        """Handle a single message from a peer."""
+        """Handle a single message from a peer, forwarding it to the skill."""
         try:
             req_type = message.WhichOneof("value")
             result = _TendermintProtocolDecoder.process(
@@ -1001,9 +1273,7 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
             if result is not None:
                 request, dialogue = result
                 # associate request to peer, so we remember who to reply to
-                self._request_id_to_socket[
-                    dialogue.incomplete_dialogue_label
-                ] = peer_name
+                self._track_request(dialogue.incomplete_dialogue_label, peer_name)
                 envelope = Envelope(
                     to=request.to, sender=request.sender, message=request
                 )
@@ -1013,6 +1283,70 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
         except Exception as e:  # pylint: disable=broad-except  # pragma: no cover
             self.logger.error(f"Unhandled exception {type(e).__name__}: {e}")
 
+    def _track_request(self, dialogue_label: DialogueLabel, peer_name: str) -> None:
+        """Associate a request forwarded to the skill to its peer, so that the response is sent to it."""
+        self._request_id_to_socket[dialogue_label] = peer_name
+        self._n_pending_by_socket[peer_name] = (
+            self._n_pending_by_socket.get(peer_name, 0) + 1
+        )
+        # the dialogues of the requests which are never answered are evicted from the oldest, and so are the requests
+        while len(self._request_id_to_socket) > self._dialogues.max_dialogues:
+            self._untrack_request(next(iter(self._request_id_to_socket)))
+
+    def _untrack_request(self, dialogue_label: DialogueLabel) -> Optional[str]:
+        """Forget a request forwarded to the skill, returning its peer if it was still tracked."""
+        peer_name = self._request_id_to_socket.pop(dialogue_label, None)
+        if peer_name is not None and peer_name in self._n_pending_by_socket:
+            self._n_pending_by_socket[peer_name] -= 1
+        return peer_name
+
+    def _forget_peer(self, peer_name: str) -> None:
+        """Forget a peer whose connection is closed, together with the requests it is waiting a response for."""
+        self._streams_by_socket.pop(peer_name, None)
+        self._n_pending_by_socket.pop(peer_name, None)
+        pending = [
+            dialogue_label
+            for dialogue_label, peer in self._request_id_to_socket.items()
+            if peer == peer_name
+        ]
+        for dialogue_label in pending:
+            del self._request_id_to_socket[dialogue_label]
+            self._dialogues.discard(dialogue_label)
+
+    async def _dispatch_directly(
+        self, messages: Sequence[Request], peer_name: str
+    ) -> int:
+        """
+        Dispatch the requests received together to the direct handler of the target skill, if possible.
+
+        If the handler fails, an `exception` response is written,
+        so that the node stops on the failure of the application instead of waiting for the response forever.
+
+        :param messages: the requests, in the order they were received.
+        :param peer_name: the socket name of the peer which sent the requests.
+        :return: the number of the first requests which were answered by the direct handler.
+        """
+        if not self.direct_dispatch or self._n_pending_by_socket.get(peer_name, 0):
+            return 0
+        try:
+            responses = await call_direct_handler(
+                self.agent_address, self.target_skill_id, messages
+            )
+            n_dispatched = len(responses)
+        except Exception as e:  # pylint: disable=broad-except
+            # the node would wait forever for a response, so it is told that the application has failed instead
+            self.logger.exception(
+                f"The direct handler failed to answer the requests: {type(e).__name__}: {e}"
+            )
+            responses = [
+                Response(exception=ResponseException(error=f"{type(e).__name__}: {e}"))
+            ]
+            n_dispatched = len(messages)
+        _reader, writer = self._streams_by_socket[peer_name]
+        for response in responses:
+            await writer.write(_TendermintABCISerializer.write_message(response))
+        return n_dispatched
+
     async def get_message(self) -> Envelope:
         """Get a message from the queue."""
         return await cast(asyncio.Queue, self.queue).get()
@@ -1027,12 +1361,17 @@ class TcpServerChannel:  # pylint: disable=too-many-instance-attributes
             return
 
         # we only deal with atomic request-response cycles, so it is safe to remove the reference
-        peer_name = self._request_id_to_socket.pop(dialogue.incomplete_dialogue_label)
+        peer_name = self._untrack_request(dialogue.incomplete_dialogue_label)
+        if peer_name is None or peer_name not in self._streams_by_socket:
+            self.logger.warning(
+                f"The peer of the request answered by message={message} is gone."
+            )
+            return
         _reader, writer = self._streams_by_socket[peer_name]
         protobuf_message = _TendermintProtocolEncoder.process(message)
         data = _TendermintABCISerializer.write_message(protobuf_message)
-        self.logger.debug(f"Writing {len(data)} bytes")
-        writer.write(data)
+        self.logger.debug("Writing %s bytes", len(data))
+        await writer.write(data)
 
 
 class StoppableThread(
@@ -1315,6 +1654,10 @@ class ABCIServerConnection(Connection):  # pylint: disable=too-many-instance-att
         self._process_tendermint_params()
 
         if self.use_grpc:
+            if self.direct_dispatch:
+                self.logger.warning(
+                    "The direct dispatch of the requests is only supported by the TCP channel and will not be used."
+                )
             self.channel = GrpcServerChannel(
                 self.target_skill_id,
                 address=self.host,
@@ -1327,6 +1670,8 @@ class ABCIServerConnection(Connection):  # pylint: disable=too-many-instance-att
                 address=self.host,
                 port=self.port,
                 logger=self.logger,
+                agent_address=self.address,
+                direct_dispatch=self.direct_dispatch,
             )
 
     def _process_connection_params(self) -> None:
@@ -1337,6 +1682,7 @@ class ABCIServerConnection(Connection):  # pylint: disable=too-many-instance-att
         - host
         - port
         - target_skill_id
+        - direct_dispatch
         """
         self.host = cast(str, self.configuration.config.get("host"))
         self.port = cast(int, self.configuration.config.get("port"))
@@ -1352,6 +1698,9 @@ class ABCIServerConnection(Connection):  # pylint: disable=too-many-instance-att
         if target_skill_id is None:  # pragma: no cover
             raise ValueError("Provided target_skill_id is not a valid public id.")
         self.target_skill_id = target_skill_id
+        self.direct_dispatch = cast(
+            bool, self.configuration.config.get("direct_dispatch", False)
+        )
 
     def _process_tendermint_params(self) -> None:
         """
@@ -18,18 +18,87 @@
 # ------------------------------------------------------------------------------
 """Dialogues classes for the ABCI connection."""
 
-from typing import Any
+from typing import Any, Dict, cast
 
 from aea.protocols.base import Address, Message
 from aea.protocols.dialogue.base import Dialogue as BaseDialogue
+from aea.protocols.dialogue.base import (
+    DialogueLabel,
+    Dialogues,
+    PersistDialoguesStorageWithOffloading,
+)
 
 from packages.valory.protocols.abci.dialogues import AbciDialogue as BaseAbciDialogue
 from packages.valory.protocols.abci.dialogues import AbciDialogues as BaseAbciDialogues
 
 
+# the maximum number of ABCI dialogues waiting for a response, i.e., of requests in flight.
+# Tendermint keeps at most a few requests in flight, except when it rechecks its mempool (5000 txs by default)
+DEFAULT_MAX_LIVE_DIALOGUES = 10_000
+
+
 AbciDialogue = BaseAbciDialogue
 
 
+class BoundedDialoguesStorage(PersistDialoguesStorageWithOffloading):
+    """
+    A dialogues storage which keeps a bounded number of live dialogues.
+
+    The ABCI dialogues consist of a request and its response, so they are discarded as soon as they are answered.
+    The ones which are never answered, e.g., because the response got lost, are evicted from the oldest,
+    so that the storage does not grow over the lifetime of the agent.
+    """
+
+    def __init__(
+        self, dialogues: Dialogues, max_dialogues: int = DEFAULT_MAX_LIVE_DIALOGUES
+    ) -> None:
+        """
+        Initialize the storage.
+
+        :param dialogues: the dialogues of the storage.
+        :param max_dialogues: the maximum number of live dialogues to keep.
+        """
+        if max_dialogues < 1:
+            raise ValueError(
+                f"At least one live dialogue must be kept, got {max_dialogues}."
+            )
+        super().__init__(dialogues)
+        self.max_dialogues = max_dialogues
+        self.n_evicted = 0
+        # the live dialogues, from the oldest to the newest
+        self._live_dialogues: Dict[DialogueLabel, BaseDialogue] = {}
+
+    @property
+    def n_live(self) -> int:
+        """Get the number of live dialogues."""
+        return len(self._live_dialogues)
+
+    def cleanup(self) -> None:
+        """Clean up the dialogue storage"""
+        super().cleanup()
+        self._live_dialogues = {}
+
+    def add(self, dialogue: BaseDialogue) -> None:
+        """Add a dialogue to the storage, evicting the oldest live dialogues if the storage is full."""
+        super().add(dialogue)
+        self._live_dialogues[dialogue.dialogue_label] = dialogue
+        while len(self._live_dialogues) > self.max_dialogues:
+            self.remove(next(iter(self._live_dialogues)))
+            self.n_evicted += 1
+
+    def remove(self, dialogue_label: DialogueLabel) -> None:
+        """Remove a dialogue from the storage by its label."""
+        super().remove(dialogue_label)
+        self._live_dialogues.pop(dialogue_label, None)
+        self._live_dialogues.pop(dialogue_label.get_incomplete_version(), None)
+
+    def dialogue_terminal_state_callback(self, dialogue: BaseDialogue) -> None:
+        """Discard a dialogue which reached its terminal state, unless it was already evicted."""
+        if dialogue.dialogue_label not in self._live_dialogues:
+            return
+        super().dialogue_terminal_state_callback(dialogue)
+
+
 class AbciDialogues(BaseAbciDialogues):
     """The dialogues class keeps track of all ABCI dialogues."""
 
@@ -39,6 +108,7 @@ class AbciDialogues(BaseAbciDialogues):
 
         :param kwargs: keyword arguments
         """
+        max_dialogues = kwargs.pop("max_dialogues", DEFAULT_MAX_LIVE_DIALOGUES)
 
         def role_from_first_message(  # pylint: disable=unused-argument
             message: Message, receiver_address: Address
@@ -57,3 +127,19 @@ class AbciDialogues(BaseAbciDialogues):
             role_from_first_message=role_from_first_message,
             dialogue_class=AbciDialogue,
         )
+        self._dialogues_storage = BoundedDialoguesStorage(self, max_dialogues)
+
+    @property
+    def n_live_dialogues(self) -> int:
+        """Get the number of dialogues waiting for a response."""
+        return cast(BoundedDialoguesStorage, self._dialogues_storage).n_live
+
+    @property
+    def max_dialogues(self) -> int:
+        """Get the maximum number of dialogues waiting for a response."""
+        return cast(BoundedDialoguesStorage, self._dialogues_storage).max_dialogues
+
+    def discard(self, dialogue_label: DialogueLabel) -> None:
+        """Discard a live dialogue, e.g., when the peer waiting for its response is gone."""
+        if self._dialogues_storage.is_dialogue_present(dialogue_label):
+            self._dialogues_storage.remove(dialogue_label)
@@ -22,29 +22,36 @@
 # pylint: skip-file
 
 import asyncio
+import gc
 import logging
 import os
 import shutil
+import threading
 import time
+import tracemalloc
 from abc import ABC, abstractmethod
 from cmath import inf
 from contextlib import suppress
+from itertools import cycle
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Callable, Generator, List, NoReturn, cast
+from typing import Any, Callable, Generator, List, NoReturn, Sequence, cast
 from unittest import mock
 from unittest.mock import MagicMock
 
 import docker
+import grpc
 import pytest
 import requests
 from _pytest.fixtures import SubRequest  # type: ignore
-from aea.configurations.base import ConnectionConfig
+from _pytest.logging import LogCaptureFixture
+from aea.configurations.base import ConnectionConfig, PublicId
 from aea.connections.base import ConnectionStates
 from aea.identity.base import Identity
 from aea.mail.base import Envelope
 from aea.protocols.base import Address, Message
 from aea.protocols.dialogue.base import Dialogue as BaseDialogue
+from aea.test_tools.network import get_unused_tcp_port
 from aea_test_autonomy.configurations import ANY_ADDRESS, HTTP_LOCALHOST
 from aea_test_autonomy.docker.base import skip_docker_tests
 from aea_test_autonomy.docker.tendermint import TendermintDockerImage
@@ -61,19 +68,39 @@ from aea_test_autonomy.helpers.async_utils import (
 )
 from docker.models.containers import Container
 from hypothesis import database, given, settings
-from hypothesis.strategies import integers
+from hypothesis.strategies import binary, integers, lists
 
 from packages.valory.connections.abci import check_dependencies as dep_utils
 from packages.valory.connections.abci.connection import (
+    ABCIApplicationServicer,
     ABCIServerConnection,
+    BufferedStreamWriter,
+    BufferedVarintMessageReader,
     DEFAULT_ABCI_PORT,
     DEFAULT_LISTEN_ADDRESS,
     DecodeVarintError,
     EncodeVarintError,
+    GrpcServerChannel,
+    LOCALHOST,
+    MAX_READ_IN_BYTES,
+    PUBLIC_ID,
     ShortBufferLengthError,
+    TcpServerChannel,
     TooLargeVarint,
     VarintMessageReader,
     _TendermintABCISerializer,
+    call_direct_handler,
+    register_direct_handler,
+    unregister_direct_handler,
+)
+from packages.valory.connections.abci.dialogues import AbciDialogues
+from packages.valory.connections.abci.tendermint.abci.types_pb2 import (  # type: ignore
+    Request,
+    RequestCheckTx,
+    Response,
+)
+from packages.valory.connections.abci.tendermint.abci.types_pb2_grpc import (  # type: ignore
+    ABCIApplicationStub,
 )
 from packages.valory.protocols.abci import AbciMessage
 from packages.valory.protocols.abci.custom_types import (
@@ -659,3 +686,698 @@ async def test_varint_message_reader() -> None:
     ):
         res = await vmr.read_next_message()
         assert res == b"hello"
+
+
+def _frame(message: bytes) -> bytes:
+    """Prefix a message with its varint encoded length."""
+    return _TendermintABCISerializer.encode_varint(len(message)) + message
+
+
+def _stream_reader(*chunks: bytes) -> asyncio.StreamReader:
+    """Get a stream reader which has received the given chunks and the EOF."""
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    return reader
+
+
+@settings(database=database.InMemoryExampleDatabase())
+@given(
+    integers(min_value=0, max_value=(1 << 64) - 1),
+    integers(min_value=0, max_value=5),
+)
+def test_parse_varint(value: int, offset: int) -> None:
+    """Test that parsing a varint from a buffer works, also when the buffer is incomplete."""
+    encoded_value = _TendermintABCISerializer.encode_varint(value)
+    buffer = memoryview(b"\xff" * offset + encoded_value + b"\x00")
+    parse = _TendermintABCISerializer.parse_varint
+    assert parse(buffer, offset) == (value, offset + len(encoded_value))
+    assert parse(buffer[: offset + len(encoded_value) - 1], offset) is None
+
+
+def test_parse_varint_raises() -> None:
+    """Test that parsing a varint raises when it is longer than the max length."""
+    with pytest.raises(DecodeVarintError, match="could not decode varint"):
+        _TendermintABCISerializer.parse_varint(memoryview(b"\x80" * 3), max_length=2)
+
+
+@settings(deadline=None, database=database.InMemoryExampleDatabase())
+@given(
+    lists(binary(min_size=1, max_size=300), max_size=20),
+    lists(integers(min_value=1, max_value=100), min_size=1),
+    integers(min_value=1, max_value=128),
+)
+@pytest.mark.asyncio
+async def test_buffered_varint_message_reader(
+    messages: List[bytes], split_sizes: List[int], chunk_size: int
+) -> None:
+    """Test that BufferedVarintMessageReader reads the messages, regardless of how the stream is split."""
+    data = b"".join(_frame(message) for message in messages)
+    chunks, position = [], 0
+    for size in cycle(split_sizes):
+        if position >= len(data):
+            break
+        chunks.append(data[position : position + size])
+        position += size
+
+    reader = BufferedVarintMessageReader(_stream_reader(*chunks), chunk_size)
+    for message in messages:
+        assert await reader.read_next_message() == message
+    with pytest.raises(EOFError):
+        await reader.read_next_message()
+
+
+@pytest.mark.asyncio
+async def test_buffered_varint_message_reader_errors() -> None:
+    """Test the errors of BufferedVarintMessageReader."""
+    too_large = _TendermintABCISerializer.encode_varint(MAX_READ_IN_BYTES + 1)
+    reader = BufferedVarintMessageReader(_stream_reader(too_large))
+    with pytest.raises(TooLargeVarint):
+        await reader.read_next_message()
+
+    reader = BufferedVarintMessageReader(_stream_reader(_frame(b"hello") + b"\x80"))
+    assert await reader.read_next_message() == b"hello"
+    with pytest.raises(DecodeVarintError, match="could not decode varint"):
+        await reader.read_next_message()
+
+    reader = BufferedVarintMessageReader(_stream_reader(_frame(b"hello")[:-1]), 2)
+    with pytest.raises(
+        ShortBufferLengthError,
+        match="expected bytes of length 5, got bytes of length 4",
+    ):
+        await reader.read_next_message()
+    with pytest.raises(EOFError):
+        await reader.read_next_message()
+
+
+@pytest.mark.asyncio
+async def test_buffered_varint_message_reader_read_buffered_messages() -> None:
+    """Test that BufferedVarintMessageReader reads the messages already received in full without waiting for the stream."""
+    data = b"".join(_frame(message) for message in (b"0", b"1", b"2", b"3"))
+    reader = BufferedVarintMessageReader(
+        _stream_reader(data[:-1], data[-1:]), chunk_size=len(data) - 1
+    )
+    assert reader.read_buffered_messages() == []
+    assert await reader.read_next_message() == b"0"
+    assert reader.read_buffered_messages() == [b"1", b"2"]
+    assert reader.read_buffered_messages() == []
+    assert await reader.read_next_message() == b"3"
+
+
+def _recorded_request_stream(n_blocks: int, n_txs: int) -> bytes:
+    """Get a stream of the requests that a Tendermint node sends to the app over its connections."""
+    requests = []
+    for height in range(1, n_blocks + 1):
+        begin_block = Request()
+        begin_block.begin_block.hash = os.urandom(32)
+        begin_block.begin_block.header.chain_id = "autonomy"
+        begin_block.begin_block.header.height = height
+        begin_block.begin_block.header.proposer_address = os.urandom(20)
+        requests.append(begin_block)
+        for _ in range(n_txs):
+            check_tx, deliver_tx = Request(), Request()
+            check_tx.check_tx.tx = deliver_tx.deliver_tx.tx = os.urandom(256)
+            requests.extend((check_tx, deliver_tx))
+        end_block = Request()
+        end_block.end_block.height = height
+        commit, flush = Request(), Request()
+        commit.commit.SetInParent()
+        flush.flush.SetInParent()
+        requests.extend((end_block, commit, flush))
+    return b"".join(_frame(request.SerializeToString()) for request in requests)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_varint_message_readers(caplog: LogCaptureFixture) -> None:
+    """Benchmark the buffered reader against the byte-by-byte reader, over a stream of requests."""
+    stream = _recorded_request_stream(n_blocks=200, n_txs=4)
+    timings, n_messages = {}, 0
+    for reader_cls in (VarintMessageReader, BufferedVarintMessageReader):
+        reader = reader_cls(_stream_reader(stream))  # type: ignore
+        start, n_messages = time.perf_counter(), 0
+        with suppress(EOFError):
+            while True:
+                Request().ParseFromString(await reader.read_next_message())
+                n_messages += 1
+        timings[reader_cls.__name__] = time.perf_counter() - start
+
+    with caplog.at_level(logging.INFO):
+        for name, seconds in timings.items():
+            logging.info(
+                f"{name}: {seconds / n_messages * 1e6:.2f} us per message, "
+                f"{len(stream) / seconds / 2**20:.2f} MiB/s"
+            )
+    assert timings["BufferedVarintMessageReader"] < timings["VarintMessageReader"]
+
+
+class _StreamWriterStub:
+    """A stream writer which records the writes and drains after a loop iteration."""
+
+    def __init__(self) -> None:
+        """Initialize the stub."""
+        self.writes: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        """Record a write."""
+        self.writes.append(data)
+
+    async def drain(self) -> None:
+        """Drain the stream."""
+        await asyncio.sleep(0)
+
+    def close(self) -> None:
+        """Close the stream."""
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_writer() -> None:
+    """Test that BufferedStreamWriter coalesces the messages written during the same loop iteration."""
+    stream = _StreamWriterStub()
+    writer = BufferedStreamWriter(stream)  # type: ignore
+    messages = [bytes([i]) * 10 for i in range(5)]
+    for message in messages:
+        await writer.write(message)
+    assert writer.queue_depth == len(messages)
+    assert stream.writes == []
+
+    await writer.drain()
+    assert stream.writes == [b"".join(messages)]
+    await writer.write(b"last")
+    await writer.drain()
+    assert stream.writes == [b"".join(messages), b"last"]
+
+    metrics = writer.metrics
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_queue_depth"] == len(messages)
+    assert metrics["n_messages"] == len(messages) + 1
+    assert metrics["n_flushes"] == 2
+    assert 0 <= metrics["avg_latency"] <= metrics["max_latency"]
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_writer_backpressure() -> None:
+    """Test that BufferedStreamWriter waits for the stream when the high water mark is exceeded."""
+    stream = _StreamWriterStub()
+    writer = BufferedStreamWriter(stream, high_water=15)  # type: ignore
+    await writer.write(b"0" * 10)
+    assert writer.queue_depth == 1
+    await writer.write(b"1" * 10)
+    assert writer.queue_depth == 0
+    assert stream.writes == [b"0" * 10 + b"1" * 10]
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_writer_connection_error() -> None:
+    """Test that BufferedStreamWriter drops the buffered messages when the connection is lost."""
+    stream = _StreamWriterStub()
+    stream.drain = MagicMock(side_effect=ConnectionResetError)  # type: ignore
+    logger = MagicMock()
+    writer = BufferedStreamWriter(stream, logger=logger)  # type: ignore
+    await writer.write(b"message")
+    await writer.drain()
+    assert writer.queue_depth == 0
+    logger.error.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_writer_unexpected_error() -> None:
+    """Test that BufferedStreamWriter logs an unexpected error of the stream and closes it."""
+    stream = _StreamWriterStub()
+    stream.drain = MagicMock(side_effect=RuntimeError("unexpected"))  # type: ignore
+    logger = MagicMock()
+    writer = BufferedStreamWriter(stream, logger=logger)  # type: ignore
+    await writer.write(b"message")
+    await writer.drain()
+    assert writer.queue_depth == 0
+    logger.exception.assert_called_once()
+    assert stream.closed
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_channel_disconnect_drain_timeout() -> None:
+    """Test that disconnecting does not wait forever for a peer which has stopped reading."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    logger = MagicMock()
+    channel = TcpServerChannel(
+        PublicId.from_str(target_skill_id), LOCALHOST, 0, logger=logger
+    )
+    channel.drain_timeout = 0.1
+    await channel.connect(asyncio.get_event_loop())
+    stuck_stream = _StreamWriterStub()
+    stuck_stream.drain = MagicMock(return_value=asyncio.sleep(3600))  # type: ignore
+    stuck_writer = BufferedStreamWriter(stuck_stream)  # type: ignore
+    await stuck_writer.write(b"message")
+    await asyncio.sleep(0)
+    flush_task = cast(asyncio.Task, stuck_writer._flush_task)
+    channel._streams_by_socket["peer"] = (MagicMock(), stuck_writer)
+    await asyncio.wait_for(channel.disconnect(), timeout=5)
+    assert channel.is_stopped
+    logger.warning.assert_called_once()
+    # the flushing task, which was shielded from the timeout, is not left pending
+    assert flush_task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_writer_close() -> None:
+    """Test that closing BufferedStreamWriter stops flushing and drops the buffered messages."""
+    stream = _StreamWriterStub()
+    stream.drain = MagicMock(return_value=asyncio.sleep(3600))  # type: ignore
+    writer = BufferedStreamWriter(stream)  # type: ignore
+    await writer.close()
+    await writer.write(b"first")
+    await asyncio.sleep(0)
+    await writer.write(b"second")
+    flush_task = cast(asyncio.Task, writer._flush_task)
+    await writer.close()
+    assert flush_task.cancelled()
+    assert writer.queue_depth == 0
+    assert stream.writes == [b"first"]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_channel_batches_responses() -> None:
+    """Test that the responses to a burst of requests are written to the TCP connection in a single batch."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    channel = TcpServerChannel(PublicId.from_str(target_skill_id), LOCALHOST, 0)
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(LOCALHOST, port)
+    app = ABCIAppTest(target_skill_id)
+    n_requests = 10
+
+    try:
+        for i in range(n_requests):
+            request = Request()
+            request.echo.message = str(i)
+            writer.write(_frame(request.SerializeToString()))
+        await writer.drain()
+        envelopes = [await channel.get_message() for _ in range(n_requests)]
+        for envelope in envelopes:
+            reply = app.handle(cast(AbciMessage, envelope.message))
+            await channel.send(
+                Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+            )
+
+        message_reader = BufferedVarintMessageReader(reader)
+        for i in range(n_requests):
+            response = Response()
+            response.ParseFromString(await message_reader.read_next_message())
+            assert response.echo.message == str(i)
+        (peer_metrics,) = channel.write_metrics.values()
+        assert peer_metrics["n_messages"] == n_requests
+        assert peer_metrics["n_flushes"] == 1
+    finally:
+        writer.close()
+        await channel.disconnect()
+
+
+def _answer_directly(requests: Sequence[Request]) -> List[Response]:
+    """Answer the requests directly, until an 'info' one."""
+    responses = []
+    for request in requests:
+        request_type = request.WhichOneof("value")
+        if request_type == "info":
+            break
+        response = Response()
+        getattr(response, request_type).SetInParent()
+        if request_type == "echo":
+            response.echo.message = request.echo.message
+        responses.append(response)
+    return responses
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_channel_direct_dispatch() -> None:
+    """Test that the requests are dispatched directly, unless a request forwarded to the skill is pending."""
+    target_skill_id = PublicId.from_str("dummy_author/dummy:0.1.0")
+    channel = TcpServerChannel(
+        target_skill_id, LOCALHOST, 0, agent_address="agent", direct_dispatch=True
+    )
+    register_direct_handler("agent", target_skill_id, _answer_directly)
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(LOCALHOST, port)
+    app = ABCIAppTest(str(target_skill_id))
+
+    try:
+        echo_0, info, echo_1, echo_2 = Request(), Request(), Request(), Request()
+        echo_0.echo.message, echo_1.echo.message, echo_2.echo.message = "0", "1", "2"
+        info.info.version = "version"
+        for request in (echo_0, info, echo_1):
+            writer.write(_frame(request.SerializeToString()))
+        await writer.drain()
+        # the echo received while the info is pending is forwarded to the skill as well, to keep the responses in order
+        envelopes = [await channel.get_message() for _ in range(2)]
+        assert [
+            cast(AbciMessage, envelope.message).performative for envelope in envelopes
+        ] == [
+            AbciMessage.Performative.REQUEST_INFO,
+            AbciMessage.Performative.REQUEST_ECHO,
+        ]
+        for envelope in envelopes:
+            reply = app.handle(cast(AbciMessage, envelope.message))
+            await channel.send(
+                Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+            )
+        writer.write(_frame(echo_2.SerializeToString()))
+        await writer.drain()
+
+        message_reader = BufferedVarintMessageReader(reader)
+        response_types = []
+        for _ in range(4):
+            response = Response()
+            response.ParseFromString(await message_reader.read_next_message())
+            response_types.append(response.WhichOneof("value"))
+            if response.HasField("echo"):
+                response_types.append(response.echo.message)
+        assert response_types == ["echo", "0", "info", "echo", "1", "echo", "2"]
+        assert cast(asyncio.Queue, channel.queue).empty()
+    finally:
+        unregister_direct_handler("agent", target_skill_id)
+        writer.close()
+        await channel.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_call_direct_handler_on_agent_loop() -> None:
+    """Test that a direct handler is called on the loop of the agent which registered it, if it runs in another thread."""
+    target_skill_id = PublicId.from_str("dummy_author/dummy:0.1.0")
+    agent_loop = asyncio.new_event_loop()
+    agent_thread = threading.Thread(target=agent_loop.run_forever, daemon=True)
+    agent_thread.start()
+    handler_threads = []
+
+    def handler(requests: Sequence[Request]) -> List[Response]:
+        """Record the thread of the handler, and fail on the 'flush' requests."""
+        handler_threads.append(threading.current_thread())
+        if any(request.HasField("flush") for request in requests):
+            raise ValueError("failure")
+        return _answer_directly(requests)
+
+    async def register() -> None:
+        """Register the handler, as the skill does on the agent's loop."""
+        register_direct_handler("agent", target_skill_id, handler)
+
+    asyncio.run_coroutine_threadsafe(register(), agent_loop).result()
+    try:
+        echo, info = Request(), Request()
+        echo.echo.message = "echo"
+        info.info.SetInParent()
+        responses = await call_direct_handler("agent", target_skill_id, [echo, info])
+        assert [response.echo.message for response in responses] == ["echo"]
+        assert handler_threads == [agent_thread]
+
+        flush = Request()
+        flush.flush.SetInParent()
+        with pytest.raises(ValueError, match="failure"):
+            await call_direct_handler("agent", target_skill_id, [flush])
+
+        # the requests are forwarded to the skill once the agent's loop has stopped
+        agent_loop.call_soon_threadsafe(agent_loop.stop)
+        agent_thread.join()
+        assert await call_direct_handler("agent", target_skill_id, [echo]) == []
+    finally:
+        unregister_direct_handler("agent", target_skill_id)
+        agent_loop.close()
+    assert await call_direct_handler("agent", target_skill_id, [echo]) == []
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_channel_direct_dispatch_failure() -> None:
+    """Test that the node is answered with an exception response if the direct handler fails."""
+    target_skill_id = PublicId.from_str("dummy_author/dummy:0.1.0")
+    logger = MagicMock()
+    channel = TcpServerChannel(
+        target_skill_id,
+        LOCALHOST,
+        0,
+        logger=logger,
+        agent_address="agent",
+        direct_dispatch=True,
+    )
+    register_direct_handler(
+        "agent", target_skill_id, MagicMock(side_effect=ValueError("failure"))
+    )
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(LOCALHOST, port)
+
+    try:
+        request = Request()
+        request.commit.SetInParent()
+        writer.write(_frame(request.SerializeToString()))
+        await writer.drain()
+        response = Response()
+        response.ParseFromString(
+            await BufferedVarintMessageReader(reader).read_next_message()
+        )
+        assert response.exception.error == "ValueError: failure"
+        logger.exception.assert_called_once()
+    finally:
+        unregister_direct_handler("agent", target_skill_id)
+        writer.close()
+        await channel.disconnect()
+
+
+async def _serve_request_stream(stream: bytes, n_requests: int, direct: bool) -> float:
+    """Serve a stream of requests through a TCP channel and get the seconds until all the responses are received."""
+    target_skill_id = PublicId.from_str("dummy_author/dummy:0.1.0")
+    channel = TcpServerChannel(
+        target_skill_id, LOCALHOST, 0, agent_address="agent", direct_dispatch=direct
+    )
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(LOCALHOST, port)
+    app = ABCIAppTest(str(target_skill_id))
+
+    async def handle_envelopes() -> None:
+        """Handle the envelopes forwarded to the skill, as the multiplexer and the skill handler would."""
+        while True:
+            envelope = await channel.get_message()
+            reply = app.handle(cast(AbciMessage, envelope.message))
+            await channel.send(
+                Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+            )
+
+    register_direct_handler("agent", target_skill_id, _answer_directly)
+    skill_task = asyncio.ensure_future(handle_envelopes())
+    try:
+        start = time.perf_counter()
+        writer.write(stream)
+        await writer.drain()
+        message_reader = BufferedVarintMessageReader(reader)
+        for _ in range(n_requests):
+            Response().ParseFromString(await message_reader.read_next_message())
+        return time.perf_counter() - start
+    finally:
+        skill_task.cancel()
+        unregister_direct_handler("agent", target_skill_id)
+        writer.close()
+        await channel.disconnect()
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_direct_dispatch(caplog: LogCaptureFixture) -> None:
+    """Benchmark the direct dispatch of the requests against forwarding them to the skill as envelopes."""
+    n_blocks, n_txs = 200, 4
+    stream = _recorded_request_stream(n_blocks, n_txs)
+    n_requests = n_blocks * (2 * n_txs + 4)
+    timings = {
+        path: await _serve_request_stream(stream, n_requests, direct)
+        for path, direct in (("envelopes", False), ("direct", True))
+    }
+
+    with caplog.at_level(logging.INFO):
+        for path, seconds in timings.items():
+            logging.info(
+                f"{path}: {seconds / n_requests * 1e6:.2f} us per request, "
+                f"{n_requests / seconds:.0f} requests/s"
+            )
+    assert timings["direct"] < timings["envelopes"]
+
+
+def test_bounded_dialogues() -> None:
+    """Test that the ABCI dialogues are discarded once answered, and that the oldest live ones are evicted."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    dialogues = AbciDialogues(connection_id=PUBLIC_ID, max_dialogues=2)
+    app = ABCIAppTest(target_skill_id)
+    requests = [
+        dialogues.create(
+            counterparty=target_skill_id,
+            performative=AbciMessage.Performative.REQUEST_ECHO,
+            message=str(i),
+        )[0]
+        for i in range(3)
+    ]
+    assert dialogues.n_live_dialogues == dialogues.max_dialogues == 2
+
+    replies = [app.handle(cast(AbciMessage, request)) for request in requests]
+    assert dialogues.update(replies[0]) is None
+    for reply in replies[1:]:
+        assert dialogues.update(reply) is not None
+    assert dialogues.n_live_dialogues == 0
+
+    with pytest.raises(ValueError, match="At least one live dialogue must be kept"):
+        AbciDialogues(connection_id=PUBLIC_ID, max_dialogues=0)
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_channel_forgets_closed_peer() -> None:
+    """Test that the requests of a peer are forgotten when its connection is closed."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    channel = TcpServerChannel(PublicId.from_str(target_skill_id), LOCALHOST, 0)
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    _reader, writer = await asyncio.open_connection(LOCALHOST, port)
+    app = ABCIAppTest(target_skill_id)
+
+    try:
+        request = Request()
+        request.echo.message = "echo"
+        writer.write(_frame(request.SerializeToString()))
+        await writer.drain()
+        envelope = await channel.get_message()
+        assert channel.n_live_dialogues == 1
+
+        writer.close()
+        while channel._streams_by_socket:
+            await asyncio.sleep(0.01)
+        assert channel.n_live_dialogues == 0
+        assert not channel._request_id_to_socket
+        reply = app.handle(cast(AbciMessage, envelope.message))
+        await channel.send(
+            Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+        )
+    finally:
+        await channel.disconnect()
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_soak_tcp_server_channel_memory(caplog: LogCaptureFixture) -> None:
+    """Soak the TCP channel with requests, the responses of some of which get lost, and check that its memory stays flat."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    max_dialogues, n_blocks, n_txs, n_iterations = 200, 10, 4, 40
+    n_requests = n_blocks * (2 * n_txs + 4)
+    # the captured log records would otherwise be measured too, e.g., with `log_cli_level = DEBUG`
+    logger = logging.getLogger(f"{__name__}.soak")
+    logger.setLevel(logging.WARNING)
+    caplog.set_level(logging.WARNING)
+    channel = TcpServerChannel(
+        PublicId.from_str(target_skill_id), LOCALHOST, 0, logger=logger
+    )
+    channel._dialogues = AbciDialogues(
+        connection_id=PUBLIC_ID, max_dialogues=max_dialogues
+    )
+    await channel.connect(asyncio.get_event_loop())
+    port = cast(asyncio.Server, channel._server).sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection(LOCALHOST, port)
+    message_reader = BufferedVarintMessageReader(reader)
+    app = ABCIAppTest(target_skill_id)
+
+    memory = []
+    tracemalloc.start()
+    try:
+        for _ in range(n_iterations):
+            writer.write(_recorded_request_stream(n_blocks, n_txs))
+            await writer.drain()
+            n_answered = 0
+            for i in range(n_requests):
+                envelope = await channel.get_message()
+                # the responses to some of the requests get lost
+                if i % 10 == 0:
+                    continue
+                reply = app.handle(cast(AbciMessage, envelope.message))
+                await channel.send(
+                    Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+                )
+                n_answered += 1
+            for _ in range(n_answered):
+                await message_reader.read_next_message()
+            assert channel.n_live_dialogues <= max_dialogues
+            gc.collect()
+            memory.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+        writer.close()
+        await channel.disconnect()
+
+    with caplog.at_level(logging.INFO):
+        logging.info(
+            f"{n_iterations * n_requests} requests, memory (KiB) after each "
+            f"{n_requests}: {[size // 2**10 for size in memory]}"
+        )
+    # once the live dialogues reach their bound, the memory does not grow anymore
+    warmed_up = memory[n_iterations // 2]
+    assert max(memory[n_iterations // 2 :]) - warmed_up < 2**17
+
+
+@pytest.mark.asyncio
+async def test_grpc_server_channel_concurrent_check_tx(
+    caplog: LogCaptureFixture,
+) -> None:
+    """Load test the gRPC channel with concurrent `CheckTx` calls, which the skill answers out of order."""
+    target_skill_id = "dummy_author/dummy:0.1.0"
+    port = get_unused_tcp_port()
+    channel = GrpcServerChannel(
+        PublicId.from_str(target_skill_id), LOCALHOST, port, logging.getLogger()
+    )
+    await channel.connect(asyncio.get_event_loop())
+    app = ABCIAppTest(target_skill_id)
+    n_calls = 500
+
+    async def handle_envelopes() -> None:
+        """Answer the pending requests in reverse order, with their transaction as the info of the response."""
+        while True:
+            envelopes = [await channel.get_message()]
+            queue = cast(asyncio.Queue, channel.queue)
+            while not queue.empty():
+                envelopes.append(queue.get_nowait())
+            for envelope in reversed(envelopes):
+                request = cast(AbciMessage, envelope.message)
+                reply = app._update_dialogues(request).reply(
+                    performative=AbciMessage.Performative.RESPONSE_CHECK_TX,
+                    code=0,
+                    data=b"",
+                    log="",
+                    info=request.tx.decode(),
+                    gas_wanted=0,
+                    gas_used=0,
+                    events=Events([Event(type_="", attributes=[])]),
+                    codespace="",
+                )
+                await channel.send(
+                    Envelope(to=envelope.sender, sender=envelope.to, message=reply)
+                )
+
+    skill_task = asyncio.ensure_future(handle_envelopes())
+    try:
+        async with grpc.aio.insecure_channel(f"{LOCALHOST}:{port}") as grpc_channel:
+            await asyncio.wait_for(grpc_channel.channel_ready(), timeout=10)
+            stub = ABCIApplicationStub(grpc_channel)
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(
+                    stub.CheckTx(RequestCheckTx(tx=str(i).encode()))
+                    for i in range(n_calls)
+                )
+            )
+            seconds = time.perf_counter() - start
+
+        assert [response.info for response in responses] == [
+            str(i) for i in range(n_calls)
+        ]
+        assert not cast(ABCIApplicationServicer, channel._servicer)._pending_responses
+        with caplog.at_level(logging.INFO):
+            logging.info(
+                f"{n_calls} concurrent CheckTx calls: {n_calls / seconds:.0f} calls/s"
+            )
+    finally:
+        skill_task.cancel()
+        await channel.disconnect()
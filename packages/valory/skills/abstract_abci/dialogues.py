@@ -19,12 +19,13 @@
 
 """This module contains the classes required for dialogue management."""
 
-from typing import Any
+from typing import Any, cast
 
 from aea.protocols.base import Address, Message
 from aea.protocols.dialogue.base import Dialogue as BaseDialogue
 from aea.skills.base import Model
 
+from packages.valory.connections.abci.dialogues import BoundedDialoguesStorage
 from packages.valory.protocols.abci.dialogues import AbciDialogue as BaseAbciDialogue
 from packages.valory.protocols.abci.dialogues import AbciDialogues as BaseAbciDialogues
 
@@ -59,3 +60,10 @@ class AbciDialogues(Model, BaseAbciDialogues):
             self_address=str(self.skill_id),
             role_from_first_message=role_from_first_message,
         )
+        # the dialogues are discarded once answered, and the unanswered ones are evicted from the oldest
+        self._dialogues_storage = BoundedDialoguesStorage(self)
+
+    @property
+    def n_live_dialogues(self) -> int:
+        """Get the number of dialogues waiting for a response."""
+        return cast(BoundedDialoguesStorage, self._dialogues_storage).n_live
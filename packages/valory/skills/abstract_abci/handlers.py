@@ -77,7 +77,7 @@ class ABCIHandler(Handler):
 
         # handle message
         request_type = performative.replace("request_", "")
-        self.context.logger.debug(f"Received ABCI request of type {request_type}")
+        self.context.logger.debug("Received ABCI request of type %s", request_type)
         handler = getattr(self, request_type, None)
         if handler is None:  # pragma: nocover
             self.context.logger.warning(
@@ -86,7 +86,7 @@ class ABCIHandler(Handler):
             return
 
         self.context.logger.debug(
-            "ABCI Handler: message={}, sender={}".format(message, message.sender)
+            "ABCI Handler: message=%s, sender=%s", message, message.sender
         )
         response = handler(message, abci_dialogue)
         self.context.outbox.put_message(message=response)
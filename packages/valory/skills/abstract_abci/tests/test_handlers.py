@@ -19,10 +19,13 @@
 
 """Test the handlers.py module of the skill."""
 import logging
+import time
 from pathlib import Path
 from typing import Any, cast
 from unittest.mock import MagicMock, patch
 
+import pytest
+from _pytest.logging import LogCaptureFixture
 from aea.configurations.data_types import PublicId
 from aea.protocols.base import Address, Message
 from aea.protocols.dialogue.base import Dialogue as BaseDialogue
@@ -161,6 +164,63 @@ class TestABCIHandler:
         )
         self.handler.handle(cast(AbciMessage, message))
 
+    @pytest.mark.parametrize(
+        "level, formatted", ((logging.INFO, False), (logging.DEBUG, True))
+    )
+    def test_handle_lazy_logging(
+        self, level: int, formatted: bool, caplog: LogCaptureFixture
+    ) -> None:
+        """Test that the received messages are only formatted if they are going to be logged."""
+        self.context.logger = logging.getLogger("aea.test_handle_lazy_logging")
+        message, _ = self.dialogues.create(
+            counterparty=str(self.skill_id),
+            performative=AbciMessage.Performative.REQUEST_DELIVER_TX,
+            tx=b"",
+        )
+        with caplog.at_level(level, logger=self.context.logger.name), patch.object(
+            self.context.abci_dialogues, "update"
+        ), patch.object(AbciMessage, "__str__", return_value="message") as mock_str:
+            self.handler.handle(cast(AbciMessage, message))
+        assert mock_str.called is formatted
+        assert ("Received ABCI request of type deliver_tx" in caplog.text) is formatted
+
+    @pytest.mark.benchmark
+    def test_benchmark_info_logging(self, caplog: LogCaptureFixture) -> None:
+        """Benchmark the handling of the requests of a block, logging at INFO against DEBUG level."""
+        self.context.logger = logging.getLogger("aea.test_benchmark_info_logging")
+        n_txs, n_blocks = 200, 5
+
+        def handle_blocks(level: int) -> float:
+            """Handle the transactions of a few blocks at the given level, and get the seconds per block."""
+            seconds = 0.0
+            with caplog.at_level(level, logger=self.context.logger.name):
+                for _ in range(n_blocks):
+                    messages = [
+                        self.dialogues.create(
+                            counterparty=str(self.skill_id),
+                            performative=AbciMessage.Performative.REQUEST_DELIVER_TX,
+                            tx=bytes(1024),
+                        )[0]
+                        for _ in range(n_txs)
+                    ]
+                    start = time.perf_counter()
+                    for message in messages:
+                        self.handler.handle(cast(AbciMessage, message))
+                    seconds += time.perf_counter() - start
+                caplog.clear()
+            return seconds / n_blocks
+
+        with caplog.at_level(logging.INFO):
+            timings = {
+                logging.getLevelName(level): handle_blocks(level)
+                for level in (logging.DEBUG, logging.INFO)
+            }
+            for name, seconds in timings.items():
+                logging.info(
+                    f"{n_txs} txs per block, {name}: {seconds * 1e3:.2f} ms per block"
+                )
+        assert timings["INFO"] < timings["DEBUG"]
+
     def test_handle_log_exception(self) -> None:
         """Test the message gets handled."""
         message = AbciMessage(
@@ -26,14 +26,18 @@ import itertools
 import json
 import logging
 import re
+import struct
 import sys
 import textwrap
 import uuid
 from abc import ABC, ABCMeta, abstractmethod
-from collections import Counter, deque
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Executor
+from contextlib import suppress
 from copy import copy, deepcopy
-from dataclasses import asdict, astuple, dataclass, field, is_dataclass
+from dataclasses import asdict, astuple, dataclass, field, fields, is_dataclass
 from enum import Enum
+from functools import wraps
 from inspect import isclass
 from math import ceil
 from typing import (
@@ -43,6 +47,8 @@ from typing import (
     Dict,
     FrozenSet,
     Generic,
+    Hashable,
+    Iterable,
     Iterator,
     List,
     Mapping,
@@ -71,9 +77,17 @@ from packages.valory.protocols.abci.custom_types import (
     LastCommitInfo,
     Validator,
 )
+from packages.valory.skills.abstract_round_abci.persistence import (
+    AppSnapshot,
+    SnapshotError,
+    SnapshotStore,
+)
 from packages.valory.skills.abstract_round_abci.utils import (
+    MerkleTree,
     consensus_threshold,
+    freeze,
     is_json_serializable,
+    merkle_leaf_hash,
 )
 
 
@@ -93,8 +107,12 @@ BLOCKS_STALL_TOLERANCE = 60
 SERIOUS_OFFENCE_ENUM_MIN = 1000
 NUMBER_OF_BLOCKS_TRACKED = 10_000
 NUMBER_OF_ROUNDS_TRACKED = 50
+DEFAULT_VERIFIED_TX_CACHE_SIZE = 1024
+# the number of signatures recovered by a worker of a batch verification at a time, to amortise the communication with it
+VERIFY_BATCH_CHUNK_SIZE = 16
 
 EventType = TypeVar("EventType")
+DerivedValue = TypeVar("DerivedValue")
 
 
 def get_name(prop: Any) -> str:
@@ -146,6 +164,16 @@ class AbstractRoundInternalError(ABCIAppException):
         super().__init__("internal error: " + message, *args)
 
 
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_CANONICAL_BYTES_ATTR = "_canonical_bytes"
+
+# the compact transactions start with a byte which cannot start a json document
+COMPACT_TX_MAGIC = 0
+COMPACT_TX_VERSION = 1
+# magic, version, payload type id, whether the signature is raw hex bytes, signature length
+_COMPACT_TX_HEADER = struct.Struct(">BBIBH")
+
+
 class _MetaPayload(ABCMeta):
     """
     Payload metaclass.
@@ -157,6 +185,8 @@ class _MetaPayload(ABCMeta):
     """
 
     registry: Dict[str, Type["BaseTxPayload"]] = {}
+    type_id_registry: Dict[int, str] = {}
+    _FIELD_NAMES_ATTR = "_payload_field_names"
 
     def __new__(mcs, name: str, bases: Tuple, namespace: Dict, **kwargs: Any) -> Type:  # type: ignore
         """Create a new class object."""
@@ -172,9 +202,47 @@ class _MetaPayload(ABCMeta):
         # remember association from transaction type to payload class
         _metaclass_registry_key = f"{new_cls.__module__}.{new_cls.__name__}"  # type: ignore
         mcs.registry[_metaclass_registry_key] = new_cls
+        # remember association from the compact type id to the transaction type
+        type_id = mcs.get_type_id(_metaclass_registry_key)
+        registered_key = mcs.type_id_registry.setdefault(
+            type_id, _metaclass_registry_key
+        )
+        if registered_key != _metaclass_registry_key:
+            raise ValueError(  # pragma: no cover
+                f"class {name} has the same type id {type_id} as {registered_key}"
+            )
 
         return new_cls
 
+    @staticmethod
+    def get_type_id(registry_key: str) -> int:
+        """
+        Get the type id of a payload class, for the compact encoding of the transactions.
+
+        The id is derived from the registry key, so that it is the same for all the agents,
+        regardless of the order in which they have imported the payload classes.
+
+        :param registry_key: the registry key of the payload class.
+        :return: the type id.
+        """
+        return int.from_bytes(hashlib.sha256(registry_key.encode()).digest()[:4], "big")
+
+    @property
+    def field_names(cls) -> Tuple[str, ...]:
+        """
+        Get the names of the payload's fields, in their definition order.
+
+        The layout is computed once per payload class, on first use,
+        because the dataclass fields are only available after the class has been decorated.
+
+        :return: the field names.
+        """
+        field_names = cls.__dict__.get(_MetaPayload._FIELD_NAMES_ATTR)
+        if field_names is None:
+            field_names = tuple(field_.name for field_ in fields(cls))
+            setattr(cls, _MetaPayload._FIELD_NAMES_ATTR, field_names)
+        return field_names
+
 
 @dataclass(frozen=True)
 class BaseTxPayload(metaclass=_MetaPayload):
@@ -184,25 +252,64 @@ class BaseTxPayload(metaclass=_MetaPayload):
     round_count: int = field(default=ROUND_COUNT_DEFAULT, init=False)
     id_: str = field(default_factory=lambda: uuid.uuid4().hex, init=False)
 
+    def _flat_items(self) -> Optional[List[Tuple[str, Any]]]:
+        """
+        Get the payload's fields and their values, if all of them are immutable scalars.
+
+        Such values are exactly what `asdict` and `astuple` would copy them into,
+        so they can be used as they are, without the recursive copying.
+
+        :return: the fields and their values, or `None` if any of the values needs to be copied.
+        """
+        items = [(name, getattr(self, name)) for name in type(self).field_names]  # type: ignore
+        if all(isinstance(value, _SCALAR_TYPES) for _, value in items):
+            return items
+        return None
+
     @property
     def data(self) -> Dict[str, Any]:
         """Data"""
         excluded = ["sender", "round_count", "id_"]
-        return {k: v for k, v in asdict(self).items() if k not in excluded}
+        items = self._flat_items()
+        data = asdict(self) if items is None else dict(items)
+        return {k: v for k, v in data.items() if k not in excluded}
 
     @property
     def values(self) -> Tuple[Any, ...]:
         """Data"""
         excluded = 3  # refers to ["sender", "round_count", "id_"]
-        return astuple(self)[excluded:]
+        items = self._flat_items()
+        if items is None:
+            return astuple(self)[excluded:]
+        return tuple(value for _, value in items[excluded:])
 
     @property
     def json(self) -> Dict[str, Any]:
         """Json"""
-        data, cls = asdict(self), self.__class__
+        items = self._flat_items()
+        data = asdict(self) if items is None else dict(items)
+        cls = self.__class__
         data["_metaclass_registry_key"] = f"{cls.__module__}.{cls.__name__}"
         return data
 
+    @property
+    def canonical_bytes(self) -> bytes:
+        """
+        Get the canonical encoding of the payload, i.e., its sorted json, without checking its size.
+
+        The encoding is memoised on the instance, keyed on the fields
+        which may be set after the payload's initialization.
+
+        :return: the canonical bytes.
+        """
+        key = (self.round_count, self.id_)
+        memo = self.__dict__.get(_CANONICAL_BYTES_ATTR)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        encoded_data = json.dumps(self.json, sort_keys=True).encode()
+        object.__setattr__(self, _CANONICAL_BYTES_ATTR, (key, encoded_data))
+        return encoded_data
+
     @classmethod
     def from_json(cls, obj: Dict) -> "BaseTxPayload":
         """Decode the payload."""
@@ -222,7 +329,7 @@ class BaseTxPayload(metaclass=_MetaPayload):
 
     def encode(self) -> bytes:
         """Encode"""
-        encoded_data = json.dumps(self.json, sort_keys=True).encode()
+        encoded_data = self.canonical_bytes
         if sys.getsizeof(encoded_data) > MAX_READ_IN_BYTES:
             msg = f"{type(self)} must be smaller than {MAX_READ_IN_BYTES} bytes"
             raise ValueError(msg)
@@ -241,21 +348,142 @@ class Transaction(ABC):
     payload: BaseTxPayload
     signature: str
 
-    def encode(self) -> bytes:
-        """Encode the transaction."""
+    def encode(self, compact: bool = False) -> bytes:
+        """
+        Encode the transaction.
 
-        data = dict(payload=self.payload.json, signature=self.signature)
-        encoded_data = json.dumps(data, sort_keys=True).encode()
+        :param compact: whether to use the compact binary encoding instead of the json one.
+        :return: the encoded transaction.
+        """
+        if compact:
+            encoded_data = self._encode_compact()
+        else:
+            # equivalent to `json.dumps(dict(payload=..., signature=...), sort_keys=True)`,
+            # without re-serializing the payload
+            encoded_data = b"".join(
+                (
+                    b'{"payload": ',
+                    self.payload.canonical_bytes,
+                    b', "signature": ',
+                    json.dumps(self.signature).encode(),
+                    b"}",
+                )
+            )
         if sys.getsizeof(encoded_data) > MAX_READ_IN_BYTES:
             raise ValueError(
                 f"Transaction must be smaller than {MAX_READ_IN_BYTES} bytes"
             )
         return encoded_data
 
+    def _encode_compact(self) -> bytes:
+        """
+        Encode the transaction in the compact binary format.
+
+        The header is followed by the signature and by the payload's values,
+        as a json array in the order of the payload's fields, without their names.
+        Hex signatures are stored as raw bytes.
+
+        :return: the encoded transaction.
+        """
+        signature = self.signature
+        signature_bytes, is_hex = signature.encode(), False
+        if signature.startswith("0x"):
+            with suppress(ValueError):
+                raw_signature = bytes.fromhex(signature[2:])
+                # only the signatures which are restored exactly can be stored as raw bytes
+                if "0x" + raw_signature.hex() == signature:
+                    signature_bytes, is_hex = raw_signature, True
+
+        payload_cls = type(self.payload)
+        registry_key = f"{payload_cls.__module__}.{payload_cls.__name__}"
+        payload_json = self.payload.json
+        values = [payload_json[name] for name in payload_cls.field_names]  # type: ignore
+        header = _COMPACT_TX_HEADER.pack(
+            COMPACT_TX_MAGIC,
+            COMPACT_TX_VERSION,
+            _MetaPayload.get_type_id(registry_key),
+            is_hex,
+            len(signature_bytes),
+        )
+        return b"".join(
+            (
+                header,
+                signature_bytes,
+                json.dumps(values, separators=(",", ":")).encode(),
+            )
+        )
+
+    @classmethod
+    def _decode_compact(cls, obj: bytes) -> "Transaction":
+        """
+        Decode a transaction which is encoded in the compact binary format.
+
+        :param obj: the encoded transaction.
+        :return: the decoded transaction.
+        """
+        try:
+            (
+                _,
+                version,
+                type_id,
+                is_hex,
+                signature_length,
+            ) = _COMPACT_TX_HEADER.unpack_from(obj)
+        except struct.error as e:
+            raise TransactionNotValidError(
+                f"Compact transaction is truncated: {e}"
+            ) from e
+        if version != COMPACT_TX_VERSION:
+            raise TransactionNotValidError(
+                f"Compact transaction version {version} is not supported."
+            )
+        registry_key = _MetaPayload.type_id_registry.get(type_id)
+        if registry_key is None:
+            raise TransactionTypeNotRecognizedError(
+                f"Payload type id {type_id} is not recognized."
+            )
+
+        offset = _COMPACT_TX_HEADER.size
+        signature_bytes = obj[offset : offset + signature_length]
+        if len(signature_bytes) != signature_length:
+            raise TransactionNotValidError(
+                "Compact transaction is truncated: "
+                f"expected a signature of {signature_length} bytes, got {len(signature_bytes)}."
+            )
+        try:
+            signature = (
+                "0x" + signature_bytes.hex() if is_hex else signature_bytes.decode()
+            )
+            values = json.loads(obj[offset + signature_length :])
+        except ValueError as e:
+            # `JSONDecodeError` and `UnicodeDecodeError` are subclasses of `ValueError`
+            raise TransactionNotValidError(
+                f"Compact transaction could not be decoded: {e}"
+            ) from e
+
+        payload_cls = _MetaPayload.registry[registry_key]
+        field_names = payload_cls.field_names  # type: ignore
+        if not isinstance(values, list) or len(values) != len(field_names):
+            raise TransactionNotValidError(
+                f"Compact transaction of type {registry_key} "
+                f"expects the values of the fields {field_names}, got {values!r}."
+            )
+        data = dict(zip(field_names, values))
+        data["_metaclass_registry_key"] = registry_key
+        try:
+            payload = BaseTxPayload.from_json(data)
+        except TypeError as e:
+            raise TransactionNotValidError(
+                f"Compact transaction has an invalid payload: {e}"
+            ) from e
+        return Transaction(payload, signature)
+
     @classmethod
     def decode(cls, obj: bytes) -> "Transaction":
-        """Decode the transaction."""
+        """Decode the transaction, detecting whether it is encoded in the json or in the compact format."""
 
+        if obj[:1] == bytes((COMPACT_TX_MAGIC,)):
+            return cls._decode_compact(obj)
         data = json.loads(obj.decode())
         signature = data["signature"]
         payload = BaseTxPayload.from_json(data["payload"])
@@ -275,6 +503,162 @@ class Transaction(ABC):
         if self.payload.sender not in addresses:
             raise SignatureNotValidError(f"Signature not valid on transaction: {self}")
 
+    @staticmethod
+    def verify_batch(
+        transactions: Sequence["Transaction"],
+        ledger_id: str,
+        executor: Optional[Executor] = None,
+    ) -> List[bool]:
+        """
+        Verify the signatures of a batch of transactions.
+
+        The outcome is the same as verifying the transactions one by one, in the given order.
+        If an executor is given, the signature recoveries are distributed to its workers.
+        As the recoveries mostly run Python code, which holds the GIL, only a process pool speeds them up.
+        Therefore, the workers are only sent the encoded payloads and the signatures,
+        so that they do not need to import the payload classes, which are not importable outside the agent.
+
+        :param transactions: the transactions to verify.
+        :param ledger_id: the ledger id of the addresses.
+        :param executor: the executor to run the verifications in, or `None` to run them sequentially.
+        :return: whether the signature of each transaction is valid, in the order of the given transactions.
+        """
+        messages = [transaction.payload.encode() for transaction in transactions]
+        signatures = [transaction.signature for transaction in transactions]
+        ledger_ids = [ledger_id] * len(transactions)
+        recovered: List[Tuple[str, ...]] = []
+        if executor is not None:
+            try:
+                recovered = list(
+                    executor.map(
+                        LedgerApis.recover_message,
+                        ledger_ids,
+                        messages,
+                        signatures,
+                        chunksize=VERIFY_BATCH_CHUNK_SIZE,
+                    )
+                )
+            except Exception:  # pylint: disable=broad-except
+                # a malformed signature fails its whole chunk, so the batch is verified sequentially instead
+                recovered = []
+        if not recovered:
+            recovered = list(map(_recover_addresses, ledger_ids, messages, signatures))
+        return [
+            transaction.payload.sender in addresses
+            for transaction, addresses in zip(transactions, recovered)
+        ]
+
+
+def _recover_addresses(
+    ledger_id: str, message: bytes, signature: str
+) -> Tuple[str, ...]:
+    """Recover the addresses which may have signed a message, or none if the signature is malformed."""
+    try:
+        return LedgerApis.recover_message(
+            identifier=ledger_id, message=message, signature=signature
+        )
+    except Exception:  # pylint: disable=broad-except
+        return ()
+
+
+class VerifiedTransactionCache:
+    """
+    A bounded LRU cache of the transactions which have been decoded and verified.
+
+    The transactions are keyed by the hash of their raw bytes,
+    so that a transaction which has already been checked when it entered the mempool
+    does not need to be decoded and have its signature recovered again when it is delivered.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_VERIFIED_TX_CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        enforce(max_size > 0, f"The cache size must be positive, got {max_size}.")
+        self._max_size = max_size
+        self._transactions: "OrderedDict[bytes, Transaction]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Get the number of cached transactions."""
+        return len(self._transactions)
+
+    @staticmethod
+    def _key(transaction_bytes: bytes) -> bytes:
+        """Get the cache key of the given transaction bytes."""
+        return hashlib.sha256(transaction_bytes).digest()
+
+    def get(self, transaction_bytes: bytes) -> Optional[Transaction]:
+        """
+        Get a verified transaction.
+
+        :param transaction_bytes: the raw bytes of the transaction.
+        :return: the decoded transaction, if it has been verified before, otherwise `None`.
+        """
+        key = self._key(transaction_bytes)
+        transaction = self._transactions.get(key)
+        if transaction is None:
+            self.misses += 1
+            return None
+        self._transactions.move_to_end(key)
+        self.hits += 1
+        return transaction
+
+    def add(self, transaction_bytes: bytes, transaction: Transaction) -> None:
+        """
+        Add a verified transaction, evicting the least recently used one if the cache is full.
+
+        :param transaction_bytes: the raw bytes of the transaction.
+        :param transaction: the decoded transaction, which has been verified.
+        """
+        key = self._key(transaction_bytes)
+        self._transactions[key] = transaction
+        self._transactions.move_to_end(key)
+        if len(self._transactions) > self._max_size:
+            self._transactions.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all the cached transactions."""
+        self._transactions.clear()
+
+    def verify_batch(
+        self,
+        transactions_bytes: Sequence[bytes],
+        ledger_id: str,
+        executor: Optional[Executor] = None,
+    ) -> List[Optional[Transaction]]:
+        """
+        Decode and verify a batch of transactions ahead of their delivery, and cache the valid ones.
+
+        The transactions which cannot be decoded or have an invalid signature are not cached,
+        so that they are rejected as usual when they are delivered.
+
+        :param transactions_bytes: the raw bytes of the transactions.
+        :param ledger_id: the ledger id of the addresses.
+        :param executor: the executor to run the verifications in, or `None` to run them sequentially.
+        :return: the verified transactions, or `None` for the invalid ones, in the order of the given bytes.
+        """
+        verified: List[Optional[Transaction]] = []
+        unverified: Dict[int, Transaction] = {}
+        for i, transaction_bytes in enumerate(transactions_bytes):
+            transaction = self._transactions.get(self._key(transaction_bytes))
+            verified.append(transaction)
+            if transaction is not None:
+                continue
+            try:
+                unverified[i] = Transaction.decode(transaction_bytes)
+            except Exception:  # pylint: disable=broad-except
+                # the malformed transactions are rejected when they are delivered
+                continue
+
+        results = Transaction.verify_batch(
+            tuple(unverified.values()), ledger_id, executor
+        )
+        for (i, transaction), is_valid in zip(unverified.items(), results):
+            if is_valid:
+                self.add(transactions_bytes[i], transaction)
+                verified[i] = transaction
+        return verified
+
 
 class Block:  # pylint: disable=too-few-public-methods
     """Class to represent (a subset of) data of a Tendermint block."""
@@ -304,11 +688,28 @@ class Blockchain:
     Class to represent a (naive) Tendermint blockchain.
 
     The consistency of the data in the blocks is guaranteed by Tendermint.
+
+    # Block retention
+
+    By default, all the blocks are kept in memory until the blockchain is reset.
+    If `max_blocks` is specified, only the latest `max_blocks` blocks are retained
+    and the older ones are pruned as new blocks are added.
+    The `height` and the `length` of the blockchain still account for the pruned blocks.
     """
 
-    def __init__(self, height_offset: int = 0, is_init: bool = True) -> None:
+    def __init__(
+        self,
+        height_offset: int = 0,
+        is_init: bool = True,
+        max_blocks: Optional[int] = None,
+    ) -> None:
         """Initialize the blockchain."""
-        self._blocks: List[Block] = []
+        enforce(
+            max_blocks is None or max_blocks > 0,
+            f"The maximum number of retained blocks must be positive, got {max_blocks}.",
+        )
+        self._blocks: Deque[Block] = deque(maxlen=max_blocks)
+        self._n_pruned = 0
         self._height_offset = height_offset
         self._is_init = is_init
 
@@ -317,6 +718,11 @@ class Blockchain:
         """Returns true if the blockchain is initialized."""
         return self._is_init
 
+    @property
+    def max_blocks(self) -> Optional[int]:
+        """Get the maximum number of retained blocks, `None` means that all the blocks are retained."""
+        return self._blocks.maxlen
+
     def add_block(self, block: Block) -> None:
         """Add a block to the list."""
         expected_height = self.height + 1
@@ -330,6 +736,9 @@ class Blockchain:
             raise AddBlockError(
                 f"expected height {expected_height}, got {actual_height}"
             )
+        if len(self._blocks) == self._blocks.maxlen:
+            # the deque drops the oldest block when it has reached its maximum length
+            self._n_pruned += 1
         self._blocks.append(block)
 
     @property
@@ -346,12 +755,28 @@ class Blockchain:
 
     @property
     def length(self) -> int:
-        """Get the blockchain length."""
+        """Get the blockchain length, including the pruned blocks."""
+        return self._n_pruned + len(self._blocks)
+
+    @property
+    def retained_length(self) -> int:
+        """Get the number of retained blocks."""
         return len(self._blocks)
 
+    @property
+    def retain_height(self) -> int:
+        """
+        Get the height of the oldest retained block.
+
+        :return: the height of the oldest retained block, or 0 if no block has been pruned.
+        """
+        if self._n_pruned == 0:
+            return 0
+        return self._height_offset + self._n_pruned + 1
+
     @property
     def blocks(self) -> Tuple[Block, ...]:
-        """Get the blocks."""
+        """Get the retained blocks."""
         return tuple(self._blocks)
 
     @property
@@ -412,6 +837,20 @@ class BlockBuilder:
         )
 
 
+class AppHashMode(Enum):
+    """
+    The way the application hash is computed from the `AbciAppDB`.
+
+    LEGACY: the sha256 hash of the whole serialized database, recomputed on every call.
+    MERKLE: the root of a Merkle tree over the database entries, which is updated incrementally.
+
+    The two modes produce different hashes, therefore all the agents of a service must use the same one.
+    """
+
+    LEGACY = "legacy"
+    MERKLE = "merkle"
+
+
 class AbciAppDB:
     """Class to represent all data replicated across agents.
 
@@ -487,6 +926,25 @@ class AbciAppDB:
     * the in-built `copy` module is used, which automatically detects if an item is immutable and skips copying it.
     For more information take a look at the `_deepcopy_atomic` method and its usage:
     https://github.com/python/cpython/blob/3.10/Lib/copy.py#L182-L183
+
+    # Frozen values
+    -----------------------------------
+    If the database is created with `freeze_values=True`, the values are instead converted once, when they are inserted,
+    to immutable equivalents (see `utils.freeze`), i.e., lists to `FrozenList`s, dicts to `FrozenDict`s,
+    and the items of tuples recursively. The frozen values compare equal to, and serialize exactly like, the original ones,
+    but any attempt to modify them raises a `TypeError`. Therefore, they are returned without being copied,
+    which makes the reads zero-copy while keeping the safety guarantee.
+    Behaviours which need to modify a value retrieved from such a database should explicitly copy it to a mutable type,
+    e.g., using `list(value)`.
+
+    # Application hash
+    -----------------------------------
+    By default, the hash of the database is computed by serializing and hashing all of its contents (`AppHashMode.LEGACY`).
+    If the database is created using `AppHashMode.MERKLE`, then every (period, key, history index) entry is hashed once,
+    when it is added to the database, as a leaf of a Merkle tree. Each key's history forms a tree,
+    the roots of which are the leaves of the period's tree, while the roots of the periods and the slashing configuration
+    are the leaves of the top level tree. Only the trees affected by a change are recomputed when the hash is requested.
+    The `legacy_hash` method can be used to compare against the legacy hash while migrating.
     """
 
     DB_DATA_KEY = "db_data"
@@ -506,6 +964,8 @@ class AbciAppDB:
         self,
         setup_data: Dict[str, List[Any]],
         cross_period_persisted_keys: Optional[FrozenSet[str]] = None,
+        hash_mode: AppHashMode = AppHashMode.LEGACY,
+        freeze_values: bool = False,
     ) -> None:
         """Initialize the AbciApp database.
 
@@ -515,13 +975,18 @@ class AbciAppDB:
 
         :param setup_data: the setup data
         :param cross_period_persisted_keys: data keys that will be kept after a new period starts
+        :param hash_mode: the way to compute the hash of the database.
+        :param freeze_values: whether to store immutable values, which are returned without being copied.
         """
         AbciAppDB._check_data(setup_data)
-        self._setup_data = deepcopy(setup_data)
+        self._freeze_values = freeze_values
+        self._setup_data = self._copy_histories(setup_data)
         self._data: Dict[int, Dict[str, List[Any]]] = {
             RESET_COUNT_START: self.setup_data  # the key represents the reset index
         }
         self._round_count = ROUND_COUNT_DEFAULT  # ensures first round is indexed at 0!
+        # the number of the stored values, kept up to date on every change of the data
+        self._size = self._count_values(self._data)
 
         self._cross_period_persisted_keys = self.default_cross_period_keys.union(
             cross_period_persisted_keys or frozenset()
@@ -529,6 +994,20 @@ class AbciAppDB:
         self._cross_period_check()
         self.slashing_config: str = ""
 
+        self._hash_mode = hash_mode
+        # a Merkle tree over the history of each key, for each period
+        self._history_trees: Dict[int, Dict[str, MerkleTree]] = {}
+        # a Merkle tree over the (sorted) keys of each period, with the keys in the order of its leaves
+        self._period_trees: Dict[int, Tuple[List[str], MerkleTree]] = {}
+        # the keys of each period which have been updated since the last time the hash was computed
+        self._dirty_keys: Dict[int, Set[str]] = {}
+        if self.is_merkle_hashed:
+            self._index_period(RESET_COUNT_START)
+
+        # incremented on every change of the data, to invalidate the values derived from them
+        self._version = 0
+        self._derived: Dict[Hashable, Any] = {}
+
     def _cross_period_check(self) -> None:
         """Check the cross period keys against the setup data."""
         not_in_cross_period = set(self._setup_data).difference(
@@ -548,7 +1027,28 @@ class AbciAppDB:
         :return: the setup_data
         """
         # do not return data if no value has been set
-        return {k: v for k, v in deepcopy(self._setup_data).items() if len(v)}
+        return {
+            k: v for k, v in self._copy_histories(self._setup_data).items() if len(v)
+        }
+
+    @property
+    def freeze_values(self) -> bool:
+        """Whether the values of the database are stored frozen and returned without being copied."""
+        return self._freeze_values
+
+    def _copy_value(self, value: Any) -> Any:
+        """Get a copy of a value which is safe to be shared with the database."""
+        return freeze(value) if self._freeze_values else deepcopy(value)
+
+    def _copy_histories(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Get a copy of a mapping of keys to value histories which is safe to be shared with the database."""
+        if self._freeze_values:
+            # only the lists of the histories need to be copied, as the frozen values can be shared
+            return {
+                key: [freeze(value) for value in history]
+                for key, history in data.items()
+            }
+        return deepcopy(data)
 
     @staticmethod
     def _check_data(data: Any) -> None:
@@ -580,15 +1080,62 @@ class AbciAppDB:
         """Set the round count."""
         self._round_count = round_count
 
+    @property
+    def size(self) -> int:
+        """Get the number of the values stored in the database, across all the periods."""
+        return self._size
+
+    @staticmethod
+    def _count_values(data: Dict[int, Dict[str, List[Any]]]) -> int:
+        """Count the values of the given periods' data."""
+        return sum(
+            len(values)
+            for period_data in data.values()
+            for values in period_data.values()
+        )
+
     @property
     def cross_period_persisted_keys(self) -> FrozenSet[str]:
         """Keys in the database which are persistent across periods."""
         return self._cross_period_persisted_keys
 
+    @property
+    def hash_mode(self) -> AppHashMode:
+        """Get the way that the hash of the database is computed."""
+        return self._hash_mode
+
+    @property
+    def is_merkle_hashed(self) -> bool:
+        """Whether the hash of the database is a Merkle root which is updated incrementally."""
+        return self._hash_mode == AppHashMode.MERKLE
+
+    @property
+    def version(self) -> int:
+        """Get the version of the data, which changes every time that the data are modified."""
+        return self._version
+
+    def _bump_version(self) -> None:
+        """Mark the data as modified, dropping the values which have been derived from them."""
+        self._version += 1
+        self._derived.clear()
+
+    def get_derived(self, key: Hashable, derive: Callable[[], Any]) -> Any:
+        """Get a value derived from the data, computing it at most once per version of the data.
+
+        :param key: the key under which the derived value is cached.
+        :param derive: a callable computing the value from the current data.
+        :return: the derived value, shared between the callers until the data change.
+        """
+        if key in self._derived:
+            return self._derived[key]
+        value = derive()
+        self._derived[key] = value
+        return value
+
     def get(self, key: str, default: Any = VALUE_NOT_PROVIDED) -> Optional[Any]:
         """Given a key, get its last for the current reset index."""
         if key in self._data[self.reset_index]:
-            return deepcopy(self._data[self.reset_index][key][-1])
+            return self._copy_value(self._data[self.reset_index][key][-1])
         if default != VALUE_NOT_PROVIDED:
             return default
         raise ValueError(
@@ -617,9 +1164,15 @@ class AbciAppDB:
         self.validate(kwargs)
 
         # Append new data to the key history
-        data = self._data[self.reset_index]
-        for key, value in deepcopy(kwargs).items():
+        self._bump_version()
+        reset_index = self.reset_index
+        data = self._data[reset_index]
+        for key, value in kwargs.items():
+            value = self._copy_value(value)
             data.setdefault(key, []).append(value)
+            if self.is_merkle_hashed:
+                self._index_entry(reset_index, key, value)
+        self._size += len(kwargs)
 
     def create(self, **kwargs: Any) -> None:
         """Add a new entry to the data.
@@ -646,13 +1199,18 @@ class AbciAppDB:
     def _create_from_keys(self, **kwargs: Any) -> None:
         """Add a new entry to the data using the provided key-value pairs."""
         AbciAppDB._check_data(kwargs)
-        self._data[self.reset_index + 1] = deepcopy(kwargs)
+        self._bump_version()
+        reset_index = self.reset_index + 1
+        self._data[reset_index] = self._copy_histories(kwargs)
+        self._size += self._count_values({reset_index: kwargs})
+        if self.is_merkle_hashed:
+            self._index_period(reset_index)
 
     def get_latest_from_reset_index(self, reset_index: int) -> Dict[str, Any]:
         """Get the latest key-value pairs from the data dictionary for the specified period."""
         return {
-            key: values[-1]
-            for key, values in deepcopy(self._data.get(reset_index, {})).items()
+            key: self._copy_value(values[-1])
+            for key, values in self._data.get(reset_index, {}).items()
         }
 
     def get_latest(self) -> Dict[str, Any]:
@@ -680,10 +1238,15 @@ class AbciAppDB:
         :param cleanup_history_depth_current: whether or not to clean up current entry too.
         """
         cleanup_history_depth = max(cleanup_history_depth, MIN_HISTORY_DEPTH)
+        self._bump_version()
         self._data = {
             key: self._data[key]
             for key in sorted(self._data.keys())[-cleanup_history_depth:]
         }
+        self._size = self._count_values(self._data)
+        if self.is_merkle_hashed:
+            for index in set(self._history_trees).difference(self._data):
+                self._drop_period_index(index)
         if cleanup_history_depth_current:
             self.cleanup_current_histories(cleanup_history_depth_current)
 
@@ -692,10 +1255,25 @@ class AbciAppDB:
         cleanup_history_depth_current = max(
             cleanup_history_depth_current, MIN_HISTORY_DEPTH
         )
-        self._data[self.reset_index] = {
+        self._bump_version()
+        reset_index = self.reset_index
+        current = {reset_index: self._data[reset_index]}
+        self._size -= self._count_values(current)
+        self._data[reset_index] = {
             key: history[-cleanup_history_depth_current:]
-            for key, history in self._data[self.reset_index].items()
+            for key, history in self._data[reset_index].items()
         }
+        current = {reset_index: self._data[reset_index]}
+        self._size += self._count_values(current)
+        if not self.is_merkle_hashed:
+            return
+        # the values have already been hashed, so we only need to rebuild the trees from the remaining leaves
+        trees = self._history_trees[reset_index]
+        for key, tree in trees.items():
+            if len(tree) > cleanup_history_depth_current:
+                remaining = list(tree.leaves[-cleanup_history_depth_current:])
+                trees[key] = MerkleTree(remaining)
+                self._dirty_keys.setdefault(reset_index, set()).add(key)
 
     def serialize(self) -> str:
         """Serialize the data of the database to a string."""
@@ -745,19 +1323,113 @@ class AbciAppDB:
             ) from exc
 
         self._check_data(dict(tuple(db_data.values())[0]))
+        if self._freeze_values:
+            db_data = {
+                index: self._copy_histories(period_data)
+                for index, period_data in db_data.items()
+            }
+        self._bump_version()
         self._data = db_data
+        self._size = self._count_values(db_data)
         self.slashing_config = slashing_config
+        if self.is_merkle_hashed:
+            self._reindex()
 
-    def hash(self) -> bytes:
-        """Create a hash of the data."""
+    @staticmethod
+    def _hash_value(value: Any) -> bytes:
+        """Hash a value of the database as a Merkle leaf."""
+        return merkle_leaf_hash(json.dumps(value, sort_keys=True).encode("utf-8"))
+
+    def _index_entry(self, reset_index: int, key: str, value: Any) -> None:
+        """Hash a new entry of a key's history and add it to the key's tree."""
+        leaf = self._hash_value(value)
+        trees = self._history_trees.setdefault(reset_index, {})
+        if key in trees:
+            trees[key].append(leaf)
+        else:
+            trees[key] = MerkleTree([leaf])
+        self._dirty_keys.setdefault(reset_index, set()).add(key)
+
+    def _index_period(self, reset_index: int) -> None:
+        """Hash all the entries of a period and build its trees."""
+        self._history_trees[reset_index] = {
+            key: MerkleTree([self._hash_value(value) for value in history])
+            for key, history in self._data.get(reset_index, {}).items()
+        }
+        self._period_trees.pop(reset_index, None)
+        self._dirty_keys.pop(reset_index, None)
+
+    def _drop_period_index(self, reset_index: int) -> None:
+        """Remove the trees of a period."""
+        self._history_trees.pop(reset_index, None)
+        self._period_trees.pop(reset_index, None)
+        self._dirty_keys.pop(reset_index, None)
+
+    def _reindex(self) -> None:
+        """Rebuild the trees of all the periods from scratch."""
+        for reset_index in tuple(self._history_trees):
+            self._drop_period_index(reset_index)
+        for reset_index in self._data:
+            self._index_period(reset_index)
+
+    @staticmethod
+    def _key_leaf(key: str, history_tree: MerkleTree) -> bytes:
+        """Get the leaf of a period's tree which represents a key."""
+        return merkle_leaf_hash(json.dumps([key, history_tree.root.hex()]).encode())
+
+    def _period_root(self, reset_index: int) -> bytes:
+        """Get the root of a period's tree, recomputing only the parts affected by the updated keys."""
+        history_trees = self._history_trees[reset_index]
+        dirty_keys = self._dirty_keys.pop(reset_index, set())
+        period_tree = self._period_trees.get(reset_index, None)
+
+        if period_tree is not None and dirty_keys.issubset(period_tree[0]):
+            keys, tree = period_tree
+            for key in dirty_keys:
+                # the number of keys per period is small, so a linear search is preferred over keeping an index
+                tree.update(keys.index(key), self._key_leaf(key, history_trees[key]))
+            return tree.root
+
+        # the set of keys has changed, so we need to rebuild the period's tree from the roots of the keys' trees
+        keys = sorted(history_trees)
+        tree = MerkleTree([self._key_leaf(key, history_trees[key]) for key in keys])
+        self._period_trees[reset_index] = (keys, tree)
+        return tree.root
+
+    def merkle_root(self) -> bytes:
+        """Get the root of the Merkle tree over the database, updating only the parts affected by the latest changes."""
+        if not self.is_merkle_hashed:
+            raise ABCIAppInternalError(
+                f"Cannot compute the Merkle root of a database using {self._hash_mode} hash mode."
+            )
+        leaves = [
+            merkle_leaf_hash(
+                json.dumps([reset_index, self._period_root(reset_index).hex()]).encode()
+            )
+            for reset_index in sorted(self._data)
+        ]
+        slashing_config = [self.SLASHING_CONFIG_KEY, self.slashing_config]
+        leaves.append(merkle_leaf_hash(json.dumps(slashing_config).encode()))
+        return MerkleTree(leaves).root
+
+    def legacy_hash(self) -> bytes:
+        """Create a hash of the whole serialized data."""
         # Compute the sha256 hash of the serialized data
         sha256 = hashlib.sha256()
         data = self.serialize()
         sha256.update(data.encode("utf-8"))
         hash_ = sha256.digest()
-        _logger.debug(f"root hash: {hash_.hex()}; data: {data}")
+        _logger.debug("root hash: %s; data: %s", hash_.hex(), data)
         return hash_
 
+    def hash(self) -> bytes:
+        """Create a hash of the data, using the database's hash mode."""
+        if self.is_merkle_hashed:
+            hash_ = self.merkle_root()
+            _logger.debug("root hash: %s", hash_.hex())
+            return hash_
+        return self.legacy_hash()
+
     @staticmethod
     def data_to_lists(data: Dict[str, Any]) -> Dict[str, List[Any]]:
         """Convert Dict[str, Any] to Dict[str, List[Any]]."""
@@ -768,6 +1440,28 @@ SerializedCollection = Dict[str, Dict[str, Any]]
 DeserializedCollection = Mapping[str, BaseTxPayload]
 
 
+def db_cached(getter: Callable[[Any], DerivedValue]) -> Callable[[Any], DerivedValue]:
+    """Decorate the getter of a property of the synchronized data which is only derived from the data of its db.
+
+    The value is computed at most once per version of the database, and a shallow copy of it is returned,
+    so that the callers can modify the returned containers without affecting the cached value.
+    Properties reading the database through any other means than its `get` methods must not be cached.
+
+    :param getter: the getter of the property.
+    :return: the cached getter.
+    """
+
+    @wraps(getter)
+    def cached_getter(self: "BaseSynchronizedData") -> DerivedValue:
+        """Get the value of the property, from the cache of the database if possible."""
+        db = self.db
+        if not isinstance(db, AbciAppDB):
+            return getter(self)
+        return copy(db.get_derived(getter, lambda: getter(self)))
+
+    return cached_getter
+
+
 class BaseSynchronizedData:
     """
     Class to represent the synchronized data.
@@ -824,6 +1518,7 @@ class BaseSynchronizedData:
         return self.db.reset_index
 
     @property
+    @db_cached
     def participants(self) -> FrozenSet[str]:
         """Get the currently active participants."""
         participants = frozenset(self.db.get_strict("participants"))
@@ -832,6 +1527,7 @@ class BaseSynchronizedData:
         return cast(FrozenSet[str], participants)
 
     @property
+    @db_cached
     def all_participants(self) -> FrozenSet[str]:
         """Get all registered participants."""
         all_participants = frozenset(self.db.get_strict("all_participants"))
@@ -845,6 +1541,7 @@ class BaseSynchronizedData:
         return len(self.all_participants)
 
     @property
+    @db_cached
     def consensus_threshold(self) -> int:
         """Get the consensus threshold."""
         threshold = self.db.get_strict("consensus_threshold")
@@ -867,6 +1564,7 @@ class BaseSynchronizedData:
         raise ValueError(f"Consensus threshold {threshold} {expected_range}.")
 
     @property
+    @db_cached
     def sorted_participants(self) -> Sequence[str]:
         """
         Get the sorted participants' addresses.
@@ -953,6 +1651,7 @@ class BaseSynchronizedData:
         return set(textwrap.wrap(raw, ADDRESS_LENGTH))
 
     @property
+    @db_cached
     def participant_to_selection(self) -> DeserializedCollection:
         """Check whether keeper is set."""
         serialized = self.db.get_strict("participant_to_selection")
@@ -960,6 +1659,7 @@ class BaseSynchronizedData:
         return cast(DeserializedCollection, deserialized)
 
     @property
+    @db_cached
     def participant_to_randomness(self) -> DeserializedCollection:
         """Check whether keeper is set."""
         serialized = self.db.get_strict("participant_to_randomness")
@@ -967,6 +1667,7 @@ class BaseSynchronizedData:
         return cast(DeserializedCollection, deserialized)
 
     @property
+    @db_cached
     def participant_to_votes(self) -> DeserializedCollection:
         """Check whether keeper is set."""
         serialized = self.db.get_strict("participant_to_votes")
@@ -1224,8 +1925,11 @@ class AbstractRound(Generic[EventType], ABC, metaclass=_MetaAbstractRound):
         if len(votes_by_participant) == 0:
             return
 
-        votes = votes_by_participant.values()
-        vote_count = Counter(tuple(sorted(v.data.items())) for v in votes)
+        if isinstance(votes_by_participant, PayloadCollection):
+            vote_count = votes_by_participant.tally(_payload_data_items)
+        else:
+            votes = votes_by_participant.values()
+            vote_count = Counter(map(_payload_data_items, votes))
         largest_nb_votes = max(vote_count.values())
         nb_votes_received = sum(vote_count.values())
         nb_remaining_votes = nb_participants - nb_votes_received
@@ -1293,6 +1997,117 @@ class DegenerateRound(AbstractRound, ABC):
         )
 
 
+def _payload_values(payload: BaseTxPayload) -> Tuple[Any, ...]:
+    """Get the values of a payload, by which the collection rounds tally the payloads."""
+    return payload.values
+
+
+def _payload_data_items(payload: BaseTxPayload) -> Tuple[Tuple[str, Any], ...]:
+    """Get the sorted data items of a payload, by which the majority checks tally the votes."""
+    return tuple(sorted(payload.data.items()))
+
+
+def _payload_vote(payload: Any) -> Optional[bool]:
+    """Get the vote of a payload, by which the voting rounds tally the payloads."""
+    if not hasattr(payload, "vote"):
+        raise ValueError(f"payload {payload} has no attribute `vote`")
+    return payload.vote
+
+
+TallyKey = Callable[[BaseTxPayload], Hashable]
+
+
+class PayloadCollection(Dict[str, BaseTxPayload]):
+    """
+    A collection of payloads by sender, which keeps running tallies of its payloads.
+
+    A tally counts the payloads by a key. Once it has been requested,
+    it is updated on every change of the collection instead of being recounted on every access.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the collection."""
+        super().__init__(*args, **kwargs)
+        self._tallies: Dict[TallyKey, Counter] = {}
+
+    def __reduce__(self) -> Tuple[Type, Tuple[Dict[str, BaseTxPayload]]]:
+        """Reduce the collection to its payloads, as the tallies are recounted on request."""
+        return self.__class__, (dict(self),)
+
+    def tally(self, key: TallyKey) -> Counter:
+        """
+        Get the running tally of the payloads by the given key.
+
+        The returned counter must not be modified.
+
+        :param key: the function which gets the hashable key of a payload.
+        :return: the number of payloads by key.
+        """
+        counter = self._tallies.get(key)
+        if counter is None:
+            counter = Counter(map(key, self.values()))
+            self._tallies[key] = counter
+        return counter
+
+    def _count(self, payload: BaseTxPayload, increment: int) -> None:
+        """Add a payload to the running tallies, or remove it with a negative increment."""
+        for key, counter in tuple(self._tallies.items()):
+            try:
+                payload_key = key(payload)
+                counter[payload_key] += increment
+            except (TypeError, ValueError):
+                # the tally is dropped, so that the error is raised when it is requested again
+                del self._tallies[key]
+                continue
+            if counter[payload_key] == 0:
+                del counter[payload_key]
+
+    def __setitem__(self, sender: str, payload: BaseTxPayload) -> None:
+        """Set the payload of a sender."""
+        if sender in self:
+            self._count(self[sender], -1)
+        super().__setitem__(sender, payload)
+        self._count(payload, 1)
+
+    def __delitem__(self, sender: str) -> None:
+        """Remove the payload of a sender."""
+        self._count(self[sender], -1)
+        super().__delitem__(sender)
+
+    def pop(self, sender: str, *default: Any) -> Any:  # type: ignore
+        """Remove the payload of a sender and return it."""
+        if sender in self:
+            self._count(self[sender], -1)
+        return super().pop(sender, *default)
+
+    def popitem(self) -> Tuple[str, BaseTxPayload]:
+        """Remove the last added payload and return it along with its sender."""
+        sender, payload = super().popitem()
+        self._count(payload, -1)
+        return sender, payload
+
+    def setdefault(self, sender: str, payload: BaseTxPayload) -> BaseTxPayload:  # type: ignore
+        """Set the payload of a sender if it has none, and return the sender's payload."""
+        if sender not in self:
+            self[sender] = payload
+        return self[sender]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Update the payloads of the senders."""
+        for sender, payload in dict(*args, **kwargs).items():
+            self[sender] = payload
+
+    def __ior__(self, other: Any) -> "PayloadCollection":  # type: ignore
+        """Update the payloads of the senders in place."""
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        """Remove all the payloads."""
+        super().clear()
+        self._tallies.clear()
+
+
 class CollectionRound(AbstractRound, ABC):
     """
     CollectionRound.
@@ -1310,7 +2125,23 @@ class CollectionRound(AbstractRound, ABC):
     def __init__(self, *args: Any, **kwargs: Any):
         """Initialize the collection round."""
         super().__init__(*args, **kwargs)
-        self.collection: Dict[str, BaseTxPayload] = {}
+        self._collection = PayloadCollection()
+
+    @property
+    def collection(self) -> Dict[str, BaseTxPayload]:
+        """Get the collected payloads, by sender."""
+        return self._collection
+
+    @collection.setter
+    def collection(self, collection: Dict[str, BaseTxPayload]) -> None:
+        """Set the collected payloads, by sender."""
+        if not isinstance(collection, PayloadCollection):
+            collection = PayloadCollection(collection)
+        self._collection = collection
+
+    def _tally(self, key: TallyKey) -> Counter:
+        """Get the running tally of the collected payloads by the given key."""
+        return self._collection.tally(key)
 
     @staticmethod
     def serialize_collection(
@@ -1349,7 +2180,7 @@ class CollectionRound(AbstractRound, ABC):
     @property
     def payload_values_count(self) -> Counter:
         """Get count of payload values."""
-        return Counter(map(lambda p: p.values, self.payloads))
+        return Counter(self._tally(_payload_values))
 
     def process_payload(self, payload: BaseTxPayload) -> None:
         """Process payload."""
@@ -1491,9 +2322,9 @@ class CollectSameUntilAllRound(_CollectUntilAllRound, ABC):
         self,
     ) -> Tuple[Any, ...]:
         """Get the common payload among the agents."""
-        most_common_payload_values, max_votes = self.payload_values_count.most_common(
-            1
-        )[0]
+        most_common_payload_values, max_votes = self._tally(
+            _payload_values
+        ).most_common(1)[0]
         if max_votes < self.synchronized_data.max_participants:
             raise ABCIAppInternalError(
                 f"{max_votes} votes are not enough for `CollectSameUntilAllRound`. Expected: "
@@ -1531,7 +2362,7 @@ class CollectSameUntilThresholdRound(CollectionRound, ABC):
         self,
     ) -> bool:
         """Check if the threshold has been reached."""
-        counts = self.payload_values_count.values()
+        counts = self._tally(_payload_values).values()
         return any(
             count >= self.synchronized_data.consensus_threshold for count in counts
         )
@@ -1552,9 +2383,9 @@ class CollectSameUntilThresholdRound(CollectionRound, ABC):
         self,
     ) -> Tuple[Any, ...]:
         """Get the most voted payload values."""
-        most_voted_payload_values, max_votes = self.payload_values_count.most_common()[
-            0
-        ]
+        most_voted_payload_values, max_votes = self._tally(_payload_values).most_common(
+            1
+        )[0]
         if max_votes < self.synchronized_data.consensus_threshold:
             raise ABCIAppInternalError("not enough votes")
         return most_voted_payload_values
@@ -1706,28 +2537,31 @@ class VotingRound(CollectionRound, ABC):
     @property
     def vote_count(self) -> Counter:
         """Get agent payload vote count"""
-
-        def parse_payload(payload: Any) -> Optional[bool]:
-            if not hasattr(payload, "vote"):
-                raise ValueError(f"payload {payload} has no attribute `vote`")
-            return payload.vote
-
-        return Counter(parse_payload(payload) for payload in self.collection.values())
+        return Counter(self._tally(_payload_vote))
 
     @property
     def positive_vote_threshold_reached(self) -> bool:
         """Check that the vote threshold has been reached."""
-        return self.vote_count[True] >= self.synchronized_data.consensus_threshold
+        return (
+            self._tally(_payload_vote)[True]
+            >= self.synchronized_data.consensus_threshold
+        )
 
     @property
     def negative_vote_threshold_reached(self) -> bool:
         """Check that the vote threshold has been reached."""
-        return self.vote_count[False] >= self.synchronized_data.consensus_threshold
+        return (
+            self._tally(_payload_vote)[False]
+            >= self.synchronized_data.consensus_threshold
+        )
 
     @property
     def none_vote_threshold_reached(self) -> bool:
         """Check that the vote threshold has been reached."""
-        return self.vote_count[None] >= self.synchronized_data.consensus_threshold
+        return (
+            self._tally(_payload_vote)[None]
+            >= self.synchronized_data.consensus_threshold
+        )
 
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
         """Process the end of the block."""
@@ -1882,10 +2716,14 @@ class TimeoutEvent(Generic[EventType]):
     entry_count: int
     event: EventType = field(compare=False)
     cancelled: bool = field(default=False, compare=False)
+    heap_index: int = field(default=-1, compare=False, repr=False)
 
 
 class Timeouts(Generic[EventType]):
-    """Class to keep track of pending timeouts."""
+    """Class to keep track of pending timeouts.
+
+    The timeouts are kept in an indexed binary heap, so that cancelled timeouts are removed right away.
+    """
 
     def __init__(self) -> None:
         """Initialize."""
@@ -1894,22 +2732,89 @@ class Timeouts(Generic[EventType]):
         self._counter = itertools.count()
 
         # The timeout priority queue keeps the earliest deadline at the top.
+        # Each entry knows its position in the heap, so that it can be removed in O(log n).
         self._heap: List[TimeoutEvent[EventType]] = []
 
         # Mapping from entry id to task
         self._entry_finder: Dict[int, TimeoutEvent[EventType]] = {}
 
+        # instrumentation
+        self.peak_size = 0
+        self.n_cancelled = 0
+        self.n_expired = 0
+        self.max_expiry_lag = datetime.timedelta(0)
+
     @property
     def size(self) -> int:
         """Get the size of the timeout queue."""
         return len(self._heap)
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get statistics about the timeout queue."""
+        return {
+            "size": self.size,
+            "peak_size": self.peak_size,
+            "n_cancelled": self.n_cancelled,
+            "n_expired": self.n_expired,
+            "max_expiry_lag": self.max_expiry_lag.total_seconds(),
+        }
+
+    def _place(self, entry: TimeoutEvent[EventType], index: int) -> None:
+        """Place an entry at the given position of the heap."""
+        self._heap[index] = entry
+        entry.heap_index = index
+
+    def _sift_up(self, index: int) -> None:
+        """Move the entry at the given position towards the top of the heap, until the heap invariant holds."""
+        entry = self._heap[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = self._heap[parent_index]
+            if not entry < parent:
+                break
+            self._place(parent, index)
+            index = parent_index
+        self._place(entry, index)
+
+    def _sift_down(self, index: int) -> None:
+        """Move the entry at the given position towards the bottom of the heap, until the heap invariant holds."""
+        size = len(self._heap)
+        entry = self._heap[index]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            right_index = child_index + 1
+            if right_index < size and self._heap[right_index] < self._heap[child_index]:
+                child_index = right_index
+            child = self._heap[child_index]
+            if not child < entry:
+                break
+            self._place(child, index)
+            index = child_index
+        self._place(entry, index)
+
+    def _remove_at(self, index: int) -> TimeoutEvent[EventType]:
+        """Remove and return the entry at the given position of the heap."""
+        entry = self._heap[index]
+        last = self._heap.pop()
+        if index < len(self._heap):
+            self._place(last, index)
+            self._sift_down(index)
+            self._sift_up(last.heap_index)
+        del self._entry_finder[entry.entry_count]
+        entry.heap_index = -1
+        return entry
+
     def add_timeout(self, deadline: datetime.datetime, event: EventType) -> int:
         """Add a timeout."""
         entry_count = next(self._counter)
         timeout_event = TimeoutEvent[EventType](deadline, entry_count, event)
-        heapq.heappush(self._heap, timeout_event)
+        self._heap.append(timeout_event)
+        self._sift_up(len(self._heap) - 1)
         self._entry_finder[entry_count] = timeout_event
+        self.peak_size = max(self.peak_size, len(self._heap))
         return entry_count
 
     def cancel_timeout(self, entry_count: int) -> None:
@@ -1917,21 +2822,50 @@ class Timeouts(Generic[EventType]):
         Remove a timeout.
 
         :param entry_count: the entry id to remove.
-        :raises: KeyError: if the entry count is not found.
         """
-        if entry_count in self._entry_finder:
-            self._entry_finder[entry_count].cancelled = True
+        entry = self._entry_finder.get(entry_count, None)
+        if entry is None:
+            return
+        entry.cancelled = True
+        self._remove_at(entry.heap_index)
+        self.n_cancelled += 1
 
-    def pop_earliest_cancelled_timeouts(self) -> None:
-        """Pop earliest cancelled timeouts."""
-        if self.size == 0:
+    def cancel_timeouts(self, entry_counts: Iterable[int]) -> None:
+        """
+        Remove several timeouts at once, e.g., all the timeouts of a round.
+
+        If a large part of the queue is cancelled, the heap is rebuilt in linear time
+        instead of removing the entries one by one.
+
+        :param entry_counts: the entry ids to remove.
+        """
+        entries = [
+            self._entry_finder[entry_count]
+            for entry_count in set(entry_counts)
+            if entry_count in self._entry_finder
+        ]
+        if len(entries) * 2 <= len(self._heap):
+            for entry in entries:
+                self.cancel_timeout(entry.entry_count)
             return
-        entry = self._heap[0]  # heap peak
-        while entry.cancelled:
-            self.pop_timeout()
-            if self.size == 0:
-                break
-            entry = self._heap[0]
+
+        for entry in entries:
+            entry.cancelled = True
+            entry.heap_index = -1
+            del self._entry_finder[entry.entry_count]
+        self._heap = [entry for entry in self._heap if not entry.cancelled]
+        heapq.heapify(self._heap)
+        for index, entry in enumerate(self._heap):
+            entry.heap_index = index
+        self.n_cancelled += len(entries)
+
+    def pop_earliest_cancelled_timeouts(self) -> None:
+        """
+        Pop earliest cancelled timeouts.
+
+        This is a no-op, kept for backwards compatibility:
+        the cancelled timeouts are removed from the queue as soon as they are cancelled.
+        """
 
     def get_earliest_timeout(self) -> Tuple[datetime.datetime, Any]:
         """Get the earliest timeout-event pair."""
@@ -1940,10 +2874,24 @@ class Timeouts(Generic[EventType]):
 
     def pop_timeout(self) -> Tuple[datetime.datetime, Any]:
         """Remove and return the earliest timeout-event pair."""
-        entry = heapq.heappop(self._heap)
-        del self._entry_finder[entry.entry_count]
+        entry = self._remove_at(0)
         return entry.deadline, entry.event
 
+    def record_expiry(
+        self, deadline: datetime.datetime, timestamp: datetime.datetime
+    ) -> datetime.timedelta:
+        """
+        Record that a deadline has expired at the given time.
+
+        :param deadline: the expired deadline.
+        :param timestamp: the time at which the expiration was observed.
+        :return: the lag between the deadline and its observed expiration.
+        """
+        lag = timestamp - deadline
+        self.n_expired += 1
+        self.max_expiry_lag = max(self.max_expiry_lag, lag)
+        return lag
+
 
 class _MetaAbciApp(ABCMeta):
     """A metaclass that validates AbciApp's attributes."""
@@ -2501,9 +3449,7 @@ class AbciApp(
         :param round_cls: the class of the new round.
         """
         self.logger.debug("scheduling new round: %s", round_cls)
-        for entry_id in self._current_timeout_entries:
-            self._timeouts.cancel_timeout(entry_id)
-
+        self._timeouts.cancel_timeouts(self._current_timeout_entries)
         self._current_timeout_entries = []
         next_events = list(self.transition_function.get(round_cls, {}).keys())
         for event in next_events:
@@ -2524,6 +3470,7 @@ class AbciApp(
                     deadline,
                 )
                 self._current_timeout_entries.append(entry_id)
+        self.logger.debug("pending timeouts: %s", self._timeouts.size)
 
         self._last_round = self._current_round
         self._current_round_cls = round_cls
@@ -2575,6 +3522,37 @@ class AbciApp(
         """Get the latest result of the round."""
         return None if len(self._round_results) == 0 else self._round_results[-1]
 
+    def restore(
+        self,
+        round_cls: AppState,
+        last_round_cls: Optional[AppState],
+        last_timestamp: datetime.datetime,
+        current_round_height: int,
+    ) -> None:
+        """
+        Restore the app at the beginning of a round, e.g., from a snapshot taken at a round transition.
+
+        :param round_cls: the class of the round to restore.
+        :param last_round_cls: the class of the round before it, whose late payloads are still recognized.
+        :param last_timestamp: the timestamp of the block which ended the last round.
+        :param current_round_height: the number of rounds which had been completed.
+        """
+        self.cleanup_timeouts()
+        self._current_round_cls = last_round_cls
+        self._current_round = (
+            None
+            if last_round_cls is None
+            else last_round_cls(self.synchronized_data, self.context)
+        )
+        self._last_timestamp = last_timestamp
+        self.schedule_round(round_cls)
+        self._current_round_height = current_round_height
+
+    @property
+    def timeout_stats(self) -> Dict[str, Any]:
+        """Get statistics about the pending timeouts, e.g., the size of the queue and the lag of the expirations."""
+        return self._timeouts.stats
+
     def cleanup_timeouts(self) -> None:
         """
         Remove all timeouts.
@@ -2741,7 +3719,6 @@ class AbciApp(
         """
         self.logger.info("arrived block with timestamp: %s", timestamp)
         self.logger.info("current AbciApp time: %s", self._last_timestamp)
-        self._timeouts.pop_earliest_cancelled_timeouts()
 
         if self._timeouts.size == 0:
             # if no pending timeouts, then it is safe to
@@ -2756,11 +3733,13 @@ class AbciApp(
             # the earliest deadline is expired. Pop it from the
             # priority queue and process the timeout event.
             expired_deadline, timeout_event = self._timeouts.pop_timeout()
+            lag = self._timeouts.record_expiry(expired_deadline, timestamp)
             self.logger.warning(
-                "expired deadline %s with event %s at AbciApp time %s",
+                "expired deadline %s with event %s at AbciApp time %s (lag: %s)",
                 expired_deadline,
                 timeout_event,
                 timestamp,
+                lag,
             )
 
             # the last timestamp now becomes the expired deadline
@@ -2776,7 +3755,6 @@ class AbciApp(
 
             self.process_event(timeout_event)
 
-            self._timeouts.pop_earliest_cancelled_timeouts()
             if self._timeouts.size == 0:
                 break
             earliest_deadline, _ = self._timeouts.get_earliest_timeout()
@@ -3123,9 +4101,31 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
         WAITING_FOR_DELIVER_TX = "waiting_for_deliver_tx"
         WAITING_FOR_COMMIT = "waiting_for_commit"
 
-    def __init__(self, context: SkillContext, abci_app_cls: Type[AbciApp]):
-        """Initialize the round."""
-        self._blockchain = Blockchain()
+    def __init__(
+        self,
+        context: SkillContext,
+        abci_app_cls: Type[AbciApp],
+        max_blocks: Optional[int] = None,
+        prune_tendermint_blocks: bool = False,
+        snapshot_store: Optional[SnapshotStore] = None,
+        snapshot_interval: int = 1,
+    ):
+        """
+        Initialize the round.
+
+        :param context: the skill context.
+        :param abci_app_cls: the class of the AbciApp.
+        :param max_blocks: the maximum number of blocks to retain in the local blockchain, `None` to retain all.
+        :param prune_tendermint_blocks: whether to let Tendermint prune the blocks which are not retained locally.
+        :param snapshot_store: the store to persist the state of the app to at the round transitions, if any.
+        :param snapshot_interval: the minimum number of blocks between two persisted snapshots.
+        """
+        self._max_blocks = max_blocks
+        self._prune_tendermint_blocks = prune_tendermint_blocks
+        self._snapshot_store = snapshot_store
+        self._snapshot_interval = snapshot_interval
+        self._last_snapshot_height: Optional[int] = None
+        self._blockchain = Blockchain(max_blocks=max_blocks)
         self._syncing_up = True
         self._context = context
         self._block_construction_phase = (
@@ -3186,7 +4186,7 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
     @offence_status.setter
     def offence_status(self, offence_status: Dict[str, OffenceStatus]) -> None:
         """Set the mapping of the agents' addresses to their offence status."""
-        self.abci_app.logger.debug(f"Setting offence status to: {offence_status}")
+        self.abci_app.logger.debug("Setting offence status to: %s", offence_status)
         self._offence_status = offence_status
         self.store_offence_status()
 
@@ -3222,8 +4222,11 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
         """Store the serialized offence status."""
         encoded_status = self.serialized_offence_status()
         self.latest_synchronized_data.slashing_config = encoded_status
-        self.abci_app.logger.debug(f"Updated db with: {encoded_status}")
-        self.abci_app.logger.debug(f"App hash now is: {self.root_hash.hex()}")
+        logger = self.abci_app.logger
+        logger.debug("Updated db with: %s", encoded_status)
+        # computing the app hash is expensive, only do it if it is going to be logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("App hash now is: %s", self.root_hash.hex())
 
     def get_agent_address(self, validator: Validator) -> str:
         """Get corresponding agent address from a `Validator` instance."""
@@ -3294,6 +4297,25 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
         """Get the height."""
         return self._blockchain.height
 
+    @property
+    def snapshot_store(self) -> Optional[SnapshotStore]:
+        """Get the store of the snapshots of the app, if the snapshots are persisted."""
+        return self._snapshot_store
+
+    @property
+    def retain_height(self) -> int:
+        """
+        Get the height below which Tendermint may remove the blocks.
+
+        Tendermint blocks are only pruned if the service has opted in to it,
+        because a Tendermint node without its older blocks cannot replay them after a hard reset.
+
+        :return: the retain height, or 0 to retain all the blocks.
+        """
+        if not self._prune_tendermint_blocks:
+            return 0
+        return self._blockchain.retain_height
+
     @property
     def is_finished(self) -> bool:
         """Check if a round sequence has finished."""
@@ -3330,8 +4352,8 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
     def last_timestamp(self) -> datetime.datetime:
         """Get the last timestamp."""
         last_timestamp = (
-            self._blockchain.blocks[-1].timestamp
-            if self._blockchain.length != 0
+            self._blockchain.last_block.timestamp
+            if self._blockchain.retained_length != 0
             else None
         )
         if last_timestamp is None:
@@ -3429,7 +4451,8 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
     def init_chain(self, initial_height: int) -> None:
         """Init chain."""
         # reduce `initial_height` by 1 to get block count offset as per Tendermint protocol
-        self._blockchain = Blockchain(initial_height - 1)
+        self._blockchain = Blockchain(initial_height - 1, max_blocks=self._max_blocks)
+        self._clear_snapshots()
 
     def _track_tm_offences(
         self, evidences: Evidences, last_commit_info: LastCommitInfo
@@ -3580,6 +4603,7 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
                 # one can create a Blockchain instance with `is_init=True`, i.e. the default args.
                 self._blockchain.add_block(block)
                 self._update_round()
+                self._store_snapshot()
             else:
                 logging.warning(
                     f"Received block with height {block.header.height} before the blockchain was initialized."
@@ -3602,7 +4626,147 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
             self._block_construction_phase = (
                 RoundSequence._BlockConstructionState.WAITING_FOR_BEGIN_BLOCK
             )
-        self._blockchain = Blockchain(is_init=is_init)
+        self._blockchain = Blockchain(is_init=is_init, max_blocks=self._max_blocks)
+        self._clear_snapshots()
+
+    def snapshot(self) -> AppSnapshot:
+        """Take a snapshot of the state of the app, which is only complete right after a round transition."""
+        return AppSnapshot(
+            height=self.height,
+            app_hash=self.root_hash.hex(),
+            db=self.abci_app.synchronized_data.db.serialize(),
+            round_count=self.abci_app.synchronized_data.round_count,
+            current_round_id=cast(str, self.current_round_id),
+            last_round_id=self.last_round_id,
+            current_round_height=self.current_round_height,
+            # with the offset of the local time zone, so that the nodes in other time zones restore the same time
+            timestamp=self.abci_app.last_timestamp.astimezone().isoformat(),
+            tm_height=self._last_round_transition_tm_height,
+            slashing_enabled=self._slashing_enabled,
+            validator_to_agent=dict(self._validator_to_agent),
+        )
+
+    def restore(self, snapshot: AppSnapshot) -> None:
+        """
+        Restore the state of the app from a snapshot, so that Tendermint only replays the blocks after it.
+
+        Only the database of the snapshot is covered by its app hash.
+        The position in the FSM is therefore checked against the rounds of the app,
+        and the validators' mapping against the participants of the restored database and the local mapping.
+
+        :param snapshot: the snapshot to restore.
+        :raises SnapshotError: if the snapshot does not match the app, in which case the state is not altered.
+        """
+        round_id_to_cls = {
+            cls.auto_round_id(): cls for cls in self.abci_app.transition_function
+        }
+        round_cls = round_id_to_cls.get(snapshot.current_round_id, None)
+        if round_cls is None:
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: "
+                f"unknown round id {snapshot.current_round_id!r}."
+            )
+        last_round_cls = self._get_last_round_cls(snapshot)
+        if snapshot.round_count < ROUND_COUNT_DEFAULT:
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: "
+                f"invalid round count {snapshot.round_count}."
+            )
+        db = deepcopy(self.abci_app.synchronized_data.db)
+        try:
+            db.sync(snapshot.db)
+        except ABCIAppInternalError as exc:
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: {exc}"
+            ) from exc
+        if db.hash().hex() != snapshot.app_hash:
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: "
+                f"the app hash of the restored db does not match {snapshot.app_hash}."
+            )
+        self._check_validator_to_agent(snapshot, db)
+
+        self._reset_to_default_params()
+        self._blockchain = Blockchain(snapshot.height, max_blocks=self._max_blocks)
+        self._block_construction_phase = (
+            RoundSequence._BlockConstructionState.WAITING_FOR_BEGIN_BLOCK
+        )
+        if snapshot.validator_to_agent:
+            self._validator_to_agent = dict(snapshot.validator_to_agent)
+        self.sync_db_and_slashing(snapshot.db)
+        self._slashing_enabled = snapshot.slashing_enabled
+        self.abci_app.restore(
+            round_cls,
+            last_round_cls,
+            snapshot.block_timestamp,
+            snapshot.current_round_height,
+        )
+        self.abci_app.synchronized_data.db.round_count = snapshot.round_count
+        self._last_round_transition_timestamp = snapshot.block_timestamp
+        self._last_round_transition_height = snapshot.height
+        self._last_round_transition_root_hash = bytes.fromhex(snapshot.app_hash)
+        self._last_round_transition_tm_height = snapshot.tm_height
+        self._last_snapshot_height = snapshot.height
+
+    def _get_last_round_cls(self, snapshot: AppSnapshot) -> Optional[AppState]:
+        """Get the class of the last round of a snapshot, which may also be a round of a background app."""
+        if snapshot.last_round_id is None:
+            return None
+        transition_functions = [self.abci_app.transition_function] + [
+            cast(AbciAppTransitionFunction, app.transition_function)
+            for app in self.abci_app.background_apps
+        ]
+        for transition_function in transition_functions:
+            for round_cls in transition_function:
+                if round_cls.auto_round_id() == snapshot.last_round_id:
+                    return round_cls
+        raise SnapshotError(
+            f"Cannot restore snapshot at height {snapshot.height}: "
+            f"unknown last round id {snapshot.last_round_id!r}."
+        )
+
+    def _check_validator_to_agent(self, snapshot: AppSnapshot, db: AbciAppDB) -> None:
+        """Check the validators' mapping of a snapshot against the participants of its database and the local mapping."""
+        if not snapshot.validator_to_agent:
+            return
+        if self._validator_to_agent and self._validator_to_agent != dict(
+            snapshot.validator_to_agent
+        ):
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: "
+                "its mapping of the validators does not match the local one."
+            )
+        participants = db.get("all_participants", None)
+        unknown_agents = set(snapshot.validator_to_agent.values()).difference(
+            participants or ()
+        )
+        if unknown_agents:
+            raise SnapshotError(
+                f"Cannot restore snapshot at height {snapshot.height}: "
+                f"the validators are mapped to agents which are not participants: {sorted(unknown_agents)}."
+            )
+
+    def _store_snapshot(self) -> None:
+        """Persist the state of the app, if a round transition has just been committed."""
+        if (
+            self._snapshot_store is None
+            or self._last_round_transition_height != self.height
+            or self.is_finished
+        ):
+            return
+        if (
+            self._last_snapshot_height is not None
+            and self.height - self._last_snapshot_height < self._snapshot_interval
+        ):
+            return
+        self._snapshot_store.save(self.snapshot())
+        self._last_snapshot_height = self.height
+
+    def _clear_snapshots(self) -> None:
+        """Clear the persisted snapshots, as they belong to a chain which has been reset."""
+        self._last_snapshot_height = None
+        if self._snapshot_store is not None:
+            self._snapshot_store.clear()
 
     def _get_round_result(
         self,
@@ -3658,8 +4822,10 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
 
         round_result, event = result
         _logger.debug(
-            f"updating round, current_round {self.current_round.round_id}, event: {event}, "
-            f"round result {round_result}"
+            "updating round, current_round %s, event: %s, round result %s",
+            self.current_round.round_id,
+            event,
+            round_result,
         )
         self.abci_app.process_event(event, result=round_result)
 
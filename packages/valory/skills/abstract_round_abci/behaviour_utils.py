@@ -23,9 +23,10 @@
 import datetime
 import inspect
 import json
-import pprint
+import math
 import re
 import sys
+import time
 from abc import ABC, ABCMeta, abstractmethod
 from enum import Enum
 from functools import partial
@@ -36,6 +37,7 @@ from typing import (
     Generator,
     List,
     Optional,
+    Sequence,
     Tuple,
     Type,
     Union,
@@ -108,6 +110,7 @@ from packages.valory.skills.abstract_round_abci.models import (
     SharedState,
     TendermintRecoveryParams,
 )
+from packages.valory.skills.abstract_round_abci.utils import LazyPrettyFormat
 
 
 # TODO: port registration code from registration_abci to here
@@ -137,6 +140,41 @@ class BaseBehaviourInternalError(Exception):
         super().__init__("internal error: " + message, *args)
 
 
+class Wakeup:
+    """
+    The events which a parked behaviour waits for before it is resumed.
+
+    The `act` ticks of a parked behaviour do not resume its generator
+    until the deadline has passed or the round height has changed.
+    """
+
+    __slots__ = ("deadline", "get_round_height", "round_height")
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        get_round_height: Optional[Callable[[], int]] = None,
+    ) -> None:
+        """
+        Initialize the wakeup.
+
+        :param timeout: the seconds after which the wakeup fires, or `None` to not wait for a deadline.
+        :param get_round_height: the getter of the round height, or `None` to not wait for a round height change.
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.get_round_height = get_round_height
+        self.round_height = None if get_round_height is None else get_round_height()
+
+    def has_fired(self) -> bool:
+        """Check whether any of the events has happened."""
+        if (
+            self.get_round_height is not None
+            and self.get_round_height() != self.round_height
+        ):
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
 class AsyncBehaviour(ABC):
     """
     MixIn behaviour class that support limited asynchronous programming.
@@ -164,6 +202,7 @@ class AsyncBehaviour(ABC):
         self.__notified: bool = False
         self.__message: Any = None
         self.__setup_called: bool = False
+        self.__wakeup: Optional[Wakeup] = None
 
     @abstractmethod
     def async_act(self) -> Generator:
@@ -198,6 +237,28 @@ class AsyncBehaviour(ABC):
         """Check whether the behaviour has stopped."""
         return self.__stopped
 
+    def _is_parked(self) -> bool:
+        """Check whether the behaviour is parked, and unpark it if its wakeup has fired."""
+        if self.__wakeup is None:
+            return False
+        if not self.__wakeup.has_fired():
+            return True
+        self.__wakeup = None
+        return False
+
+    def park(self, wakeup: Wakeup) -> Generator[None, None, None]:
+        """
+        Park the behaviour until the given wakeup fires.
+
+        The caller should check the condition it waits for again after it has been resumed,
+        as the generator may also be resumed directly, by a driver other than `act`.
+
+        :param wakeup: the wakeup to wait for.
+        :yield: None
+        """
+        self.__wakeup = wakeup
+        yield
+
     def __get_generator_act(self) -> Generator:
         """Get the _generator_act."""
         if self.__generator_act is None:
@@ -260,11 +321,21 @@ class AsyncBehaviour(ABC):
         :yield: None
         """
         deadline = datetime.datetime.now() + datetime.timedelta(0, seconds)
+        yield from self._wait_until_datetime(deadline)
 
-        def _wait_until() -> bool:
-            return datetime.datetime.now() > deadline
+    def _wait_until_datetime(
+        self, deadline: datetime.datetime
+    ) -> Generator[None, None, None]:
+        """
+        Wait until the given local time, parking the behaviour in the meantime.
 
-        yield from self.wait_for_condition(_wait_until)
+        :param deadline: the local time to wait for.
+        :yield: None
+        """
+        now = datetime.datetime.now()
+        while not now > deadline:
+            yield from self.park(Wakeup(timeout=(deadline - now).total_seconds()))
+            now = datetime.datetime.now()
 
     def wait_for_message(
         self,
@@ -318,12 +389,15 @@ class AsyncBehaviour(ABC):
             self.__handle_waiting_for_message()
             return
         enforce(self.__state == self.AsyncState.RUNNING, "not in 'RUNNING' state")
+        if self._is_parked():
+            return
         self.__handle_tick()
 
     def stop(self) -> None:
         """Stop the execution of the behaviour."""
         if self.__stopped or self.__state == self.AsyncState.READY:
             return
+        self.__wakeup = None
         self.__get_generator_act().close()
         self.__state = self.AsyncState.READY
         self.__stopped = True
@@ -332,6 +406,7 @@ class AsyncBehaviour(ABC):
         """Call the 'async_act' method for the first time."""
         self.__stopped = False
         self.__state = self.AsyncState.RUNNING
+        self.__wakeup = None
         try:
             self.__generator_act = self.async_act_wrapper()
             # if the method 'async_act' was not a generator function
@@ -666,9 +741,16 @@ class BaseBehaviour(
                 f"Should be in matching round ({round_id}) or last round ({self.round_sequence.last_round_id}), "
                 f"actual round {self.round_sequence.current_round_id}!"
             )
-        yield from self.wait_for_condition(
-            partial(self.check_round_height_has_changed, round_height), timeout=timeout
-        )
+        deadline = time.monotonic() + (math.inf if timeout is None else timeout)
+
+        def _get_round_height() -> int:
+            return self.round_sequence.current_round_height
+
+        while not self.check_round_height_has_changed(round_height):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException()
+            yield from self.park(Wakeup(remaining, _get_round_height))
 
     def wait_from_last_timestamp(self, seconds: float) -> Any:
         """
@@ -686,11 +768,7 @@ class BaseBehaviour(
         deadline = self.round_sequence.abci_app.last_timestamp + datetime.timedelta(
             seconds=seconds
         )
-
-        def _wait_until() -> bool:
-            return datetime.datetime.now() > deadline
-
-        yield from self.wait_for_condition(_wait_until)
+        yield from self._wait_until_datetime(deadline)
 
     def is_done(self) -> bool:
         """Check whether the behaviour is done."""
@@ -753,6 +831,7 @@ class BaseBehaviour(
                 remote_height = int(
                     json_body["result"]["sync_info"]["latest_block_height"]
                 )
+                self.context.state.check_restored_snapshot(remote_height)
                 local_height = int(self.round_sequence.height)
                 _is_sync_complete = local_height == remote_height
                 if _is_sync_complete:
@@ -841,13 +920,14 @@ class BaseBehaviour(
         )
         while not stop_condition():
             self.context.logger.debug(
-                f"Trying to send payload: {pprint.pformat(payload.json)}"
+                "Trying to send payload: %s", LazyPrettyFormat(payload.json)
             )
             signature_bytes = yield from self.get_signature(payload.encode())
             transaction = Transaction(payload, signature_bytes)
             try:
                 response = yield from self._submit_tx(
-                    transaction.encode(), timeout=request_timeout
+                    transaction.encode(compact=self.params.compact_transactions),
+                    timeout=request_timeout,
                 )
                 # There is no guarantee that beyond this line will be executed for a given behaviour execution.
                 # The tx could lead to a round transition which exits us from the behaviour execution.
@@ -884,7 +964,7 @@ class BaseBehaviour(
                 raise ValueError(
                     f"Unable to decode response: {response} with body {str(response.body)}"
                 ) from e
-            self.context.logger.debug(f"JSON response: {pprint.pformat(json_body)}")
+            self.context.logger.debug("JSON response: %s", LazyPrettyFormat(json_body))
             tx_hash = json_body["result"]["hash"]
             if json_body["result"]["code"] != OK_CODE:
                 self.context.logger.info(
@@ -1264,6 +1344,80 @@ class BaseBehaviour(
 
         return callback_request
 
+    def get_callback_gather(
+        self, request_nonce: str, responses: Dict[str, Message]
+    ) -> Callable[[Message, "BaseBehaviour"], None]:
+        """
+        Get the callback of a request whose response is gathered along with the responses of other requests.
+
+        :param request_nonce: the nonce of the request.
+        :param responses: the gathered responses, by request nonce.
+        :return: the request callback.
+        """
+
+        def callback_gather(message: Message, current_behaviour: BaseBehaviour) -> None:
+            """The callback of a gathered request."""
+            if self.is_stopped:
+                self.context.logger.debug(
+                    "dropping message as behaviour has stopped: %s", message
+                )
+            elif self != current_behaviour:
+                self.handle_late_messages(self.behaviour_id, message)
+            else:
+                responses[request_nonce] = message
+
+        return callback_gather
+
+    def gather_responses(
+        self,
+        requests: Sequence[Tuple[Message, Dialogue]],
+        n_responses: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Generator[None, None, List[Optional[Message]]]:
+        """
+        Send several requests at once, and wait for all or for the first of their responses.
+
+        The requests can be built with the `_build_*_message` methods,
+        and their responses are routed back by the nonces of their dialogues.
+        The callbacks of the requests which have not been responded when the wait is over are removed,
+        so that their responses are treated as unexpected.
+
+        :param requests: the request messages and their dialogues.
+        :param n_responses: the number of responses to wait for, or `None` to wait for all of them.
+        :param timeout: the maximum amount of time to wait for the responses.
+        :yield: None
+        :return: the responses, in the order of the requests, or `None` for the requests which have not been responded.
+        """
+        n_required = len(requests) if n_responses is None else n_responses
+        enforce(
+            0 <= n_required <= len(requests),
+            f"Cannot wait for {n_required} responses to {len(requests)} requests.",
+        )
+        request_id_to_callback = cast(
+            Requests, self.context.requests
+        ).request_id_to_callback
+        responses: Dict[str, Message] = {}
+        request_nonces = []
+        for message, dialogue in requests:
+            request_nonce = self._get_request_nonce_from_dialogue(dialogue)
+            request_nonces.append(request_nonce)
+            request_id_to_callback[request_nonce] = self.get_callback_gather(
+                request_nonce, responses
+            )
+            self.context.outbox.put_message(message=message)
+
+        try:
+            # notify caller by propagating potential timeout exception.
+            yield from self.wait_for_condition(
+                lambda: len(responses) >= n_required, timeout=timeout
+            )
+        finally:
+            for request_nonce in request_nonces:
+                if request_nonce not in responses:
+                    request_id_to_callback.pop(request_nonce, None)
+
+        return [responses.get(request_nonce) for request_nonce in request_nonces]
+
     def get_http_response(
         self,
         method: str,
@@ -1633,6 +1787,31 @@ class BaseBehaviour(
         :return: the contract api response
         :yields: the contract api response
         """
+        ledger_api_msg, ledger_api_dialogue = self._build_ledger_api_request_message(
+            performative, ledger_callable, **kwargs
+        )
+        request_nonce = self._get_request_nonce_from_dialogue(ledger_api_dialogue)
+        cast(Requests, self.context.requests).request_id_to_callback[
+            request_nonce
+        ] = self.get_callback_request()
+        self.context.outbox.put_message(message=ledger_api_msg)
+        response = yield from self.wait_for_message()
+        return response
+
+    def _build_ledger_api_request_message(
+        self,
+        performative: LedgerApiMessage.Performative,
+        ledger_callable: str,
+        **kwargs: Any,
+    ) -> Tuple[LedgerApiMessage, LedgerApiDialogue]:
+        """
+        Build a ledger api request message.
+
+        :param performative: the message performative
+        :param ledger_callable: the callable to call on the ledger
+        :param kwargs: keyword argument for the ledger api request
+        :return: the ledger api message and the ledger api dialogue
+        """
         ledger_api_dialogues = cast(
             LedgerApiDialogues, self.context.ledger_api_dialogues
         )
@@ -1650,13 +1829,7 @@ class BaseBehaviour(
             ledger_api_dialogue,
         )
         ledger_api_dialogue.terms = self._get_default_terms()
-        request_nonce = self._get_request_nonce_from_dialogue(ledger_api_dialogue)
-        cast(Requests, self.context.requests).request_id_to_callback[
-            request_nonce
-        ] = self.get_callback_request()
-        self.context.outbox.put_message(message=ledger_api_msg)
-        response = yield from self.wait_for_message()
-        return response
+        return cast(LedgerApiMessage, ledger_api_msg), ledger_api_dialogue
 
     def get_contract_api_response(
         self,
@@ -1682,6 +1855,38 @@ class BaseBehaviour(
         :return: the contract api response
         :yields: the contract api response
         """
+        (
+            contract_api_msg,
+            contract_api_dialogue,
+        ) = self._build_contract_api_request_message(
+            performative, contract_address, contract_id, contract_callable, **kwargs
+        )
+        request_nonce = self._get_request_nonce_from_dialogue(contract_api_dialogue)
+        cast(Requests, self.context.requests).request_id_to_callback[
+            request_nonce
+        ] = self.get_callback_request()
+        self.context.outbox.put_message(message=contract_api_msg)
+        response = yield from self.wait_for_message()
+        return response
+
+    def _build_contract_api_request_message(
+        self,
+        performative: ContractApiMessage.Performative,
+        contract_address: Optional[str],
+        contract_id: str,
+        contract_callable: str,
+        **kwargs: Any,
+    ) -> Tuple[ContractApiMessage, ContractApiDialogue]:
+        """
+        Build a contract api request message.
+
+        :param performative: the message performative
+        :param contract_address: the contract address
+        :param contract_id: the contract id
+        :param contract_callable: the callable to call on the contract
+        :param kwargs: keyword argument for the contract api request
+        :return: the contract api message and the contract api dialogue
+        """
         contract_api_dialogues = cast(
             ContractApiDialogues, self.context.contract_api_dialogues
         )
@@ -1703,13 +1908,7 @@ class BaseBehaviour(
             contract_api_dialogue,
         )
         contract_api_dialogue.terms = self._get_default_terms()
-        request_nonce = self._get_request_nonce_from_dialogue(contract_api_dialogue)
-        cast(Requests, self.context.requests).request_id_to_callback[
-            request_nonce
-        ] = self.get_callback_request()
-        self.context.outbox.put_message(message=contract_api_msg)
-        response = yield from self.wait_for_message()
-        return response
+        return cast(ContractApiMessage, contract_api_msg), contract_api_dialogue
 
     @staticmethod
     def __parse_rpc_error(error: str) -> RPCResponseStatus:
@@ -2241,6 +2440,9 @@ class TmManager(BaseBehaviour):
                 # this was done to have consistency between
                 # the act here, and acts on normal AsyncBehaviours
                 return
+            # a parked generator is only resumed once its wakeup fires
+            if self._is_parked():
+                return
             # this will run the active generator until
             # the first yield statement is encountered
             self._active_generator.send(None)
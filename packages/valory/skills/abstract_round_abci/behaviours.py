@@ -19,6 +19,7 @@
 
 """This module contains the behaviours for the 'abstract_round_abci' skill."""
 
+import time
 from abc import ABC, ABCMeta
 from collections import defaultdict
 from dataclasses import asdict
@@ -351,7 +352,19 @@ class AbstractRoundBehaviour(  # pylint: disable=too-many-instance-attributes
             behaviour.act_wrapper()
 
     def act(self) -> None:
-        """Implement the behaviour."""
+        """Implement the behaviour, measuring the duration of the tick."""
+        start = time.perf_counter()
+        try:
+            self._act()
+        finally:
+            metrics = cast(SharedState, self.context.state).metrics
+            metrics.behaviour_tick_duration.observe(time.perf_counter() - start)
+            metrics.outstanding_requests.set(
+                len(self.context.requests.request_id_to_callback)
+            )
+
+    def _act(self) -> None:
+        """Tick the current behaviour, or try to fix the communication with Tendermint if it is unhealthy."""
         tm_manager = cast(TmManager, self.tm_manager)
         if tm_manager.tm_communication_unhealthy or tm_manager.is_acting:
             # tendermint is not healthy, or we are already applying a fix.
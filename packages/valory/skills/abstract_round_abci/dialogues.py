@@ -19,7 +19,7 @@
 
 """This module contains the classes required for dialogue management."""
 
-from typing import Any, Optional, Type
+from typing import Any, Optional, Type, cast
 
 from aea.exceptions import enforce
 from aea.helpers.transaction.base import Terms
@@ -34,6 +34,7 @@ from packages.open_aea.protocols.signing.dialogues import (
 from packages.open_aea.protocols.signing.dialogues import (
     SigningDialogues as BaseSigningDialogues,
 )
+from packages.valory.connections.abci.dialogues import BoundedDialoguesStorage
 from packages.valory.protocols.abci.dialogues import AbciDialogue as BaseAbciDialogue
 from packages.valory.protocols.abci.dialogues import AbciDialogues as BaseAbciDialogues
 from packages.valory.protocols.contract_api import ContractApiMessage
@@ -92,6 +93,13 @@ class AbciDialogues(Model, BaseAbciDialogues):
             self_address=str(self.skill_id),
             role_from_first_message=role_from_first_message,
         )
+        # the dialogues are discarded once answered, and the unanswered ones are evicted from the oldest
+        self._dialogues_storage = BoundedDialoguesStorage(self)
+
+    @property
+    def n_live_dialogues(self) -> int:
+        """Get the number of dialogues waiting for a response."""
+        return cast(BoundedDialoguesStorage, self._dialogues_storage).n_live
 
 
 HttpDialogue = BaseHttpDialogue
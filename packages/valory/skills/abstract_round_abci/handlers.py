@@ -21,11 +21,12 @@
 
 import ipaddress
 import json
+import time
 from abc import ABC
 from calendar import timegm
 from dataclasses import asdict
 from enum import Enum
-from typing import Any, Callable, Dict, FrozenSet, List, Optional, cast
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple, cast
 
 from aea.configurations.data_types import PublicId
 from aea.protocols.base import Message
@@ -33,8 +34,34 @@ from aea.protocols.dialogue.base import Dialogue, Dialogues
 from aea.skills.base import Handler
 
 from packages.open_aea.protocols.signing import SigningMessage
+from packages.valory.connections.abci.connection import (
+    register_direct_handler,
+    unregister_direct_handler,
+)
+from packages.valory.connections.abci.tendermint.abci.types_pb2 import (  # type: ignore
+    Request,
+    Response,
+    ResponseBeginBlock,
+    ResponseCheckTx,
+    ResponseCommit,
+    ResponseDeliverTx,
+    ResponseEcho,
+    ResponseEndBlock,
+    ResponseFlush,
+)
 from packages.valory.protocols.abci import AbciMessage
-from packages.valory.protocols.abci.custom_types import Events, ValidatorUpdates
+from packages.valory.protocols.abci.custom_types import (
+    Events,
+    Evidence,
+    Evidences,
+    Header,
+    LastCommitInfo,
+    Result,
+    ResultType,
+    SnapShots,
+    Snapshot,
+    ValidatorUpdates,
+)
 from packages.valory.protocols.contract_api import ContractApiMessage
 from packages.valory.protocols.http import HttpMessage
 from packages.valory.protocols.ipfs import IpfsMessage
@@ -58,14 +85,39 @@ from packages.valory.skills.abstract_round_abci.base import (
     Transaction,
     TransactionNotValidError,
     TransactionTypeNotRecognizedError,
+    VerifiedTransactionCache,
 )
 from packages.valory.skills.abstract_round_abci.behaviours import AbstractRoundBehaviour
-from packages.valory.skills.abstract_round_abci.dialogues import AbciDialogue
+from packages.valory.skills.abstract_round_abci.dialogues import (
+    AbciDialogue,
+    AbciDialogues,
+)
 from packages.valory.skills.abstract_round_abci.models import (
     Requests,
     SharedState,
     TendermintRecoveryParams,
 )
+from packages.valory.skills.abstract_round_abci.persistence import (
+    DEFAULT_SNAPSHOT_CHUNK_SIZE,
+    SNAPSHOT_FORMAT,
+    SnapshotAssembler,
+    SnapshotError,
+)
+
+
+class ApplySnapshotChunkResult(Enum):
+    """The results of Tendermint's `ApplySnapshotChunk`, which differ from the ones of `OfferSnapshot`."""
+
+    UNKNOWN = 0  # Unknown result, abort all snapshot restoration
+    ACCEPT = 1  # The chunk was accepted
+    ABORT = 2  # Abort all snapshot restoration
+    RETRY = 3  # Reapply this chunk, combine with `refetch_chunks` and `reject_senders` as appropriate
+    RETRY_SNAPSHOT = 4  # Restart this snapshot from `offer_snapshot`, reusing chunks unless instructed otherwise
+    REJECT_SNAPSHOT = 5  # Reject this snapshot, try a different one
+
+    def to_result(self) -> Result:
+        """Get the result to send with the response, which the protocol encodes by the value of its `ResultType`."""
+        return Result(ResultType(self.value))
 
 
 def exception_to_info_msg(exception: Exception) -> str:
@@ -77,6 +129,142 @@ class ABCIRoundHandler(ABCIHandler):
     """ABCI handler."""
 
     SUPPORTED_PROTOCOL = AbciMessage.protocol_id
+    # the size of the chunks of the snapshots offered to the nodes which state sync
+    snapshot_chunk_size = DEFAULT_SNAPSHOT_CHUNK_SIZE
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the handler."""
+        super().__init__(**kwargs)
+        # the transactions verified during `check_tx` are cached, so that they are not verified again on `deliver_tx`
+        self._verified_tx_cache = VerifiedTransactionCache()
+        self._verified_tx_cache_round_height: Optional[int] = None
+        # the snapshot offered to this node for state sync, and the app hash that it should result in
+        self._snapshot_assembler: Optional[SnapshotAssembler] = None
+        self._offered_app_hash = b""
+
+    def setup(self) -> None:
+        """Set up the handler, registering it as the direct handler of the ABCI connection."""
+        super().setup()
+        register_direct_handler(
+            self.context.agent_address, self.context.skill_id, self.dispatch
+        )
+
+    def teardown(self) -> None:
+        """Tear down the handler."""
+        unregister_direct_handler(self.context.agent_address, self.context.skill_id)
+        super().teardown()
+
+    def handle(self, message: Message) -> None:
+        """Handle an ABCI request, measuring the time taken to answer it."""
+        start = time.perf_counter()
+        super().handle(message)
+        request_type = message.performative.value.replace("request_", "")
+        self._observe_request(request_type, time.perf_counter() - start)
+
+    def dispatch(self, requests: Sequence[Request]) -> List[Response]:
+        """
+        Answer requests of the Tendermint node in-process, if the ABCI connection is configured to dispatch directly.
+
+        Only the requests which Tendermint sends for every block are answered,
+        bypassing the ABCI messages and dialogues. The requests are answered in order,
+        until one of the others, which is left to the connection to forward to the skill as usual, together with the next ones.
+        The transactions of the requests, e.g., the ones delivered in a block, are verified in a batch beforehand.
+
+        :param requests: the requests, in the order they were received.
+        :return: the responses to the first requests, in order.
+        """
+        self._verify_transactions(requests)
+        responses = []
+        for request in requests:
+            start = time.perf_counter()
+            response = self._dispatch(request)
+            if response is None:
+                break
+            self._observe_request(
+                request.WhichOneof("value"), time.perf_counter() - start
+            )
+            responses.append(response)
+        return responses
+
+    def _verify_transactions(self, requests: Sequence[Request]) -> None:
+        """Verify the transactions of the requests in a batch, caching the valid ones for when they are answered."""
+        transactions_bytes = []
+        for request in requests:
+            request_type = request.WhichOneof("value")
+            if request_type in ("check_tx", "deliver_tx"):
+                transactions_bytes.append(getattr(request, request_type).tx)
+        if len(transactions_bytes) < 2:
+            return
+        self._sync_verified_tx_cache()
+        self._verified_tx_cache.verify_batch(
+            transactions_bytes,
+            self.context.default_ledger_id,
+            cast(SharedState, self.context.state).tx_verification_executor,
+        )
+
+    def _observe_request(self, request_type: str, seconds: float) -> None:
+        """Record an answered request in the metrics."""
+        metrics = cast(SharedState, self.context.state).metrics
+        metrics.abci_requests.inc(request_type)
+        metrics.abci_request_duration.observe(seconds, request_type)
+
+    def _dispatch(self, request: Request) -> Optional[Response]:
+        """Answer a request in-process, if it is one of those which Tendermint sends for every block."""
+        request_type = request.WhichOneof("value")
+        round_sequence = cast(SharedState, self.context.state).round_sequence
+        if request_type == "check_tx":
+            code, info = self._check_tx(request.check_tx.tx)
+            return Response(check_tx=ResponseCheckTx(code=code, info=info))
+        if request_type == "deliver_tx":
+            code, info = self._deliver_tx(request.deliver_tx.tx)
+            return Response(deliver_tx=ResponseDeliverTx(code=code, info=info))
+        if request_type == "begin_block":
+            begin_block = request.begin_block
+            self._begin_block(
+                Header.decode(begin_block.header),
+                Evidences(
+                    [
+                        Evidence.decode(evidence)
+                        for evidence in begin_block.byzantine_validators
+                    ]
+                ),
+                LastCommitInfo.decode(begin_block.last_commit_info),
+            )
+            return Response(begin_block=ResponseBeginBlock())
+        if request_type == "end_block":
+            round_sequence.tm_height = request.end_block.height
+            round_sequence.end_block()
+            return Response(end_block=ResponseEndBlock())
+        if request_type == "commit":
+            data, retain_height = self._commit()
+            return Response(
+                commit=ResponseCommit(data=data, retain_height=retain_height)
+            )
+        if request_type == "flush":
+            return Response(flush=ResponseFlush())
+        if request_type == "echo":
+            return Response(echo=ResponseEcho(message=request.echo.message))
+        return None
+
+    def _sync_verified_tx_cache(self) -> None:
+        """Clear the cache of the verified transactions, if the round has changed since they were verified."""
+        round_height = cast(
+            SharedState, self.context.state
+        ).round_sequence.current_round_height
+        if round_height != self._verified_tx_cache_round_height:
+            # the transactions of the previous rounds would be rejected as late-arriving anyway
+            self._verified_tx_cache.clear()
+            self._verified_tx_cache_round_height = round_height
+
+    def _decode_and_verify(self, transaction_bytes: bytes) -> Transaction:
+        """Decode and verify a transaction, using the cache of the verified transactions of the current round."""
+        self._sync_verified_tx_cache()
+        transaction = self._verified_tx_cache.get(transaction_bytes)
+        if transaction is None:
+            transaction = Transaction.decode(transaction_bytes)
+            transaction.verify(self.context.default_ledger_id)
+            self._verified_tx_cache.add(transaction_bytes, transaction)
+        return transaction
 
     def info(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
         """
@@ -148,18 +336,24 @@ class ABCIRoundHandler(ABCIHandler):
 
     def begin_block(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
         """Handle the 'begin_block' request."""
-        cast(SharedState, self.context.state).round_sequence.begin_block(
+        self._begin_block(
             message.header, message.byzantine_validators, message.last_commit_info
         )
         return super().begin_block(message, dialogue)
 
-    def check_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
-        """Handle the 'check_tx' request."""
-        transaction_bytes = message.tx
+    def _begin_block(
+        self, header: Header, evidences: Evidences, last_commit_info: LastCommitInfo
+    ) -> None:
+        """Begin a block, confirming the restored snapshot, if any, as the node has accepted it."""
+        shared_state = cast(SharedState, self.context.state)
+        shared_state.confirm_restored_snapshot()
+        shared_state.round_sequence.begin_block(header, evidences, last_commit_info)
+
+    def _check_tx(self, transaction_bytes: bytes) -> Tuple[int, str]:
+        """Check a transaction, returning the code and the info of the response."""
         # check we can decode the transaction
         try:
-            transaction = Transaction.decode(transaction_bytes)
-            transaction.verify(self.context.default_ledger_id)
+            self._decode_and_verify(transaction_bytes)
             cast(SharedState, self.context.state).round_sequence.check_is_finished()
         except (
             SignatureNotValidError,
@@ -167,14 +361,17 @@ class ABCIRoundHandler(ABCIHandler):
             TransactionTypeNotRecognizedError,
         ) as exception:
             self._log_exception(exception)
-            return self._check_tx_failed(
-                message, dialogue, exception_to_info_msg(exception)
-            )
+            return ERROR_CODE, exception_to_info_msg(exception)
         except LateArrivingTransaction as exception:  # pragma: nocover
             self.context.logger.debug(exception_to_info_msg(exception))
-            return self._check_tx_failed(
-                message, dialogue, exception_to_info_msg(exception)
-            )
+            return ERROR_CODE, exception_to_info_msg(exception)
+        return OK_CODE, "check_tx succeeded"
+
+    def check_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
+        """Handle the 'check_tx' request."""
+        code, info = self._check_tx(message.tx)
+        if code != OK_CODE:
+            return self._check_tx_failed(message, dialogue, info)
 
         # return check_tx success
         reply = dialogue.reply(
@@ -183,7 +380,7 @@ class ABCIRoundHandler(ABCIHandler):
             code=OK_CODE,
             data=b"",
             log="",
-            info="check_tx succeeded",
+            info=info,
             gas_wanted=0,
             gas_used=0,
             events=Events([]),
@@ -222,14 +419,12 @@ class ABCIRoundHandler(ABCIHandler):
         )
         round_sequence.add_pending_offence(pending_offense)
 
-    def deliver_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
-        """Handle the 'deliver_tx' request."""
-        transaction_bytes = message.tx
+    def _deliver_tx(self, transaction_bytes: bytes) -> Tuple[int, str]:
+        """Deliver a transaction, returning the code and the info of the response."""
         round_sequence = cast(SharedState, self.context.state).round_sequence
         payload_sender: Optional[str] = None
         try:
-            transaction = Transaction.decode(transaction_bytes)
-            transaction.verify(self.context.default_ledger_id)
+            transaction = self._decode_and_verify(transaction_bytes)
             payload_sender = transaction.payload.sender
             round_sequence.check_is_finished()
             round_sequence.deliver_tx(transaction)
@@ -241,17 +436,20 @@ class ABCIRoundHandler(ABCIHandler):
             self._log_exception(exception)
             # the transaction is invalid, it's potentially an offence, so we add it to the list of pending offences
             self.settle_pending_offence(payload_sender, invalid=True)
-            return self._deliver_tx_failed(
-                message, dialogue, exception_to_info_msg(exception)
-            )
+            return ERROR_CODE, exception_to_info_msg(exception)
         except LateArrivingTransaction as exception:  # pragma: nocover
             self.context.logger.debug(exception_to_info_msg(exception))
-            return self._deliver_tx_failed(
-                message, dialogue, exception_to_info_msg(exception)
-            )
+            return ERROR_CODE, exception_to_info_msg(exception)
 
         # the invalid payloads' availability window needs to be populated with the negative values as well
         self.settle_pending_offence(payload_sender, invalid=False)
+        return OK_CODE, "deliver_tx succeeded"
+
+    def deliver_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
+        """Handle the 'deliver_tx' request."""
+        code, info = self._deliver_tx(message.tx)
+        if code != OK_CODE:
+            return self._deliver_tx_failed(message, dialogue, info)
 
         # return deliver_tx success
         reply = dialogue.reply(
@@ -260,7 +458,7 @@ class ABCIRoundHandler(ABCIHandler):
             code=OK_CODE,
             data=b"",
             log="",
-            info="deliver_tx succeeded",
+            info=info,
             gas_wanted=0,
             gas_used=0,
             events=Events([]),
@@ -274,6 +472,35 @@ class ABCIRoundHandler(ABCIHandler):
         cast(SharedState, self.context.state).round_sequence.end_block()
         return super().end_block(message, dialogue)
 
+    def _commit(self) -> Tuple[bytes, int]:
+        """Commit the block, returning the app hash and the retain height of the response."""
+        state = cast(SharedState, self.context.state)
+        round_sequence, metrics = state.round_sequence, state.metrics
+        round_height = round_sequence.current_round_height
+        start = time.perf_counter()
+        try:
+            round_sequence.commit()
+        except AddBlockError as exception:
+            self._log_exception(exception)
+            raise exception
+        committed = time.perf_counter()
+        # The Merkle root hash of the application state.
+        data = round_sequence.root_hash
+        metrics.commit_duration.observe(committed - start)
+        metrics.app_hash_duration.observe(time.perf_counter() - committed)
+        # Blocks below this height may be removed. Defaults to 0 (retain all), unless the service opts in to pruning.
+        retain_height = round_sequence.retain_height
+
+        metrics.height.set(round_sequence.height)
+        if round_sequence.current_round_height != round_height:
+            metrics.round_transitions.inc(str(round_sequence.current_round_id))
+        abci_app = round_sequence.abci_app
+        metrics.pending_timeouts.set(abci_app.timeout_stats["size"])
+        metrics.db_values.set(abci_app.synchronized_data.db.size)
+        abci_dialogues = cast(AbciDialogues, self.context.abci_dialogues)
+        metrics.live_dialogues.set(abci_dialogues.n_live_dialogues)
+        return data, retain_height
+
     def commit(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
         """
         Handle the 'commit' request.
@@ -290,15 +517,7 @@ class ABCIRoundHandler(ABCIHandler):
         :param dialogue: the ABCI dialogue.
         :return: the response.
         """
-        try:
-            cast(SharedState, self.context.state).round_sequence.commit()
-        except AddBlockError as exception:
-            self._log_exception(exception)
-            raise exception
-        # The Merkle root hash of the application state.
-        data = self.context.state.round_sequence.root_hash
-        # Blocks below this height may be removed. Defaults to 0 (retain all).
-        retain_height = 0
+        data, retain_height = self._commit()
         # return commit success
         reply = dialogue.reply(
             performative=AbciMessage.Performative.RESPONSE_COMMIT,
@@ -308,6 +527,128 @@ class ABCIRoundHandler(ABCIHandler):
         )
         return cast(AbciMessage, reply)
 
+    def list_snapshots(
+        self, message: AbciMessage, dialogue: AbciDialogue
+    ) -> AbciMessage:
+        """Handle the 'list_snapshots' request, offering the persisted snapshots to the nodes which state sync."""
+        store = cast(SharedState, self.context.state).round_sequence.snapshot_store
+        snapshots = []
+        for chunks in (
+            [] if store is None else store.all_chunks(self.snapshot_chunk_size)
+        ):
+            snapshots.append(
+                Snapshot(
+                    chunks.height,
+                    SNAPSHOT_FORMAT,
+                    len(chunks.chunks),
+                    chunks.hash,
+                    chunks.metadata,
+                )
+            )
+        reply = dialogue.reply(
+            performative=AbciMessage.Performative.RESPONSE_LIST_SNAPSHOTS,
+            target_message=message,
+            snapshots=SnapShots(snapshots),
+        )
+        return cast(AbciMessage, reply)
+
+    def offer_snapshot(
+        self, message: AbciMessage, dialogue: AbciDialogue
+    ) -> AbciMessage:
+        """Handle the 'offer_snapshot' request, accepting the snapshots of the supported format."""
+        snapshot = message.snapshot
+        result = ResultType.ACCEPT
+        if snapshot.format_ != SNAPSHOT_FORMAT:
+            result = ResultType.REJECT_FORMAT
+        else:
+            try:
+                self._snapshot_assembler = SnapshotAssembler(
+                    snapshot.height, snapshot.chunks, snapshot.hash_, snapshot.metadata
+                )
+                self._offered_app_hash = message.app_hash
+            except SnapshotError as exception:
+                self._log_exception(exception)
+                result = ResultType.REJECT
+
+        reply = dialogue.reply(
+            performative=AbciMessage.Performative.RESPONSE_OFFER_SNAPSHOT,
+            target_message=message,
+            result=Result(result),
+        )
+        return cast(AbciMessage, reply)
+
+    def load_snapshot_chunk(
+        self, message: AbciMessage, dialogue: AbciDialogue
+    ) -> AbciMessage:
+        """Handle the 'load_snapshot_chunk' request, for a snapshot offered by this node."""
+        chunk = b""
+        store = cast(SharedState, self.context.state).round_sequence.snapshot_store
+        snapshot = (
+            store.get_chunks(message.height, self.snapshot_chunk_size)
+            if store is not None and message.format == SNAPSHOT_FORMAT
+            else None
+        )
+        if snapshot is not None and 0 <= message.chunk_index < len(snapshot.chunks):
+            chunk = snapshot.chunks[message.chunk_index]
+
+        reply = dialogue.reply(
+            performative=AbciMessage.Performative.RESPONSE_LOAD_SNAPSHOT_CHUNK,
+            target_message=message,
+            chunk=chunk,
+        )
+        return cast(AbciMessage, reply)
+
+    def apply_snapshot_chunk(
+        self, message: AbciMessage, dialogue: AbciDialogue
+    ) -> AbciMessage:
+        """Handle the 'apply_snapshot_chunk' request, restoring the app once all the chunks have been received."""
+        refetch_chunks: Tuple[int, ...] = ()
+        reject_senders: Tuple[str, ...] = ()
+        assembler = self._snapshot_assembler
+        if assembler is None:
+            result = ApplySnapshotChunkResult.ABORT
+        elif not assembler.add_chunk(message.index, message.chunk):
+            result = ApplySnapshotChunkResult.RETRY
+            refetch_chunks = (message.index,)
+            reject_senders = (message.chunk_sender,)
+        elif not assembler.is_complete:
+            result = ApplySnapshotChunkResult.ACCEPT
+        else:
+            self._snapshot_assembler = None
+            result = self._restore_snapshot(assembler)
+
+        reply = dialogue.reply(
+            performative=AbciMessage.Performative.RESPONSE_APPLY_SNAPSHOT_CHUNK,
+            target_message=message,
+            result=result.to_result(),
+            refetch_chunks=refetch_chunks,
+            reject_senders=reject_senders,
+        )
+        return cast(AbciMessage, reply)
+
+    def _restore_snapshot(
+        self, assembler: SnapshotAssembler
+    ) -> ApplySnapshotChunkResult:
+        """Restore the app from a fully received snapshot."""
+        round_sequence = cast(SharedState, self.context.state).round_sequence
+        try:
+            snapshot = assembler.assemble()
+            if snapshot.app_hash != self._offered_app_hash.hex():
+                raise SnapshotError(
+                    f"The snapshot at height {snapshot.height} does not result in the verified app hash."
+                )
+            round_sequence.restore(snapshot)
+        except SnapshotError as exception:
+            self._log_exception(exception)
+            return ApplySnapshotChunkResult.REJECT_SNAPSHOT
+
+        if round_sequence.snapshot_store is not None:
+            round_sequence.snapshot_store.save(snapshot)
+        self.context.logger.info(
+            f"State synced to the snapshot at height {snapshot.height}."
+        )
+        return ApplySnapshotChunkResult.ACCEPT
+
     @classmethod
     def _check_tx_failed(
         cls, message: AbciMessage, dialogue: AbciDialogue, info: str = ""
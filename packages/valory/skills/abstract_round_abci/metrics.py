@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the runtime metrics of the ABCI app, exposed in the Prometheus text format for a local scrape."""
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+METRICS_PATH = "/metrics"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# the upper bounds, in seconds, of the buckets of the latency histograms
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+def _escape(label_value: str) -> str:
+    """Escape a label value, as per the Prometheus text format."""
+    return label_value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format the labels of a sample, e.g., `{type="commit"}`."""
+    if not names:
+        return ""
+    labels = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + labels + "}"
+
+
+class Metric:
+    """
+    A metric, whose samples are identified by the values of its labels.
+
+    The samples are updated on the agent's thread and rendered on the thread of the metrics server,
+    so all the accesses to them are guarded by a lock.
+    """
+
+    type_ = "untyped"
+
+    def __init__(self, name: str, help_: str, label_names: Sequence[str] = ()):
+        """Initialize the metric.
+
+        :param name: the name of the metric.
+        :param help_: the description of the metric.
+        :param label_names: the names of the labels of the metric.
+        """
+        self.name = name
+        self.help = help_
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _check_labels(self, label_values: Tuple[str, ...]) -> None:
+        """Check that a value is given for each label of the metric."""
+        if len(label_values) != len(self.label_names):
+            raise ValueError(
+                f"Metric {self.name!r} expects values for the labels {self.label_names}, got {label_values}."
+            )
+
+    def samples(self) -> List[str]:
+        """Get the samples of the metric, in the Prometheus text format."""
+        raise NotImplementedError  # pragma: nocover
+
+    def render(self) -> List[str]:
+        """Render the metric, in the Prometheus text format."""
+        with self._lock:
+            samples = self.samples()
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type_}",
+            *samples,
+        ]
+
+
+class Counter(Metric):
+    """A metric which only goes up, e.g., the number of handled requests."""
+
+    type_ = "counter"
+
+    def __init__(self, name: str, help_: str, label_names: Sequence[str] = ()):
+        """Initialize the counter."""
+        super().__init__(name, help_, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        """Increment the counter of the given labels."""
+        self._check_labels(label_values)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        """Get the value of the counter of the given labels."""
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def samples(self) -> List[str]:
+        """Get the samples of the counter."""
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Metric):
+    """A metric which can go up and down, e.g., the size of a queue."""
+
+    type_ = "gauge"
+
+    def __init__(self, name: str, help_: str, label_names: Sequence[str] = ()):
+        """Initialize the gauge."""
+        super().__init__(name, help_, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        """Set the value of the gauge of the given labels."""
+        self._check_labels(label_values)
+        with self._lock:
+            self._values[label_values] = value
+
+    def get(self, *label_values: str) -> Optional[float]:
+        """Get the value of the gauge of the given labels, if it has been set."""
+        with self._lock:
+            return self._values.get(label_values)
+
+    def samples(self) -> List[str]:
+        """Get the samples of the gauge."""
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class _HistogramSample:  # pylint: disable=too-few-public-methods
+    """The observations of a histogram for some given labels."""
+
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, n_buckets: int) -> None:
+        """Initialize the sample."""
+        self.bucket_counts = [0] * n_buckets
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """A metric which counts observations in buckets, e.g., the latencies of the requests."""
+
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        """Initialize the histogram.
+
+        :param name: the name of the histogram.
+        :param help_: the description of the histogram.
+        :param label_names: the names of the labels of the histogram.
+        :param buckets: the increasing upper bounds of the buckets, without the implicit `+Inf` one.
+        """
+        super().__init__(name, help_, label_names)
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError(
+                f"The buckets of histogram {name!r} must be increasing, got {buckets}."
+            )
+        self.buckets = tuple(buckets)
+        self._samples: Dict[Tuple[str, ...], _HistogramSample] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Observe a value, for the given labels."""
+        self._check_labels(label_values)
+        # the observation is counted in its own bucket only, the buckets are accumulated when rendered
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._samples.get(label_values)
+            if sample is None:
+                sample = self._samples[label_values] = _HistogramSample(
+                    len(self.buckets) + 1
+                )
+            sample.bucket_counts[index] += 1
+            sample.count += 1
+            sample.sum += value
+
+    def get_count(self, *label_values: str) -> int:
+        """Get the number of the observations for the given labels."""
+        with self._lock:
+            sample = self._samples.get(label_values)
+            return 0 if sample is None else sample.count
+
+    def samples(self) -> List[str]:
+        """Get the samples of the histogram."""
+        lines = []
+        bucket_names = (*self.label_names, "le")
+        upper_bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, sample in sorted(self._samples.items()):
+            cumulative_count = 0
+            for upper_bound, count in zip(upper_bounds, sample.bucket_counts):
+                cumulative_count += count
+                bucket_labels = _format_labels(bucket_names, (*labels, upper_bound))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative_count}")
+            formatted_labels = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{formatted_labels} {sample.sum}")
+            lines.append(f"{self.name}_count{formatted_labels} {sample.count}")
+        return lines
+
+
+MetricType = TypeVar("MetricType", bound=Metric)
+
+
+class MetricsRegistry:
+    """A registry of metrics, rendered together in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: MetricType) -> MetricType:
+        """Register a metric.
+
+        :param metric: the metric.
+        :return: the registered metric.
+        :raises ValueError: if a metric with the same name has already been registered.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all the registered metrics, in the Prometheus text format."""
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+class AbciAppMetrics(MetricsRegistry):  # pylint: disable=too-many-instance-attributes
+    """The runtime metrics of an ABCI app."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        super().__init__()
+        self.abci_requests = self.register(
+            Counter(
+                "abci_requests_total",
+                "The number of the ABCI requests handled, by type.",
+                ("type",),
+            )
+        )
+        self.abci_request_duration = self.register(
+            Histogram(
+                "abci_request_duration_seconds",
+                "The time taken to handle the ABCI requests, by type.",
+                ("type",),
+            )
+        )
+        self.commit_duration = self.register(
+            Histogram(
+                "abci_commit_duration_seconds",
+                "The time taken to commit a block to the round sequence.",
+            )
+        )
+        self.app_hash_duration = self.register(
+            Histogram(
+                "abci_app_hash_duration_seconds",
+                "The time taken to compute the app hash of a committed block.",
+            )
+        )
+        self.height = self.register(
+            Gauge("round_sequence_height", "The height of the last committed block.")
+        )
+        self.round_transitions = self.register(
+            Counter(
+                "round_sequence_round_transitions_total",
+                "The number of the round transitions, by the round which was entered.",
+                ("round",),
+            )
+        )
+        self.pending_timeouts = self.register(
+            Gauge(
+                "abci_app_pending_timeouts",
+                "The number of the timeouts of the ABCI app which are pending.",
+            )
+        )
+        self.db_values = self.register(
+            Gauge(
+                "abci_app_db_values",
+                "The number of the values stored in the database of the ABCI app, across all the periods.",
+            )
+        )
+        self.live_dialogues = self.register(
+            Gauge(
+                "abci_live_dialogues",
+                "The number of the ABCI dialogues which are waiting for a response.",
+            )
+        )
+        self.behaviour_tick_duration = self.register(
+            Histogram(
+                "behaviour_tick_duration_seconds",
+                "The time taken by a tick of the round behaviour.",
+            )
+        )
+        self.outstanding_requests = self.register(
+            Gauge(
+                "behaviour_outstanding_requests",
+                "The number of the requests of the behaviours which are waiting for a response.",
+            )
+        )
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the metrics of a registry on `GET /metrics`."""
+
+    registry: MetricsRegistry
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Handle a GET request."""
+        if self.path.split("?", 1)[0] != METRICS_PATH:
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        """Do not log the scrapes."""
+
+
+class MetricsServer:
+    """An HTTP server exposing the metrics of a registry, running in a daemon thread."""
+
+    def __init__(
+        self, registry: MetricsRegistry, port: int, host: str = DEFAULT_METRICS_HOST
+    ) -> None:
+        """Initialize the server.
+
+        :param registry: the registry of the metrics to expose.
+        :param port: the port to listen on, `0` for any free port.
+        :param host: the address to listen on, the loopback interface by default so that the metrics are only scraped locally.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the server is running."""
+        return self._server is not None
+
+    def start(self) -> None:
+        """Start serving the metrics."""
+        if self._server is not None:
+            return
+        handler_cls = type(
+            "MetricsRequestHandler",
+            (_MetricsRequestHandler,),
+            {"registry": self.registry},
+        )
+        self._server = ThreadingHTTPServer((self.host, self.port), handler_cls)
+        self._server.daemon_threads = True
+        # the actual port, if any free port was requested
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving the metrics."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -23,8 +23,10 @@ import inspect
 import json
 from abc import ABC, ABCMeta
 from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from multiprocessing import get_context
 from pathlib import Path
 from time import time
 from typing import (
@@ -41,6 +43,7 @@ from typing import (
 )
 
 from aea.configurations.data_types import PublicId
+from aea.crypto.registries import make_ledger_api_cls
 from aea.exceptions import enforce
 from aea.skills.base import Model, SkillContext
 
@@ -48,6 +51,7 @@ from packages.valory.protocols.http.message import HttpMessage
 from packages.valory.skills.abstract_round_abci.base import (
     AbciApp,
     AbciAppDB,
+    AppHashMode,
     BaseSynchronizedData,
     OffenceStatus,
     ROUND_COUNT_DEFAULT,
@@ -55,6 +59,17 @@ from packages.valory.skills.abstract_round_abci.base import (
     VALUE_NOT_PROVIDED,
     get_name,
 )
+from packages.valory.skills.abstract_round_abci.metrics import (
+    AbciAppMetrics,
+    DEFAULT_METRICS_HOST,
+    METRICS_PATH,
+    MetricsServer,
+)
+from packages.valory.skills.abstract_round_abci.persistence import (
+    AppSnapshot,
+    SnapshotError,
+    SnapshotStore,
+)
 from packages.valory.skills.abstract_round_abci.utils import (
     check,
     check_type,
@@ -318,6 +333,81 @@ class BaseParams(
             "serious_slash_unit_amount", kwargs, int
         )
         self.setup_params: Dict[str, Any] = self._ensure("setup", kwargs, dict)
+        # the app hash mode is optional, as it is only meant to be changed by services opting in to the Merkle mode
+        self.app_hash_mode: AppHashMode = AppHashMode(
+            kwargs.pop("app_hash_mode", AppHashMode.LEGACY.value)
+        )
+        # storing frozen values in the db is optional, as it requires the behaviours to not modify the retrieved values
+        self.freeze_db_values: bool = kwargs.pop("freeze_db_values", False)
+        enforce(
+            isinstance(self.freeze_db_values, bool),
+            f"'freeze_db_values' must be a {bool}, but type {type(self.freeze_db_values)} was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # the block retention is optional, as all the blocks are kept in memory until a reset by default
+        self.block_retention: Optional[int] = kwargs.pop("block_retention", None)
+        enforce(
+            self.block_retention is None
+            or isinstance(self.block_retention, int)
+            and self.block_retention > 0,
+            f"'block_retention' must be a positive {int}, but `{self.block_retention}` was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # letting tendermint prune the blocks which are not retained by the agent is optional,
+        # as the pruned blocks cannot be replayed after a hard reset
+        self.prune_tendermint_blocks: bool = kwargs.pop(
+            "prune_tendermint_blocks", False
+        )
+        enforce(
+            isinstance(self.prune_tendermint_blocks, bool),
+            f"'prune_tendermint_blocks' must be a {bool}, but type {type(self.prune_tendermint_blocks)} was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # the compact encoding of the transactions is optional, as the agents of older versions cannot decode it
+        self.compact_transactions: bool = kwargs.pop("compact_transactions", False)
+        enforce(
+            isinstance(self.compact_transactions, bool),
+            f"'compact_transactions' must be a {bool}, but type {type(self.compact_transactions)} was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # verifying the transactions of a block on worker processes is optional, as it only pays off with many agents
+        self.tx_verification_workers: Optional[int] = kwargs.pop(
+            "tx_verification_workers", None
+        )
+        enforce(
+            self.tx_verification_workers is None
+            or isinstance(self.tx_verification_workers, int)
+            and self.tx_verification_workers > 0,
+            f"'tx_verification_workers' must be a positive {int}, but `{self.tx_verification_workers}` was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+
+        # persisting snapshots of the app's state is optional, as a restarted agent can always replay the chain
+        self.db_snapshots_path: Optional[str] = kwargs.pop("db_snapshots_path", None)
+        enforce(
+            self.db_snapshots_path is None or isinstance(self.db_snapshots_path, str),
+            f"'db_snapshots_path' must be a {str}, but type {type(self.db_snapshots_path)} was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # the snapshots are also offered to the nodes which state sync, so they may be taken less often
+        self.db_snapshots_interval: int = kwargs.pop("db_snapshots_interval", 1)
+        enforce(
+            isinstance(self.db_snapshots_interval, int)
+            and self.db_snapshots_interval > 0,
+            f"'db_snapshots_interval' must be a positive {int}, but `{self.db_snapshots_interval}` was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # serving the metrics is optional, as they are only scraped when the agent is monitored
+        self.metrics_port: Optional[int] = kwargs.pop("metrics_port", None)
+        enforce(
+            self.metrics_port is None
+            or isinstance(self.metrics_port, int)
+            and 0 <= self.metrics_port <= 65535,
+            f"'metrics_port' must be a valid port, but `{self.metrics_port}` was found in "
+            f"`models.params.args` of `skill.yaml` of `{kwargs['skill_context'].skill_id}`",
+        )
+        # the metrics are only exposed on the loopback interface by default, for a local scrape
+        self.metrics_host: str = kwargs.pop("metrics_host", DEFAULT_METRICS_HOST)
 
         # we sanitize for null values as these are just kept for schema definitions
         skill_id = kwargs["skill_context"].skill_id
@@ -431,6 +521,8 @@ class SharedState(Model, ABC, metaclass=_MetaSharedState):  # type: ignore
         """Initialize the state."""
         self.abci_app_cls._is_abstract = skill_context.is_abstract_component
         self._round_sequence: Optional[RoundSequence] = None
+        # the snapshot restored on setup, until the Tendermint node confirms it by sending a block
+        self._unconfirmed_snapshot: Optional[AppSnapshot] = None
         # a mapping of the agents' addresses to their initial Tendermint configuration, to be retrieved via ACN
         self.initial_tm_configs: Dict[str, Optional[Dict[str, Any]]] = {}
         # a mapping of the other agents' addresses to ACN deliverables
@@ -438,6 +530,12 @@ class SharedState(Model, ABC, metaclass=_MetaSharedState):  # type: ignore
         self.tm_recovery_params: TendermintRecoveryParams = TendermintRecoveryParams(
             self.abci_app_cls.initial_round_cls.auto_round_id()
         )
+        # the runtime metrics of the app, which are served if a metrics port is configured
+        self.metrics = AbciAppMetrics()
+        self._metrics_server: Optional[MetricsServer] = None
+        self.tx_verification_executor: Optional[Executor] = None
+        # the tasks which spawn the workers, to be cancelled on teardown if they have not run yet
+        self._tx_verification_warmups: List[Future] = []
         kwargs["skill_context"] = skill_context
         super().__init__(*args, **kwargs)
 
@@ -494,21 +592,148 @@ class SharedState(Model, ABC, metaclass=_MetaSharedState):  # type: ignore
 
     def setup(self) -> None:
         """Set up the model."""
-        self._round_sequence = RoundSequence(self.context, self.abci_app_cls)
-        setup_params = cast(BaseParams, self.context.params).setup_params
+        params = cast(BaseParams, self.context.params)
+        snapshot_store = (
+            None
+            if params.db_snapshots_path is None
+            else SnapshotStore(params.db_snapshots_path)
+        )
+        self._setup_round_sequence(snapshot_store)
+        if snapshot_store is not None:
+            self._restore_latest_snapshot(snapshot_store)
+        if not self.context.is_abstract_component:
+            self.initial_tm_configs = dict.fromkeys(
+                self.synchronized_data.all_participants
+            )
+        if params.metrics_port is not None:
+            self._start_metrics_server(params.metrics_port, params.metrics_host)
+        if params.tx_verification_workers is not None:
+            self._start_tx_verification_workers(params.tx_verification_workers)
+
+    def _setup_round_sequence(self, snapshot_store: Optional[SnapshotStore]) -> None:
+        """Set up the round sequence at the start of the app."""
+        params = cast(BaseParams, self.context.params)
+        self._round_sequence = RoundSequence(
+            self.context,
+            self.abci_app_cls,
+            max_blocks=params.block_retention,
+            prune_tendermint_blocks=params.prune_tendermint_blocks,
+            snapshot_store=snapshot_store,
+            snapshot_interval=params.db_snapshots_interval,
+        )
         self.round_sequence.setup(
             BaseSynchronizedData(
                 AbciAppDB(
-                    setup_data=AbciAppDB.data_to_lists(setup_params),
+                    setup_data=AbciAppDB.data_to_lists(params.setup_params),
                     cross_period_persisted_keys=self.abci_app_cls.cross_period_persisted_keys,
+                    hash_mode=params.app_hash_mode,
+                    freeze_values=params.freeze_db_values,
                 )
             ),
             self.context.logger,
         )
-        if not self.context.is_abstract_component:
-            self.initial_tm_configs = dict.fromkeys(
-                self.synchronized_data.all_participants
+
+    def _start_tx_verification_workers(self, n_workers: int) -> None:
+        """Start the worker processes which verify the transactions of the blocks in batches."""
+        # the workers are spawned, as forking the threads of the agent is unsafe,
+        # and they load the ledger api once, when they start
+        executor = ProcessPoolExecutor(
+            n_workers,
+            mp_context=get_context("spawn"),
+            initializer=make_ledger_api_cls,
+            initargs=(self.context.default_ledger_id,),
+        )
+        # the workers are spawned on demand, so a task is submitted to each one, to not delay the first block
+        self._tx_verification_warmups = [executor.submit(int) for _ in range(n_workers)]
+        self.tx_verification_executor = executor
+
+    def _start_metrics_server(self, port: int, host: str) -> None:
+        """Start serving the metrics, for a local scrape."""
+        server = MetricsServer(self.metrics, port, host)
+        try:
+            server.start()
+        except OSError as exc:
+            self.context.logger.warning(
+                f"Could not serve the metrics on {host}:{port}: {exc}"
+            )
+            return
+        self._metrics_server = server
+        self.context.logger.info(
+            f"Serving the metrics on http://{host}:{server.port}{METRICS_PATH}"
+        )
+
+    def teardown(self) -> None:
+        """Tear down the model, stopping the metrics server and the workers verifying the transactions."""
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
+        if self.tx_verification_executor is not None:
+            # the batches are verified synchronously, so only the warm-up tasks may still be pending,
+            # and they are cancelled here, as `shutdown(cancel_futures=True)` requires python 3.9
+            for future in self._tx_verification_warmups:
+                future.cancel()
+            self._tx_verification_warmups = []
+            self.tx_verification_executor.shutdown(wait=False)
+            self.tx_verification_executor = None
+        super().teardown()
+
+    def _restore_latest_snapshot(self, snapshot_store: SnapshotStore) -> None:
+        """Resume from the latest persisted snapshot, if there is a valid one."""
+        try:
+            snapshot = snapshot_store.latest()
+            if snapshot is None:
+                return
+            self.round_sequence.restore(snapshot)
+        except SnapshotError as exc:
+            self.context.logger.warning(
+                f"Discarding the persisted snapshots, as they cannot be restored: {exc}"
+            )
+            snapshot_store.clear()
+            return
+        self._unconfirmed_snapshot = snapshot
+        self.context.logger.info(
+            f"Resumed from the snapshot at height {snapshot.height}, "
+            f"in round {snapshot.current_round_id!r}."
+        )
+
+    def check_restored_snapshot(self, node_height: int) -> None:
+        """
+        Check the snapshot restored on setup against the latest block height reported by the Tendermint node.
+
+        If the node holds the blocks up to the snapshot, the snapshot is confirmed.
+        Otherwise, e.g., if the data of the node have been wiped while the snapshots have survived,
+        the node cannot resume from the snapshot, so the snapshots are discarded
+        and the app starts over from its initial state, to replay the chain from the genesis.
+        That is impossible if the node prunes its blocks, so the snapshot is kept in that case.
+
+        :param node_height: the latest block height reported by the Tendermint node.
+        """
+        snapshot = self._unconfirmed_snapshot
+        if snapshot is None or node_height >= snapshot.height:
+            self.confirm_restored_snapshot()
+            return
+        if cast(BaseParams, self.context.params).prune_tendermint_blocks:
+            self.context.logger.warning(
+                f"Keeping the snapshot at height {snapshot.height}, "
+                f"although the Tendermint node is at height {node_height}, "
+                "as it prunes its blocks, so the chain cannot be replayed from the genesis."
             )
+            return
+
+        self.confirm_restored_snapshot()
+        self.context.logger.warning(
+            f"Discarding the snapshot at height {snapshot.height}, "
+            f"as the Tendermint node is behind it, at height {node_height}. "
+            "Starting over from the initial state, to replay the chain from the genesis."
+        )
+        snapshot_store = self.round_sequence.snapshot_store
+        if snapshot_store is not None:
+            snapshot_store.clear()
+        self._setup_round_sequence(snapshot_store)
+
+    def confirm_restored_snapshot(self) -> None:
+        """Confirm the snapshot restored on setup, once the Tendermint node has accepted it."""
+        self._unconfirmed_snapshot = None
 
     @property
     def round_sequence(self) -> RoundSequence:
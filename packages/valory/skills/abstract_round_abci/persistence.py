@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the snapshots of the state of the ABCI app, which allow an agent to resume after a restart or to state sync."""
+
+import datetime
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple, cast
+
+
+DEFAULT_SNAPSHOTS_TO_KEEP = 2
+# the format of the snapshots offered to the other nodes for state sync
+SNAPSHOT_FORMAT = 1
+DEFAULT_SNAPSHOT_CHUNK_SIZE = 2**20
+CHUNK_HASH_SIZE = hashlib.sha256().digest_size
+# how far ahead of the local clock the timestamp of a snapshot is tolerated to be, as the block times are BFT times
+MAX_SNAPSHOT_CLOCK_DRIFT = datetime.timedelta(minutes=1)
+
+
+class SnapshotError(Exception):
+    """Error raised when a snapshot cannot be loaded or restored."""
+
+
+@dataclass(frozen=True)
+class AppSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    A snapshot of the state of the ABCI app, taken when committing a block which ended a round.
+
+    At that point, the new round has just been scheduled and has not received any payloads yet,
+    so the state of the app is fully described by the database and the position in the FSM.
+
+    Only the database is covered by the app hash, which a node that state syncs verifies against the light client.
+    The rest of the fields are sent by the node offering the snapshot, so they are checked when deserialized,
+    and against the restored database and the app when restored (see `RoundSequence.restore`).
+    """
+
+    height: int
+    app_hash: str
+    db: str
+    round_count: int
+    current_round_id: str
+    last_round_id: Optional[str]
+    current_round_height: int
+    timestamp: str
+    tm_height: Optional[int] = None
+    slashing_enabled: bool = False
+    validator_to_agent: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def block_timestamp(self) -> datetime.datetime:
+        """Get the timestamp of the block at which the snapshot was taken, as a naive local time like the blocks'."""
+        timestamp = datetime.datetime.fromisoformat(self.timestamp)
+        if timestamp.tzinfo is None:
+            return timestamp
+        # the snapshot may have been taken by a node in another time zone
+        return timestamp.astimezone().replace(tzinfo=None)
+
+    def serialize(self) -> str:
+        """Serialize the snapshot to a string."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+    def to_chunks(
+        self, chunk_size: int = DEFAULT_SNAPSHOT_CHUNK_SIZE
+    ) -> "SnapshotChunks":
+        """Split the serialized snapshot into chunks, to be sent to the other nodes for state sync."""
+        serialized = self.serialize().encode()
+        chunks = [
+            serialized[start : start + chunk_size]
+            for start in range(0, len(serialized), chunk_size)
+        ]
+        return SnapshotChunks(self.height, chunks, hashlib.sha256(serialized).digest())
+
+    @classmethod
+    def deserialize(cls, serialized: str) -> "AppSnapshot":
+        """Deserialize a snapshot from a string.
+
+        :param serialized: the serialized snapshot.
+        :return: the snapshot.
+        :raises SnapshotError: if the snapshot cannot be deserialized.
+        """
+        try:
+            snapshot = cls(**json.loads(serialized))
+        except (ValueError, TypeError) as exc:
+            raise SnapshotError(f"Could not deserialize snapshot: {exc}") from exc
+        snapshot._check()
+        return snapshot
+
+    def _check(self) -> None:
+        """Check the fields of a deserialized snapshot, which may have been sent by another node."""
+        for name, expected_type in _FIELD_TYPES.items():
+            value = getattr(self, name)
+            if not isinstance(value, expected_type) or (
+                isinstance(value, bool) and bool not in expected_type
+            ):
+                raise SnapshotError(
+                    f"Could not deserialize snapshot: the field {name!r} has an invalid value {value!r}."
+                )
+        if self.height < 0 or self.current_round_height < 0:
+            raise SnapshotError(
+                f"Could not deserialize snapshot: the heights cannot be negative, "
+                f"got {self.height} and {self.current_round_height}."
+            )
+        if not all(
+            isinstance(validator, str) and isinstance(agent, str)
+            for validator, agent in self.validator_to_agent.items()
+        ):
+            raise SnapshotError(
+                "Could not deserialize snapshot: the validators must be mapped to agent addresses, "
+                f"got {self.validator_to_agent}."
+            )
+        if self.slashing_enabled and not self.validator_to_agent:
+            raise SnapshotError(
+                "Could not deserialize snapshot: slashing cannot be enabled without a mapping of the validators."
+            )
+        try:
+            timestamp = self.block_timestamp
+        except ValueError as exc:
+            raise SnapshotError(f"Could not deserialize snapshot: {exc}") from exc
+        if timestamp > datetime.datetime.now() + MAX_SNAPSHOT_CLOCK_DRIFT:
+            raise SnapshotError(
+                f"Could not deserialize snapshot: its timestamp {self.timestamp} is in the future."
+            )
+
+
+# the types of the fields of a snapshot, which are checked when it is deserialized
+_FIELD_TYPES: Dict[str, Tuple[type, ...]] = {
+    "height": (int,),
+    "app_hash": (str,),
+    "db": (str,),
+    "round_count": (int,),
+    "current_round_id": (str,),
+    "last_round_id": (str, type(None)),
+    "current_round_height": (int,),
+    "timestamp": (str,),
+    "tm_height": (int, type(None)),
+    "slashing_enabled": (bool,),
+    "validator_to_agent": (dict,),
+}
+
+
+class SnapshotChunks:
+    """
+    A snapshot split into chunks, as exchanged between the nodes for state sync.
+
+    The metadata contain the hash of each chunk, so that every chunk can be verified as soon as it arrives.
+    """
+
+    def __init__(self, height: int, chunks: List[bytes], hash_: bytes) -> None:
+        """Initialize the chunks.
+
+        :param height: the height of the snapshot.
+        :param chunks: the chunks of the serialized snapshot.
+        :param hash_: the hash of the serialized snapshot.
+        """
+        self.height = height
+        self.chunks = chunks
+        self.hash = hash_
+
+    @property
+    def metadata(self) -> bytes:
+        """Get the metadata of the snapshot, i.e., the concatenated hashes of its chunks."""
+        return b"".join(hashlib.sha256(chunk).digest() for chunk in self.chunks)
+
+
+class SnapshotAssembler:
+    """Assemble a snapshot offered by another node from its chunks."""
+
+    def __init__(
+        self, height: int, n_chunks: int, hash_: bytes, metadata: bytes
+    ) -> None:
+        """Initialize the assembler.
+
+        :param height: the height of the offered snapshot.
+        :param n_chunks: the number of chunks of the offered snapshot.
+        :param hash_: the hash of the serialized snapshot.
+        :param metadata: the concatenated hashes of the chunks.
+        :raises SnapshotError: if the metadata do not match the number of chunks.
+        """
+        if n_chunks < 1 or len(metadata) != n_chunks * CHUNK_HASH_SIZE:
+            raise SnapshotError(
+                f"The metadata of the snapshot at height {height} do not match its {n_chunks} chunks."
+            )
+        self.height = height
+        self._hash = hash_
+        self._chunk_hashes = [
+            metadata[start : start + CHUNK_HASH_SIZE]
+            for start in range(0, len(metadata), CHUNK_HASH_SIZE)
+        ]
+        self._chunks: List[Optional[bytes]] = [None] * n_chunks
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether all the chunks have been received."""
+        return all(chunk is not None for chunk in self._chunks)
+
+    def add_chunk(self, index: int, chunk: bytes) -> bool:
+        """Add a chunk, if it matches its hash in the metadata.
+
+        :param index: the index of the chunk.
+        :param chunk: the chunk.
+        :return: whether the chunk was valid.
+        """
+        if not 0 <= index < len(self._chunks):
+            return False
+        if hashlib.sha256(chunk).digest() != self._chunk_hashes[index]:
+            return False
+        self._chunks[index] = chunk
+        return True
+
+    def assemble(self) -> AppSnapshot:
+        """Assemble the snapshot from all its chunks.
+
+        :return: the snapshot.
+        :raises SnapshotError: if chunks are missing, or the snapshot does not match its hash.
+        """
+        if not self.is_complete:
+            raise SnapshotError(
+                f"Cannot assemble the snapshot at height {self.height} before receiving all its chunks."
+            )
+        serialized = b"".join(cast(List[bytes], self._chunks))
+        if hashlib.sha256(serialized).digest() != self._hash:
+            raise SnapshotError(
+                f"The snapshot at height {self.height} does not match its hash."
+            )
+        snapshot = AppSnapshot.deserialize(serialized.decode(errors="replace"))
+        if snapshot.height != self.height:
+            raise SnapshotError(
+                f"The snapshot offered at height {self.height} was taken at height {snapshot.height}."
+            )
+        return snapshot
+
+
+class SnapshotStore:
+    """
+    A store of the snapshots of the state of the ABCI app, kept in an SQLite database.
+
+    Only the latest snapshots are kept, as an agent only ever resumes from the last committed height.
+    """
+
+    def __init__(
+        self, path: str, snapshots_to_keep: int = DEFAULT_SNAPSHOTS_TO_KEEP
+    ) -> None:
+        """Initialize the store.
+
+        :param path: the path to the database file, `:memory:` for a database which is not persisted.
+        :param snapshots_to_keep: the number of latest snapshots to keep.
+        """
+        if snapshots_to_keep < 1:
+            raise ValueError(
+                f"At least one snapshot must be kept, got {snapshots_to_keep}."
+            )
+        self._snapshots_to_keep = snapshots_to_keep
+        # the snapshots which have been split into chunks, by height and chunk size
+        self._chunks: Dict[Tuple[int, int], SnapshotChunks] = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots (height INTEGER PRIMARY KEY, snapshot TEXT NOT NULL)"
+            )
+
+    def save(self, snapshot: AppSnapshot) -> None:
+        """Save a snapshot, dropping the older ones which do not need to be kept."""
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO snapshots (height, snapshot) VALUES (?, ?)",
+                (snapshot.height, snapshot.serialize()),
+            )
+            self._connection.execute(
+                "DELETE FROM snapshots WHERE height NOT IN "
+                "(SELECT height FROM snapshots ORDER BY height DESC LIMIT ?)",
+                (self._snapshots_to_keep,),
+            )
+        kept = set(self.heights())
+        self._chunks = {
+            key: chunks
+            for key, chunks in self._chunks.items()
+            if key[0] in kept and key[0] != snapshot.height
+        }
+
+    def get(self, height: int) -> Optional[AppSnapshot]:
+        """Get the snapshot at the given height, if any."""
+        row = self._connection.execute(
+            "SELECT snapshot FROM snapshots WHERE height = ?", (height,)
+        ).fetchone()
+        return None if row is None else AppSnapshot.deserialize(row[0])
+
+    def heights(self) -> List[int]:
+        """Get the heights of all the kept snapshots, the latest first."""
+        rows = self._connection.execute(
+            "SELECT height FROM snapshots ORDER BY height DESC"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_chunks(
+        self, height: int, chunk_size: int = DEFAULT_SNAPSHOT_CHUNK_SIZE
+    ) -> Optional[SnapshotChunks]:
+        """Get the snapshot at the given height split into chunks, if any, splitting each snapshot only once.
+
+        :param height: the height of the snapshot.
+        :param chunk_size: the size of the chunks.
+        :return: the chunks of the snapshot, if it exists.
+        """
+        key = (height, chunk_size)
+        chunks = self._chunks.get(key, None)
+        if chunks is None:
+            snapshot = self.get(height)
+            if snapshot is None:
+                return None
+            chunks = self._chunks[key] = snapshot.to_chunks(chunk_size)
+        return chunks
+
+    def all_chunks(
+        self, chunk_size: int = DEFAULT_SNAPSHOT_CHUNK_SIZE
+    ) -> List[SnapshotChunks]:
+        """Get all the kept snapshots split into chunks, the latest first."""
+        return [
+            cast(SnapshotChunks, self.get_chunks(height, chunk_size))
+            for height in self.heights()
+        ]
+
+    def all(self) -> List[AppSnapshot]:
+        """Get all the kept snapshots, the latest first."""
+        rows = self._connection.execute(
+            "SELECT snapshot FROM snapshots ORDER BY height DESC"
+        ).fetchall()
+        return [AppSnapshot.deserialize(row[0]) for row in rows]
+
+    def latest(self) -> Optional[AppSnapshot]:
+        """Get the latest snapshot, if any."""
+        row = self._connection.execute(
+            "SELECT snapshot FROM snapshots ORDER BY height DESC LIMIT 1"
+        ).fetchone()
+        return None if row is None else AppSnapshot.deserialize(row[0])
+
+    def clear(self) -> None:
+        """Remove all the snapshots, e.g., when the chain is reset."""
+        with self._connection:
+            self._connection.execute("DELETE FROM snapshots")
+        self._chunks = {}
+
+    def close(self) -> None:
+        """Close the store."""
+        self._connection.close()
@@ -27,12 +27,16 @@ import re
 import shutil
 from abc import ABC
 from calendar import timegm
-from collections import deque
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 from contextlib import suppress
 from copy import copy, deepcopy
 from dataclasses import dataclass
+from functools import partial
+from multiprocessing import get_context
 from pathlib import Path
 from time import sleep
+from timeit import timeit
 from typing import (
     Any,
     Callable,
@@ -42,6 +46,7 @@ from typing import (
     Generator,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -52,6 +57,7 @@ from unittest.mock import MagicMock
 
 import pytest
 from _pytest.logging import LogCaptureFixture
+from aea.crypto.registries import make_ledger_api_cls
 from aea.exceptions import AEAEnforceError
 from aea_ledger_ethereum import EthereumCrypto
 from hypothesis import HealthCheck, given, settings
@@ -94,6 +100,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     AbstractRound,
     AbstractRoundInternalError,
     AddBlockError,
+    AppHashMode,
     AppState,
     AvailabilityWindow,
     BaseSynchronizedData,
@@ -108,12 +115,15 @@ from packages.valory.skills.abstract_round_abci.base import (
     OffenseStatusDecoder,
     OffenseStatusEncoder,
     OffenseType,
+    PayloadCollection,
     RoundSequence,
     SignatureNotValidError,
     SlashingNotConfiguredError,
     Timeouts,
     Transaction,
+    TransactionNotValidError,
     TransactionTypeNotRecognizedError,
+    VerifiedTransactionCache,
     _MetaAbciApp,
     _MetaAbstractRound,
     _MetaPayload,
@@ -121,6 +131,10 @@ from packages.valory.skills.abstract_round_abci.base import (
     light_offences,
     serious_offences,
 )
+from packages.valory.skills.abstract_round_abci.persistence import (
+    SnapshotError,
+    SnapshotStore,
+)
 from packages.valory.skills.abstract_round_abci.test_tools.abci_app import (
     AbciAppTest,
     ConcreteBackgroundRound,
@@ -141,6 +155,7 @@ from packages.valory.skills.abstract_round_abci.test_tools.rounds import (
     get_participants,
 )
 from packages.valory.skills.abstract_round_abci.tests.conftest import profile_name
+from packages.valory.skills.abstract_round_abci.utils import FrozenList
 
 
 # pylint: skip-file
@@ -205,6 +220,40 @@ class TooBigPayload(BaseTxPayload):
     dummy_field: str = "0" * 10**7
 
 
+@dataclass(frozen=True)
+class NestedValue:
+    """A dataclass value nested in a payload."""
+
+    value: Any
+
+
+@dataclass(frozen=True)
+class MixedPayload(BasePayload):
+    """Payload class with values of any type."""
+
+    first: Any
+    second: Any = None
+
+
+def _legacy_encode(payload: BaseTxPayload) -> bytes:
+    """Encode a payload as it was encoded before its layout was cached."""
+    data, cls = dataclasses.asdict(payload), payload.__class__
+    data["_metaclass_registry_key"] = f"{cls.__module__}.{cls.__name__}"
+    return json.dumps(data, sort_keys=True).encode()
+
+
+json_values = one_of(
+    none(),
+    booleans(),
+    integers(),
+    floats(allow_nan=False),
+    text(),
+    lists(integers()),
+    dictionaries(text(), one_of(none(), integers(), text())),
+    builds(NestedValue, text()),
+)
+
+
 class ObjectImitator:
     """For custom __eq__ implementation testing"""
 
@@ -233,6 +282,148 @@ def test_base_tx_payload() -> None:
         payload.round_count = 1  # type: ignore
     object.__setattr__(payload, "round_count", 1)
     assert payload.round_count == 1
+
+
+@given(first=json_values, second=json_values, signature=text())
+def test_payload_encoding_compatibility(
+    first: Any, second: Any, signature: str
+) -> None:
+    """Test that the cached layout gives the same payload and transaction encodings as `asdict`."""
+    payload = MixedPayload("sender", first, second)
+    field_names = MixedPayload.field_names  # type: ignore
+    assert field_names == ("sender", "round_count", "id_", "first", "second")
+    assert payload.encode() == _legacy_encode(payload)
+    assert payload.values == dataclasses.astuple(payload)[3:]
+    legacy_data = dataclasses.asdict(payload)
+    assert payload.data == {name: legacy_data[name] for name in ("first", "second")}
+
+    transaction = Transaction(payload, signature)
+    legacy_tx_data = dict(
+        payload=json.loads(_legacy_encode(payload)), signature=signature
+    )
+    assert transaction.encode() == json.dumps(legacy_tx_data, sort_keys=True).encode()
+    assert Transaction.decode(transaction.encode()).payload.encode() == payload.encode()
+
+
+@given(first=json_values, second=json_values, signature=one_of(text(), binary()))
+def test_compact_transaction_encoding(first: Any, second: Any, signature: Any) -> None:
+    """Test that the compact encoding of the transactions round-trips and is auto-detected."""
+    if isinstance(signature, bytes):
+        signature = "0x" + signature.hex()
+    transaction = Transaction(MixedPayload("sender", first, second), signature)
+    encoded = transaction.encode(compact=True)
+    assert encoded[0] == abci_base.COMPACT_TX_MAGIC
+    decoded = Transaction.decode(encoded)
+    assert decoded.signature == signature
+    assert decoded.payload.encode() == transaction.payload.encode()
+    assert Transaction.decode(transaction.encode()) == decoded
+
+
+def test_compact_transaction_size() -> None:
+    """Test that the compact encoding of a signed transaction is smaller than the json one."""
+    (transaction,) = _signed_transactions(n_agents=1)
+    compact = transaction.encode(compact=True)
+    assert len(compact) < len(transaction.encode()) / 2
+    Transaction.decode(compact).verify(EthereumCrypto.identifier)
+
+
+@pytest.mark.parametrize(
+    "encoded, error, match",
+    (
+        (b"\x00\x01", TransactionNotValidError, "Compact transaction is truncated"),
+        (
+            b"\x00\x02" + bytes(7),
+            TransactionNotValidError,
+            "Compact transaction version 2 is not supported.",
+        ),
+        (
+            b"\x00\x01" + bytes(7),
+            TransactionTypeNotRecognizedError,
+            "Payload type id 0 is not recognized.",
+        ),
+    ),
+)
+def test_compact_transaction_decoding_errors(
+    encoded: bytes, error: Type[Exception], match: str
+) -> None:
+    """Test decoding invalid compact transactions."""
+    with pytest.raises(error, match=match):
+        Transaction.decode(encoded)
+
+
+def _compact_transaction(signature: bytes, body: bytes) -> bytes:
+    """Get a compact `MixedPayload` transaction with the given raw signature and body."""
+    type_id = abci_base._MetaPayload.get_type_id(
+        f"{MixedPayload.__module__}.{MixedPayload.__name__}"
+    )
+    header = abci_base._COMPACT_TX_HEADER.pack(
+        abci_base.COMPACT_TX_MAGIC,
+        abci_base.COMPACT_TX_VERSION,
+        type_id,
+        False,
+        len(signature),
+    )
+    return header + signature + body
+
+
+@pytest.mark.parametrize(
+    "encoded, match",
+    (
+        (
+            _compact_transaction(b"sig", b"")[:-2],
+            "expected a signature of 3 bytes, got 1",
+        ),
+        (
+            _compact_transaction(b"sig", b'["sender",null,"id",1,'),
+            "Compact transaction could not be decoded",
+        ),
+        (
+            _compact_transaction(b"\xff", b'["sender",null,"id",1,2]'),
+            "Compact transaction could not be decoded",
+        ),
+        (
+            _compact_transaction(b"sig", b'["sender",null,"id",\xff]'),
+            "Compact transaction could not be decoded",
+        ),
+        (
+            _compact_transaction(b"sig", b'["sender",null,"id",1]'),
+            "expects the values of the fields",
+        ),
+        (
+            _compact_transaction(b"sig", b'["sender",null,"id",1,2,3]'),
+            "expects the values of the fields",
+        ),
+        (
+            _compact_transaction(b"sig", b'{"sender":"sender"}'),
+            "expects the values of the fields",
+        ),
+    ),
+)
+def test_compact_transaction_decoding_malformed(encoded: bytes, match: str) -> None:
+    """Test that a malformed compact transaction is not valid, instead of raising a decoding error."""
+    with pytest.raises(TransactionNotValidError, match=match):
+        Transaction.decode(encoded)
+
+
+def test_compact_transaction_decoding_invalid_payload() -> None:
+    """Test that a compact transaction is not valid if its payload cannot be created."""
+    encoded = _compact_transaction(b"sig", b'["sender",null,"id",1,2]')
+    with mock.patch.object(
+        BaseTxPayload, "from_json", side_effect=TypeError("unexpected argument")
+    ), pytest.raises(
+        TransactionNotValidError,
+        match="Compact transaction has an invalid payload: unexpected argument",
+    ):
+        Transaction.decode(encoded)
+
+
+def test_payload_encoding_memo() -> None:
+    """Test that the memoised encoding is invalidated when the round count is set."""
+    payload = PayloadA(sender="sender")
+    assert payload.encode() is payload.encode()
+    object.__setattr__(payload, "round_count", 9)
+    assert payload.encode() == _legacy_encode(payload)
+    assert json.loads(payload.encode())["round_count"] == 9
     assert type(hash(payload)) == int
 
 
@@ -258,6 +449,16 @@ def test_abstract_round_instantiation_without_attributes_raises_error() -> None:
             synchronized_data_class = MagicMock()
 
 
+def _spawned_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Get a pool of processes which are spawned, as the agents would use to verify the transactions."""
+    return ProcessPoolExecutor(
+        max_workers,
+        mp_context=get_context("spawn"),
+        initializer=make_ledger_api_cls,
+        initargs=(EthereumCrypto.identifier,),
+    )
+
+
 class TestTransactions:
     """Test Transactions class."""
 
@@ -326,6 +527,25 @@ class TestTransactions:
         transaction = Transaction(payload, signature)
         transaction.verify(crypto.identifier)
 
+    @pytest.mark.parametrize(
+        "executor_cls", (None, ThreadPoolExecutor, _spawned_process_pool)
+    )
+    def test_verify_batch(self, executor_cls: Optional[Callable]) -> None:
+        """Test that verifying a batch of transactions is the same as verifying them one by one."""
+        transactions = _signed_transactions(n_agents=4)
+        # tamper with the signature of a transaction, and malform another one
+        transactions[1] = Transaction(
+            transactions[1].payload, transactions[2].signature
+        )
+        transactions[3] = Transaction(transactions[3].payload, "0xdead")
+        ledger_id = EthereumCrypto.identifier
+        if executor_cls is None:
+            results = Transaction.verify_batch(transactions, ledger_id)
+        else:
+            with executor_cls(max_workers=2) as executor:
+                results = Transaction.verify_batch(transactions, ledger_id, executor)
+        assert results == [True, False, True, False]
+
     def test_payload_not_equal_lookalike(self) -> None:
         """Test payload __eq__ reflection via NotImplemented"""
         payload = PayloadA(sender="sender")
@@ -425,6 +645,239 @@ class TestBlockchain:
         """Test 'blocks' property getter."""
         assert self.blockchain.blocks == tuple()
 
+    def test_incorrect_max_blocks(self) -> None:
+        """Test that the maximum number of retained blocks must be positive."""
+        with pytest.raises(
+            AEAEnforceError,
+            match="The maximum number of retained blocks must be positive, got 0.",
+        ):
+            Blockchain(max_blocks=0)
+
+    @pytest.mark.parametrize("height_offset", (0, 5))
+    @pytest.mark.parametrize("max_blocks", (None, 1, 3, 10))
+    def test_retention(self, height_offset: int, max_blocks: Optional[int]) -> None:
+        """Test that only the latest blocks are retained, while the height keeps growing."""
+        blockchain = Blockchain(height_offset=height_offset, max_blocks=max_blocks)
+        assert blockchain.max_blocks == max_blocks
+        n_blocks = 7
+        blocks = [
+            Block(MagicMock(height=height_offset + i + 1), []) for i in range(n_blocks)
+        ]
+        for block in blocks:
+            blockchain.add_block(block)
+            assert blockchain.last_block is block
+
+        n_retained = n_blocks if max_blocks is None else min(n_blocks, max_blocks)
+        assert blockchain.length == n_blocks
+        assert blockchain.height == height_offset + n_blocks
+        assert blockchain.retained_length == n_retained
+        assert blockchain.blocks == tuple(blocks[-n_retained:])
+        expected_retain_height = (
+            0 if n_retained == n_blocks else blockchain.height - n_retained + 1
+        )
+        assert blockchain.retain_height == expected_retain_height
+        if expected_retain_height:
+            assert blockchain.blocks[0].header.height == expected_retain_height
+
+
+def _signed_transactions(n_agents: int) -> List[Transaction]:
+    """Get a transaction signed by each one of the given number of agents."""
+    transactions = []
+    for _ in range(n_agents):
+        crypto = EthereumCrypto()
+        payload = PayloadA(crypto.address)
+        signature = crypto.sign_message(payload.encode())
+        transactions.append(Transaction(payload, signature))
+    return transactions
+
+
+class TestVerifiedTransactionCache:
+    """Test the `VerifiedTransactionCache`."""
+
+    def setup(self) -> None:
+        """Set up the test."""
+        self.cache = VerifiedTransactionCache(max_size=2)
+        self.transactions = {
+            tx_bytes: Transaction(BasePayload(sender="sender"), "signature")
+            for tx_bytes in (b"0", b"1", b"2")
+        }
+
+    def test_incorrect_max_size(self) -> None:
+        """Test that the size of the cache must be positive."""
+        with pytest.raises(
+            AEAEnforceError, match="The cache size must be positive, got 0."
+        ):
+            VerifiedTransactionCache(max_size=0)
+
+    def test_get(self) -> None:
+        """Test getting the cached transactions."""
+        assert self.cache.get(b"0") is None
+        self.cache.add(b"0", self.transactions[b"0"])
+        assert self.cache.get(b"0") is self.transactions[b"0"]
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+    def test_lru_eviction(self) -> None:
+        """Test that the least recently used transaction is evicted when the cache is full."""
+        self.cache.add(b"0", self.transactions[b"0"])
+        self.cache.add(b"1", self.transactions[b"1"])
+        # using the first transaction makes the second one the least recently used
+        self.cache.get(b"0")
+        self.cache.add(b"2", self.transactions[b"2"])
+        assert len(self.cache) == 2
+        assert self.cache.get(b"1") is None
+        assert self.cache.get(b"0") is self.transactions[b"0"]
+        assert self.cache.get(b"2") is self.transactions[b"2"]
+
+    def test_clear(self) -> None:
+        """Test clearing the cache."""
+        self.cache.add(b"0", self.transactions[b"0"])
+        self.cache.clear()
+        assert len(self.cache) == 0
+        assert self.cache.get(b"0") is None
+
+    def test_verify_batch(self) -> None:
+        """Test that only the valid transactions of a batch are verified and cached."""
+        cache = VerifiedTransactionCache()
+        valid, cached, forged = _signed_transactions(n_agents=3)
+        forged = Transaction(forged.payload, valid.signature)
+        cache.add(cached.encode(), cached)
+        transactions_bytes = [valid.encode(), cached.encode(), forged.encode(), b"0"]
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            verified = cache.verify_batch(
+                transactions_bytes, EthereumCrypto.identifier, executor
+            )
+
+        assert verified == [valid, cached, None, None]
+        assert len(cache) == 2
+        assert cache.get(valid.encode()) == valid
+        assert cache.get(forged.encode()) is None
+
+    @pytest.mark.benchmark
+    def test_benchmark_verify_batch(self, caplog: LogCaptureFixture) -> None:
+        """Benchmark the batch verification of the transactions of a round against the sequential one."""
+        ledger_id, n_workers = EthereumCrypto.identifier, 4
+        executor = _spawned_process_pool(n_workers)
+        with caplog.at_level(logging.INFO), executor:
+            # spawn the workers before measuring
+            wait([executor.submit(sleep, 0.5) for _ in range(n_workers)])
+            for n_agents in (4, 16, 64):
+                transactions = _signed_transactions(n_agents)
+                timings = {}
+                for name, executor_ in (("sequential", None), ("parallel", executor)):
+                    timings[name] = timeit(
+                        lambda txs=transactions, executor_=executor_: (  # type: ignore
+                            Transaction.verify_batch(txs, ledger_id, executor_)
+                        ),
+                        number=5,
+                    )
+                    logging.info(
+                        f"{n_agents} agents, {name}: {timings[name] / 5 * 1e3:.2f} ms per round"
+                    )
+                assert Transaction.verify_batch(
+                    transactions, ledger_id, executor
+                ) == Transaction.verify_batch(transactions, ledger_id)
+
+
+class TestPayloadCollection:
+    """Test the `PayloadCollection`."""
+
+    @staticmethod
+    def _payloads(values: Sequence[int]) -> Dict[str, DummyPayload]:
+        """Get a payload for each one of the given values, by sender."""
+        return {
+            f"sender_{i}": DummyPayload(f"sender_{i}", value)
+            for i, value in enumerate(values)
+        }
+
+    @staticmethod
+    def _assert_tallies(collection: PayloadCollection) -> None:
+        """Assert that the running tallies are the same as recounting the payloads."""
+        for key in (abci_base._payload_values, abci_base._payload_data_items):
+            assert collection.tally(key) == Counter(map(key, collection.values()))
+
+    def test_running_tallies(self) -> None:
+        """Test that the running tallies are kept up to date on every change of the collection."""
+        collection = PayloadCollection(self._payloads((0, 0, 1)))
+        self._assert_tallies(collection)
+        assert collection.tally(abci_base._payload_values) == {(0,): 2, (1,): 1}
+
+        collection["sender_3"] = DummyPayload("sender_3", 1)
+        collection["sender_0"] = DummyPayload("sender_0", 2)
+        self._assert_tallies(collection)
+        del collection["sender_1"]
+        collection.pop("sender_2")
+        collection.pop("unknown", None)
+        self._assert_tallies(collection)
+        assert collection.tally(abci_base._payload_values) == {(1,): 1, (2,): 1}
+
+        collection.popitem()
+        collection.setdefault("sender_4", DummyPayload("sender_4", 2))
+        collection.update(self._payloads((3,)))
+        collection |= self._payloads((3, 3))
+        self._assert_tallies(collection)
+        assert collection.tally(abci_base._payload_values) == {(2,): 1, (3,): 2}
+
+        collection.clear()
+        assert not collection.tally(abci_base._payload_values)
+
+    def test_copy(self) -> None:
+        """Test that the copies of a collection recount their tallies."""
+        collection = PayloadCollection(self._payloads((0, 1, 1)))
+        collection.tally(abci_base._payload_values)
+        for copied in (deepcopy(collection), copy(collection)):
+            assert isinstance(copied, PayloadCollection)
+            assert copied == collection
+            self._assert_tallies(copied)
+
+    def test_tally_error(self) -> None:
+        """Test that a tally whose key fails for a payload raises when it is requested again."""
+        collection = PayloadCollection(self._payloads((0,)))
+        assert collection.tally(abci_base._payload_values) == {(0,): 1}
+        collection["sender_1"] = DummyPayload("sender_1", [0])  # type: ignore
+        with pytest.raises(TypeError, match="unhashable type"):
+            collection.tally(abci_base._payload_values)
+
+    @pytest.mark.benchmark
+    def test_benchmark_tallies(self, caplog: LogCaptureFixture) -> None:
+        """Benchmark the end-of-block threshold checks of a round with the running tallies against recounting."""
+
+        def recount(collection: Dict[str, BaseTxPayload]) -> Counter:
+            """Recount the payload values, as the rounds did on every access."""
+            return Counter(
+                map(lambda p: dataclasses.astuple(p)[3:], collection.values())
+            )
+
+        def tally(collection: PayloadCollection) -> Counter:
+            """Get the running tally of the payload values."""
+            return collection.tally(abci_base._payload_values)
+
+        def deliver_all(count: Callable, payloads: Dict[str, DummyPayload]) -> None:
+            """Deliver the payloads one per block, checking the threshold three times per block."""
+            collection = PayloadCollection()
+            for sender, payload in payloads.items():
+                collection[sender] = payload
+                for _ in range(3):
+                    max(count(collection).values())
+
+        with caplog.at_level(logging.INFO):
+            for n_participants in (50, 100):
+                payloads = self._payloads([0] * n_participants)
+                timings = {
+                    name: timeit(
+                        lambda count=count, payloads=payloads: deliver_all(  # type: ignore
+                            count, payloads
+                        ),
+                        number=5,
+                    )
+                    for name, count in (("recount", recount), ("tally", tally))
+                }
+                for name, seconds in timings.items():
+                    logging.info(
+                        f"{n_participants} participants, {name}: {seconds / 5 * 1e3:.2f} ms per round"
+                    )
+                assert timings["tally"] < timings["recount"]
+
 
 class TestBlockBuilder:
     """Test block builder."""
@@ -990,6 +1443,258 @@ class TestAbciAppDB:
             b"\x1c\xde\xfa1\x8a\x87\xcc\xd7q?\xdf\xbbofz\xfb\x7fI"
         )
         assert self.db.hash() == expected_hash
+        assert self.db.legacy_hash() == expected_hash
+
+    def test_size(self) -> None:
+        """Test that the size of the database is the number of its values, across all the periods."""
+        assert self.db.size == 1
+        self.db.update(participants=("a",), other=0)
+        assert self.db.size == 3
+        db = self._merkle_db()
+        assert db.size == 4
+        db.create()
+        assert db.size == 8
+
+    def test_size_tracks_changes(self) -> None:
+        """Test that the size of the database is kept up to date on the cleanups and the syncs."""
+        db = self._merkle_db()
+        for _ in range(3):
+            db.create()
+            db.update(participants=("a",), other=0)
+            db.update(participants=("b",))
+        size = db.size
+        db.cleanup(2)
+        assert db.size == AbciAppDB._count_values(db._data) < size
+        size = db.size
+        db.cleanup_current_histories(1)
+        assert db.size == AbciAppDB._count_values(db._data) < size
+        other = AbciAppDB(setup_data={})
+        other.sync(db.serialize())
+        assert other.size == db.size
+
+    def test_merkle_root_legacy_mode(self) -> None:
+        """Test that the Merkle root cannot be requested in legacy mode."""
+        with pytest.raises(
+            ABCIAppInternalError,
+            match="Cannot compute the Merkle root of a database using AppHashMode.LEGACY hash mode.",
+        ):
+            self.db.merkle_root()
+
+    def test_merkle_hash(self) -> None:
+        """Test `hash` method in Merkle mode."""
+        db = AbciAppDB(
+            setup_data=dict(participants=[self.participants]),
+            hash_mode=AppHashMode.MERKLE,
+        )
+        assert db.is_merkle_hashed
+        assert db.hash() == db.merkle_root() != db.legacy_hash()
+        # the legacy hash is unaffected by the mode
+        assert db.legacy_hash() == self.db.hash()
+
+    @staticmethod
+    def _merkle_db() -> AbciAppDB:
+        """Get a database in Merkle mode, which contains all the keys required to create new periods."""
+        return AbciAppDB(
+            setup_data=AbciAppDB.data_to_lists(
+                dict(
+                    participants=("a", "b"),
+                    all_participants=("a", "b"),
+                    consensus_threshold=2,
+                    safe_contract_address="0x0",
+                )
+            ),
+            hash_mode=AppHashMode.MERKLE,
+        )
+
+    @staticmethod
+    def _rebuilt_root(db: AbciAppDB) -> bytes:
+        """Get the Merkle root of a database with the same contents, computed from scratch."""
+        rebuilt = AbciAppDB(setup_data={}, hash_mode=AppHashMode.MERKLE)
+        rebuilt.sync(db.serialize())
+        return rebuilt.hash()
+
+    @given(
+        operations=lists(
+            one_of(
+                builds(
+                    lambda key, value: ("update", {key: value}),
+                    sampled_from(("participants", "a", "b", "c")),
+                    one_of(integers(), text(max_size=5), lists(integers(), max_size=3)),
+                ),
+                just(("create", {})),
+                builds(lambda depth: ("cleanup", depth), integers(0, 3)),
+                builds(lambda depth: ("cleanup_current", depth), integers(0, 3)),
+                builds(lambda config: ("slashing", config), text(max_size=5)),
+            ),
+            max_size=20,
+        )
+    )
+    def test_merkle_hash_incremental(self, operations: List[Tuple[str, Any]]) -> None:
+        """Test that the incrementally updated Merkle root matches the one computed from scratch."""
+        db = self._merkle_db()
+        hashes = set()
+        for operation, arg in operations:
+            if operation == "update":
+                db.update(**arg)
+            elif operation == "create":
+                db.create()
+            elif operation == "cleanup":
+                db.cleanup(arg)
+            elif operation == "cleanup_current":
+                db.cleanup_current_histories(arg)
+            else:
+                db.slashing_config = arg
+            root = db.hash()
+            assert root == self._rebuilt_root(db)
+            hashes.add((db.serialize(), root))
+
+        # the root changes whenever the data change
+        assert len({root for _, root in hashes}) == len(hashes)
+
+    def test_derived_values(self) -> None:
+        """Test that the derived values are cached until the data change."""
+        db = AbciAppDB({"test": [0]})
+        db._cross_period_persisted_keys = frozenset({"test"})
+        derive = MagicMock(side_effect=lambda: db.get("test"))
+        expected_version = db.version
+
+        def assert_derived(expected: int, version_changed: bool) -> None:
+            """Assert the derived value, and that it was recomputed only if the version changed."""
+            nonlocal expected_version
+            derive.reset_mock()
+            assert (db.version != expected_version) is version_changed
+            expected_version = db.version
+            assert db.get_derived("key", derive) == expected
+            assert db.get_derived("key", derive) == expected
+            assert derive.call_count == int(version_changed)
+
+        assert db.get_derived("key", derive) == 0
+        assert_derived(0, False)
+        db.increment_round_count()
+        assert_derived(0, False)
+        db.update(test=1)
+        assert_derived(1, True)
+        db.create()
+        assert_derived(1, True)
+        db.cleanup(1)
+        assert_derived(1, True)
+        db.cleanup_current_histories(1)
+        assert_derived(1, True)
+        db.sync(json.dumps({"db_data": {0: {"test": [2]}}, "slashing_config": ""}))
+        assert_derived(2, True)
+
+        # failing derivations are not cached
+        derive.reset_mock()
+        derive.side_effect = ValueError
+        with pytest.raises(ValueError):
+            db.get_derived("failing", derive)
+        with pytest.raises(ValueError):
+            db.get_derived("failing", derive)
+        assert derive.call_count == 2
+
+
+class TestFrozenAbciAppDB:
+    """Test 'AbciAppDB' class with frozen values."""
+
+    def setup(self) -> None:
+        """Set up the tests."""
+        self.setup_data: Dict[str, List[Any]] = dict(
+            participants=[["a", "b"]],
+            all_participants=[["a", "b"]],
+            consensus_threshold=[2],
+            safe_contract_address=["0x0"],
+        )
+        self.db = AbciAppDB(setup_data=deepcopy(self.setup_data), freeze_values=True)
+        self.legacy_db = AbciAppDB(setup_data=deepcopy(self.setup_data))
+
+    def _do_for_both(self, method: str, *args: Any, **kwargs: Any) -> None:
+        """Call the same method on both the frozen and the legacy dbs."""
+        getattr(self.db, method)(*args, **kwargs)
+        getattr(self.legacy_db, method)(*args, **kwargs)
+
+    def test_freeze_values(self) -> None:
+        """Test the `freeze_values` property."""
+        assert self.db.freeze_values
+        assert not self.legacy_db.freeze_values
+
+    def test_zero_copy_reads(self) -> None:
+        """Test that the reads return the stored values without copying them."""
+        value = {"nested": [1, 2, {"deep": [3]}]}
+        self._do_for_both("update", dict_key=value)
+        assert self.db.get("dict_key") is self.db.get("dict_key")
+        assert self.db.get_latest()["dict_key"] is self.db.get("dict_key")
+        assert self.legacy_db.get("dict_key") is not self.legacy_db.get("dict_key")
+        assert self.db.get("dict_key") == self.legacy_db.get("dict_key") == value
+
+    def test_immutable_values(self) -> None:
+        """Test that the stored values cannot be altered indirectly."""
+        value = {"nested": [1, 2]}
+        self.db.update(dict_key=value)
+        # altering the original value does not affect the db
+        value["nested"].append(3)
+        assert self.db.get("dict_key") == {"nested": [1, 2]}
+        # the retrieved values cannot be altered
+        with pytest.raises(TypeError, match="'FrozenList' object is immutable"):
+            self.db.get_strict("dict_key")["nested"].append(3)
+        with pytest.raises(TypeError, match="'FrozenDict' object is immutable"):
+            self.db.get_latest()["dict_key"]["other"] = 3
+        with pytest.raises(TypeError, match="'FrozenList' object is immutable"):
+            self.db.setup_data["participants"][0].append("c")
+        # however, the histories returned by `setup_data` can be altered without affecting the db
+        self.db.setup_data["participants"].append(["c"])
+        assert self.db.setup_data == self.setup_data
+
+    def test_same_as_legacy(self) -> None:
+        """Test that the frozen db is equivalent to a db which copies the values."""
+        self._do_for_both("update", participants=("a",), other=[{"a": [1]}])
+        self._do_for_both("create", other=[1])
+        self._do_for_both("update", participants=["a", "b"])
+        for db in (self.db, self.legacy_db):
+            db.slashing_config = "config"
+        assert self.db.serialize() == self.legacy_db.serialize()
+        assert self.db.hash() == self.legacy_db.hash()
+        assert self.db.get_latest() == self.legacy_db.get_latest()
+
+        self._do_for_both("sync", self.db.serialize())
+        assert isinstance(self.db.get("participants"), FrozenList)
+        assert self.db.serialize() == self.legacy_db.serialize()
+
+    @pytest.mark.benchmark
+    def test_benchmark(self, caplog: LogCaptureFixture) -> None:
+        """Benchmark the reads and updates of the frozen db against the legacy db, which deep-copies the values."""
+        n_participants, n_repetitions = 100, 200
+        participants = [f"0x{i:040x}" for i in range(n_participants)]
+        collection = {
+            participant: {"sender": participant, "values": list(range(10))}
+            for participant in participants
+        }
+        self._do_for_both("update", participants=participants, collection=collection)
+
+        def read(db: AbciAppDB) -> None:
+            """Read the values of the db."""
+            db.get("participants")
+            db.get("collection")
+
+        def update(db: AbciAppDB) -> None:
+            """Update the db with one of its own values."""
+            db.update(collection=db.get("collection"))
+
+        timings = {}
+        for name, db in (("frozen", self.db), ("deepcopy", self.legacy_db)):
+            timings[f"read ({name})"] = timeit(partial(read, db), number=n_repetitions)
+            timings[f"update ({name})"] = timeit(
+                partial(update, db), number=n_repetitions
+            )
+
+        with caplog.at_level(logging.INFO):
+            for operation, seconds in timings.items():
+                logging.info(
+                    f"{operation}: {seconds / n_repetitions * 1e6:.2f} us per operation"
+                )
+        # the frozen reads do not copy, so they are orders of magnitude faster
+        assert timings["read (frozen)"] < timings["read (deepcopy)"]
+        # re-inserting a retrieved frozen value does not copy it either
+        assert timings["update (frozen)"] < timings["update (deepcopy)"]
 
 
 class TestBaseSynchronizedData:
@@ -1205,6 +1910,47 @@ class TestBaseSynchronizedData:
         assert base_synchronized_data.participant_to_votes == participant_to_votes
         assert base_synchronized_data.safe_contract_address == safe_contract_address
 
+    def test_cached_properties(self) -> None:
+        """Test that the properties derived from the db are only computed once per version of the db."""
+        db = self.base_synchronized_data.db
+        db.update(
+            all_participants=self.participants,
+            consensus_threshold=None,
+            participant_to_votes=CollectionRound.serialize_collection(
+                {"a": DummyPayload(sender="a", dummy_attribute=0)}
+            ),
+        )
+        with mock.patch.object(db, "get", wraps=db.get) as get_mock:
+            for _ in range(3):
+                assert self.base_synchronized_data.participants == {"a", "b"}
+                assert self.base_synchronized_data.consensus_threshold == 2
+                assert len(self.base_synchronized_data.participant_to_votes) == 1
+            assert get_mock.call_count == 4
+
+            # the mutable values are copied, so that the cached ones cannot be altered
+            sorted_participants = self.base_synchronized_data.sorted_participants
+            cast(list, sorted_participants).clear()
+            assert self.base_synchronized_data.sorted_participants == ["a", "b"]
+            votes = self.base_synchronized_data.participant_to_votes
+            cast(dict, votes).clear()
+            assert len(self.base_synchronized_data.participant_to_votes) == 1
+
+            # a new instance with the same db shares the cache, until the db is updated
+            get_mock.reset_mock()
+            updated = self.base_synchronized_data.update(participants=("a",))
+            assert updated.participants == {"a"}
+            assert updated.participants == {"a"}
+            get_mock.assert_called_once_with("participants")
+
+    def test_cached_properties_mocked_db(self) -> None:
+        """Test that the properties are computed directly when the db is not an `AbciAppDB`."""
+        db = MagicMock()
+        db.get_strict.return_value = self.participants
+        synchronized_data = BaseSynchronizedData(db=db)
+        assert synchronized_data.participants == frozenset(self.participants)
+        db.get_strict.return_value = ("a",)
+        assert synchronized_data.participants == {"a"}
+
 
 class DummyConcreteRound(AbstractRound):
     """A dummy concrete round's implementation."""
@@ -1512,17 +2258,22 @@ class TestTimeouts:
 
         self.timeouts.cancel_timeout(entry_count)
 
-        # cancelling timeouts does not remove them from the heap
-        assert self.timeouts.size == 1
+        # cancelling timeouts removes them from the heap right away
+        assert self.timeouts.size == 0
+        assert self.timeouts.stats["n_cancelled"] == 1
+
+        # cancelling an unknown or already cancelled timeout is a no-op
+        self.timeouts.cancel_timeout(entry_count)
+        assert self.timeouts.stats["n_cancelled"] == 1
 
     def test_pop_earliest_cancelled_timeouts(self) -> None:
-        """Test the 'pop_earliest_cancelled_timeouts' method."""
-        entry_count_1 = self.timeouts.add_timeout(datetime.datetime.now(), MagicMock())
-        entry_count_2 = self.timeouts.add_timeout(datetime.datetime.now(), MagicMock())
-        self.timeouts.cancel_timeout(entry_count_1)
-        self.timeouts.cancel_timeout(entry_count_2)
+        """Test that the 'pop_earliest_cancelled_timeouts' method is a no-op."""
+        entry_count = self.timeouts.add_timeout(datetime.datetime.now(), MagicMock())
+        self.timeouts.add_timeout(datetime.datetime.now(), MagicMock())
+        self.timeouts.cancel_timeout(entry_count)
+        assert self.timeouts.size == 1
         self.timeouts.pop_earliest_cancelled_timeouts()
-        assert self.timeouts.size == 0
+        assert self.timeouts.size == 1
 
     def test_get_earliest_timeout_a(self) -> None:
         """Test the 'get_earliest_timeout' method."""
@@ -1598,6 +2349,56 @@ class TestTimeouts:
         # test that pop_timeout removes elements
         assert self.timeouts.size == 1
 
+    @given(
+        lists(integers(min_value=0, max_value=100), min_size=1, max_size=50),
+        lists(integers(min_value=0, max_value=49), max_size=50),
+        booleans(),
+    )
+    def test_indexed_heap(
+        self, offsets: List[int], to_cancel: List[int], bulk: bool
+    ) -> None:
+        """Test that the timeouts are popped in order after adding and cancelling them."""
+        timeouts: Timeouts = Timeouts()
+        start = datetime.datetime(2023, 1, 1)
+        entry_ids = [
+            timeouts.add_timeout(start + datetime.timedelta(seconds=offset), i)
+            for i, offset in enumerate(offsets)
+        ]
+        cancelled = {entry_ids[i] for i in to_cancel if i < len(entry_ids)}
+        if bulk:
+            timeouts.cancel_timeouts(
+                entry_ids[i] for i in to_cancel if i < len(entry_ids)
+            )
+        else:
+            for entry_id in cancelled:
+                timeouts.cancel_timeout(entry_id)
+
+        assert timeouts.size == len(offsets) - len(cancelled)
+        assert all(
+            entry.heap_index == index for index, entry in enumerate(timeouts._heap)
+        )
+        popped = [timeouts.pop_timeout() for _ in range(timeouts.size)]
+        expected = sorted(
+            (start + datetime.timedelta(seconds=offset), i)
+            for i, offset in enumerate(offsets)
+            if entry_ids[i] not in cancelled
+        )
+        assert popped == expected
+        assert timeouts.stats["n_cancelled"] == len(cancelled)
+        assert timeouts.stats["peak_size"] == len(offsets)
+
+    def test_record_expiry(self) -> None:
+        """Test the 'record_expiry' method."""
+        deadline = datetime.datetime.now()
+        lags = (2, 5, 1)
+        for lag in lags:
+            recorded = self.timeouts.record_expiry(
+                deadline, deadline + datetime.timedelta(seconds=lag)
+            )
+            assert recorded == datetime.timedelta(seconds=lag)
+        assert self.timeouts.stats["n_expired"] == len(lags)
+        assert self.timeouts.stats["max_expiry_lag"] == max(lags)
+
 
 STUB_TERMINATION_CONFIG = abci_base.BackgroundAppConfig(
     round_cls=ConcreteBackgroundRound,
@@ -1745,6 +2546,12 @@ class TestAbciApp:
         self.abci_app.update_time(current_time)
         assert height == self.abci_app.current_round_height
 
+        # the timeouts of the left rounds have been removed, and the expirations recorded
+        stats = self.abci_app.timeout_stats
+        assert stats["size"] == len(self.abci_app._current_timeout_entries)
+        assert stats["n_expired"] == 2
+        assert stats["max_expiry_lag"] == 0
+
     def test_get_all_events(self) -> None:
         """Test the all events getter."""
         assert {
@@ -2420,6 +3227,23 @@ class TestRoundSequence:
             == mock_encoded_status
         )
 
+    @pytest.mark.parametrize(
+        "level, hash_computed", ((logging.INFO, False), (logging.DEBUG, True))
+    )
+    def test_store_offence_status_app_hash_logging(
+        self, level: int, hash_computed: bool, caplog: LogCaptureFixture
+    ) -> None:
+        """Test that the app hash is only computed after storing the offence status if it is going to be logged."""
+        self.round_sequence._offence_status = {"agent": OffenceStatus()}
+        with caplog.at_level(level), mock.patch.object(
+            RoundSequence,
+            "root_hash",
+            new_callable=mock.PropertyMock,
+            return_value=b"hash",
+        ) as mock_root_hash:
+            self.round_sequence.store_offence_status()
+        assert mock_root_hash.called is hash_computed
+
     @given(
         validator=builds(Validator, address=binary(), power=integers()),
         agent_address=text(),
@@ -2443,14 +3267,21 @@ class TestRoundSequence:
         ):
             round_sequence.get_agent_address(unknown)
 
+    @pytest.mark.parametrize("n_pruned", (0, 3))
     @pytest.mark.parametrize("offset", tuple(range(5)))
     @pytest.mark.parametrize("n_blocks", (0, 1, 10))
-    def test_height(self, n_blocks: int, offset: int) -> None:
+    def test_height(self, n_blocks: int, offset: int, n_pruned: int) -> None:
         """Test 'height' property."""
-        self.round_sequence._blockchain._blocks = [MagicMock() for _ in range(n_blocks)]
-        self.round_sequence._blockchain._height_offset = offset
-        assert self.round_sequence._blockchain.length == n_blocks
-        assert self.round_sequence.height == n_blocks + offset
+        blockchain = self.round_sequence._blockchain
+        # the retained blocks are kept in a deque bounded by the block retention, like the blockchain does
+        blockchain._blocks = deque(
+            (MagicMock() for _ in range(n_blocks)), maxlen=blockchain.max_blocks
+        )
+        blockchain._n_pruned = n_pruned
+        blockchain._height_offset = offset
+        assert blockchain.retained_length == n_blocks
+        assert blockchain.length == n_blocks + n_pruned
+        assert self.round_sequence.height == n_blocks + n_pruned + offset
 
     def test_is_finished(self) -> None:
         """Test 'is_finished' property."""
@@ -2890,6 +3721,187 @@ class TestRoundSequence:
             )
         assert self.round_sequence._blockchain.height == 0
 
+    @pytest.mark.parametrize("prune_tendermint_blocks", (False, True))
+    def test_block_retention(self, prune_tendermint_blocks: bool) -> None:
+        """Test that the block retention is kept across resets and is only reported to Tendermint if enabled."""
+        max_blocks = 2
+        round_sequence = RoundSequence(
+            context=MagicMock(),
+            abci_app_cls=AbciAppTest,
+            max_blocks=max_blocks,
+            prune_tendermint_blocks=prune_tendermint_blocks,
+        )
+        initial_height = 3
+        round_sequence.init_chain(initial_height)
+        n_blocks = 5
+        for height in range(initial_height, initial_height + n_blocks):
+            round_sequence.blockchain.add_block(Block(MagicMock(height=height), []))
+        assert round_sequence.height == initial_height + n_blocks - 1
+        assert round_sequence.blockchain.retained_length == max_blocks
+        expected_retain_height = round_sequence.height - max_blocks + 1
+        assert round_sequence.retain_height == (
+            expected_retain_height if prune_tendermint_blocks else 0
+        )
+
+        round_sequence.reset_blockchain()
+        assert round_sequence.blockchain.max_blocks == max_blocks
+        assert round_sequence.retain_height == 0
+
+    @staticmethod
+    def _snapshotted_round_sequence(
+        store: SnapshotStore, snapshot_interval: int = 1
+    ) -> RoundSequence:
+        """Get a round sequence with a real db, which persists its snapshots to the given store."""
+        round_sequence = RoundSequence(
+            context=MagicMock(),
+            abci_app_cls=AbciAppTest,
+            snapshot_store=store,
+            snapshot_interval=snapshot_interval,
+        )
+        round_sequence.setup(
+            BaseSynchronizedData(AbciAppDB(setup_data={"test": [0]})),
+            logging.getLogger(),
+        )
+        round_sequence.tm_height = 1
+        return round_sequence
+
+    @staticmethod
+    def _commit_block(
+        round_sequence: RoundSequence,
+        timestamp: datetime.datetime,
+        event: Optional[ConcreteEvents],
+    ) -> None:
+        """Commit an empty block, which ends the current round with the given event, if any."""
+        header = MagicMock(height=round_sequence.height + 1, timestamp=timestamp)
+        round_sequence.begin_block(header, MagicMock(), MagicMock())
+        round_sequence.end_block()
+        result = (
+            None
+            if event is None
+            else (
+                round_sequence.latest_synchronized_data.update(test=header.height),
+                event,
+            )
+        )
+        with mock.patch.object(
+            round_sequence.current_round, "end_block", return_value=result
+        ):
+            round_sequence.commit()
+
+    def test_snapshot_and_restore(self) -> None:
+        """Test that a round sequence restored from a snapshot carries on like the one which took it."""
+        store = SnapshotStore(":memory:")
+        round_sequence = self._snapshotted_round_sequence(store)
+        timestamp = datetime.datetime(2023, 1, 1)
+
+        # snapshots are only taken when a round ends
+        self._commit_block(round_sequence, timestamp, None)
+        assert store.latest() is None
+        self._commit_block(round_sequence, timestamp, ConcreteEvents.B)
+        snapshot = store.latest()
+        assert snapshot is not None
+        assert snapshot.height == round_sequence.height == 2
+        assert snapshot.current_round_id == ConcreteRoundB.auto_round_id()
+        assert snapshot.last_round_id == ConcreteRoundA.auto_round_id()
+
+        restored = self._snapshotted_round_sequence(SnapshotStore(":memory:"))
+        restored.restore(snapshot)
+        for sequence in (round_sequence, restored):
+            assert sequence.height == 2
+            assert sequence.current_round_id == ConcreteRoundB.auto_round_id()
+            assert sequence.last_round_id == ConcreteRoundA.auto_round_id()
+            assert sequence.last_round_transition_height == 2
+            assert sequence.last_round_transition_timestamp == timestamp
+        assert restored.root_hash == round_sequence.root_hash
+        assert restored.last_round_transition_root_hash == round_sequence.root_hash
+        assert (
+            restored.latest_synchronized_data.round_count
+            == round_sequence.latest_synchronized_data.round_count
+        )
+        assert (
+            restored.abci_app._timeouts.get_earliest_timeout()
+            == round_sequence.abci_app._timeouts.get_earliest_timeout()
+        )
+
+        # both sequences process the next blocks in the same way, e.g., the timeout of the restored round expires
+        timestamp += datetime.timedelta(seconds=AbciAppTest.TIMEOUT)
+        for sequence in (round_sequence, restored):
+            self._commit_block(sequence, timestamp, None)
+            assert sequence.current_round_id == ConcreteRoundA.auto_round_id()
+        assert restored.root_hash == round_sequence.root_hash
+        assert restored.height == round_sequence.height == 3
+
+        # a chain reset invalidates the snapshots
+        round_sequence.init_chain(1)
+        assert store.latest() is None
+
+    def test_snapshot_interval(self) -> None:
+        """Test that snapshots are persisted at most once every `snapshot_interval` blocks."""
+        store = SnapshotStore(":memory:", snapshots_to_keep=10)
+        round_sequence = self._snapshotted_round_sequence(store, snapshot_interval=3)
+        assert round_sequence.snapshot_store is store
+        timestamp = datetime.datetime(2023, 1, 1)
+        for _ in range(7):
+            self._commit_block(round_sequence, timestamp, ConcreteEvents.B)
+        assert [snapshot.height for snapshot in store.all()] == [7, 4, 1]
+
+        # a chain reset makes the next round transition persist a snapshot right away
+        round_sequence.reset_blockchain(is_replay=True, is_init=True)
+        self._commit_block(round_sequence, timestamp, ConcreteEvents.B)
+        assert [snapshot.height for snapshot in store.all()] == [1]
+
+    def test_restore_invalid_snapshot(self) -> None:
+        """Test that a snapshot which does not match the app is not restored."""
+        store = SnapshotStore(":memory:")
+        round_sequence = self._snapshotted_round_sequence(store)
+        self._commit_block(round_sequence, datetime.datetime.now(), ConcreteEvents.C)
+        snapshot = store.latest()
+        assert snapshot is not None
+
+        restored = self._snapshotted_round_sequence(SnapshotStore(":memory:"))
+        root_hash = restored.root_hash
+        for invalid_snapshot, match in (
+            (dataclasses.replace(snapshot, current_round_id="unknown"), "unknown"),
+            (
+                dataclasses.replace(snapshot, last_round_id="unknown"),
+                "unknown last round id",
+            ),
+            (dataclasses.replace(snapshot, round_count=-2), "invalid round count"),
+            (dataclasses.replace(snapshot, db="not a db"), "Could not decode"),
+            (dataclasses.replace(snapshot, app_hash="00"), "does not match"),
+            (
+                dataclasses.replace(snapshot, validator_to_agent={"validator": "a"}),
+                r"mapped to agents which are not participants: \['a'\]",
+            ),
+        ):
+            with pytest.raises(SnapshotError, match=match):
+                restored.restore(invalid_snapshot)
+            assert restored.height == 0
+            assert restored.root_hash == root_hash
+            assert restored.current_round_id == ConcreteRoundA.auto_round_id()
+
+    def test_restore_validator_to_agent(self) -> None:
+        """Test that the validators' mapping of a snapshot is restored only if it matches the participants and the local one."""
+        store = SnapshotStore(":memory:")
+        round_sequence = self._snapshotted_round_sequence(store)
+        round_sequence.latest_synchronized_data.db.update(all_participants=("a",))
+        round_sequence.validator_to_agent = {"validator": "a"}
+        round_sequence.offence_status = {"a": OffenceStatus()}
+        round_sequence.enable_slashing()
+        self._commit_block(round_sequence, datetime.datetime.now(), ConcreteEvents.C)
+        snapshot = store.latest()
+        assert snapshot is not None and snapshot.slashing_enabled
+
+        restored = self._snapshotted_round_sequence(SnapshotStore(":memory:"))
+        restored.validator_to_agent = {"validator": "b"}
+        with pytest.raises(SnapshotError, match="does not match the local one"):
+            restored.restore(snapshot)
+
+        restored = self._snapshotted_round_sequence(SnapshotStore(":memory:"))
+        restored.restore(snapshot)
+        assert restored.validator_to_agent == {"validator": "a"}
+        assert restored._slashing_enabled
+
     def last_round_values_updated(self, any_: bool = True) -> bool:
         """Check if the values for the last round-related attributes have been updated."""
         seq = self.round_sequence
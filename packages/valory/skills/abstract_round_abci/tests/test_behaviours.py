@@ -56,6 +56,7 @@ from packages.valory.skills.abstract_round_abci.behaviours import (
     PendingOffencesBehaviour,
     _MetaRoundBehaviour,
 )
+from packages.valory.skills.abstract_round_abci.metrics import AbciAppMetrics
 from packages.valory.skills.abstract_round_abci.models import TendermintRecoveryParams
 from packages.valory.skills.abstract_round_abci.tests.conftest import profile_name
 
@@ -249,6 +250,23 @@ class TestAbstractRoundBehaviour:
         with mock.patch.object(self.behaviour, "_process_current_round"):
             self.behaviour.act()
 
+    def test_act_metrics(self) -> None:
+        """Test that the ticks of the behaviour are recorded in the metrics, along with the outstanding requests."""
+        metrics = self.behaviour.context.state.metrics = AbciAppMetrics()
+        self.behaviour.context.requests.request_id_to_callback = {"nonce": MagicMock()}
+        self.behaviour.tm_manager = self.behaviour.instantiate_behaviour_cls(TmManager)  # type: ignore
+        self.behaviour.current_behaviour = None
+        with mock.patch.object(self.behaviour, "_process_current_round"):
+            self.behaviour.act()
+            with mock.patch.object(
+                self.behaviour, "_background_act", side_effect=ValueError
+            ), pytest.raises(ValueError):
+                self.behaviour.current_behaviour = MagicMock()
+                self.behaviour.act()
+        # the failing tick is recorded as well
+        assert metrics.behaviour_tick_duration.get_count() == 2
+        assert metrics.outstanding_requests.get() == 1
+
     def test_check_matching_round_consistency(self) -> None:
         """Test classmethod '_get_behaviour_id_to_behaviour_mapping', negative case."""
         rounds = [
@@ -21,12 +21,14 @@
 
 import json
 import logging
+import math
 import platform
 import time
 from abc import ABC
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
+from timeit import timeit
 from typing import (
     Any,
     Callable,
@@ -34,6 +36,7 @@ from typing import (
     Generator,
     List,
     Optional,
+    Sequence,
     Tuple,
     Type,
     Union,
@@ -48,6 +51,7 @@ from _pytest.logging import LogCaptureFixture
 
 # pylint: skip-file
 from aea.common import JSONLike
+from aea.exceptions import AEAEnforceError
 from aea.protocols.base import Message
 from aea.test_tools.utils import as_context
 from aea_test_autonomy.helpers.base import try_send
@@ -92,6 +96,7 @@ from packages.valory.skills.abstract_round_abci.behaviour_utils import (
     SendException,
     TimeoutException,
     TmManager,
+    Wakeup,
     _MetaBaseBehaviour,
     make_degenerate_behaviour,
 )
@@ -371,6 +376,82 @@ def test_async_behaviour_sleep() -> None:
     ).total_seconds() > timedelta
 
 
+def test_async_behaviour_parked() -> None:
+    """Test that a parked behaviour is only resumed when its wakeup fires."""
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        round_height = 0
+        resumptions = 0
+
+        def async_act(self) -> Generator:
+            while True:
+                self.resumptions += 1
+                wakeup = Wakeup(
+                    timeout=3600, get_round_height=lambda: self.round_height
+                )
+                yield from self.park(wakeup)
+
+    behaviour = MyAsyncBehaviour()
+    for _ in range(10):
+        behaviour.act()
+    assert behaviour.resumptions == 1
+
+    behaviour.round_height += 1
+    behaviour.act()
+    behaviour.act()
+    assert behaviour.resumptions == 2
+
+    behaviour.stop()
+    assert behaviour.state == AsyncBehaviour.AsyncState.READY
+    behaviour.act()
+    assert behaviour.resumptions == 3
+
+
+@pytest.mark.parametrize(
+    "timeout, round_height_changed, expected",
+    ((None, False, False), (3600, False, False), (0, False, True), (None, True, True)),
+)
+def test_wakeup(
+    timeout: Optional[float], round_height_changed: bool, expected: bool
+) -> None:
+    """Test the events which fire a `Wakeup`."""
+    round_heights = iter((0, 1 if round_height_changed else 0))
+    wakeup = Wakeup(timeout, get_round_height=lambda: next(round_heights))
+    assert wakeup.has_fired() is expected
+
+
+@pytest.mark.benchmark
+def test_benchmark_parked_sleep(caplog: LogCaptureFixture) -> None:
+    """Benchmark the idle ticks of sleeping behaviours which are parked against polling ones."""
+    n_behaviours, n_ticks = 100, 200
+
+    class ParkedBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.sleep(3600)
+
+    class PollingBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            deadline = datetime.now() + timedelta(seconds=3600)
+            yield from self.wait_for_condition(lambda: datetime.now() > deadline)
+
+    timings = {}
+    for behaviour_cls in (ParkedBehaviour, PollingBehaviour):
+        behaviours = [behaviour_cls() for _ in range(n_behaviours)]
+
+        def tick(behaviours: Sequence[AsyncBehaviour] = behaviours) -> None:
+            for behaviour in behaviours:
+                behaviour.act()
+
+        timings[behaviour_cls.__name__] = timeit(tick, number=n_ticks)
+
+    with caplog.at_level(logging.INFO):
+        for name, seconds in timings.items():
+            logging.info(
+                f"{name}: {seconds / n_ticks * 1e6:.2f} us per tick of {n_behaviours} behaviours"
+            )
+    assert timings["ParkedBehaviour"] < timings["PollingBehaviour"]
+
+
 def test_async_behaviour_without_yield() -> None:
     """Test AsyncBehaviour, async_act without yield/yield from."""
 
@@ -753,6 +834,39 @@ class TestBaseBehaviour:
         gen = self.behaviour.wait_until_round_end()
         try_send(gen)
 
+    @pytest.mark.parametrize("timeout", (None, 0.2))
+    @mock.patch.object(BaseBehaviour, "check_not_in_round", return_value=False)
+    @mock.patch.object(BaseBehaviour, "check_not_in_last_round", return_value=False)
+    def test_wait_until_round_end_deadline(
+        self, _: Any, __: Any, timeout: Optional[float]
+    ) -> None:
+        """Test that 'wait_until_round_end' parks until a single deadline, for the remaining time only."""
+        self.behaviour.context.state.round_sequence.current_round_height = 0
+        wakeups: List[Wakeup] = []
+
+        def park(wakeup: Wakeup) -> Generator[None, None, None]:
+            """Record the wakeup instead of parking."""
+            wakeups.append(wakeup)
+            yield
+
+        with mock.patch.object(self.behaviour, "park", side_effect=park):
+            gen = self.behaviour.wait_until_round_end(timeout)
+            gen.send(None)
+            time.sleep(0.1)
+            gen.send(None)
+            if timeout is not None:
+                time.sleep(0.1)
+                with pytest.raises(TimeoutException):
+                    gen.send(None)
+
+        first, second = wakeups
+        if timeout is None:
+            assert first.deadline == second.deadline == math.inf
+        else:
+            assert first.deadline is not None
+            # the deadline is not pushed back by the resumptions
+            assert first.deadline == pytest.approx(second.deadline, abs=0.01)
+
     def test_wait_from_last_timestamp(self) -> None:
         """Test 'wait_from_last_timestamp'."""
         timeout = 1.0
@@ -814,6 +928,7 @@ class TestBaseBehaviour:
             for __ in range(3):
                 try_send(gen)
             log_mock.assert_called_with("local height == remote == 0; Sync complete...")
+        self.behaviour.context.state.check_restored_snapshot.assert_called_with(0)
 
     @mock.patch.object(BaseBehaviour, "_get_status", _get_status_wrong_patch)
     def test_async_act_wrapper_agent_sync_mode_where_height_dont_match(self) -> None:
@@ -1673,6 +1788,85 @@ class TestBaseBehaviour:
             # wait for message
             try_send(gen, obj=MagicMock())
 
+    @pytest.mark.parametrize(
+        "n_responses, responded, expected",
+        (
+            (None, ("2", "0", "1"), ["response_0", "response_1", "response_2"]),
+            (2, ("2", "0"), ["response_0", None, "response_2"]),
+            (0, (), [None, None, None]),
+        ),
+    )
+    def test_gather_responses(
+        self,
+        n_responses: Optional[int],
+        responded: Tuple[str, ...],
+        expected: List[Optional[str]],
+    ) -> None:
+        """Test that the responses of several requests are gathered, in any order."""
+        requests = [(MagicMock(), MagicMock()) for _ in range(3)]
+        request_id_to_callback: Dict[str, Callable] = {}
+        self.behaviour.context.requests.request_id_to_callback = request_id_to_callback
+        self.behaviour._AsyncBehaviour__stopped = False  # type: ignore
+
+        with mock.patch.object(
+            BaseBehaviour,
+            "_get_request_nonce_from_dialogue",
+            side_effect=("0", "1", "2"),
+        ), mock.patch.object(self.behaviour.context.outbox, "put_message") as put_mock:
+            gen = self.behaviour.gather_responses(requests, n_responses)
+            if n_responses != 0:
+                # all the requests are sent before waiting for their responses
+                gen.send(None)
+                assert put_mock.call_count == 3
+                assert set(request_id_to_callback) == {"0", "1", "2"}
+
+            for request_nonce in responded:
+                callback = request_id_to_callback.pop(request_nonce)
+                callback(f"response_{request_nonce}", self.behaviour)
+            with pytest.raises(StopIteration) as e:
+                gen.send(None)
+
+        assert e.value.value == expected
+        # the callbacks of the requests which have not been responded are removed
+        assert not request_id_to_callback
+
+    def test_gather_responses_timeout(self) -> None:
+        """Test that the callbacks are removed when the gathering times out."""
+        request_id_to_callback: Dict[str, Callable] = {}
+        self.behaviour.context.requests.request_id_to_callback = request_id_to_callback
+        with mock.patch.object(
+            BaseBehaviour, "_get_request_nonce_from_dialogue", return_value="0"
+        ):
+            gen = self.behaviour.gather_responses(
+                [(MagicMock(), MagicMock())], timeout=0.01
+            )
+            gen.send(None)
+            time.sleep(0.02)
+            with pytest.raises(TimeoutException):
+                gen.send(None)
+        assert not request_id_to_callback
+
+    def test_gather_responses_incorrect_n_responses(self) -> None:
+        """Test that the number of responses to wait for cannot exceed the number of requests."""
+        with pytest.raises(
+            AEAEnforceError, match="Cannot wait for 2 responses to 1 requests."
+        ):
+            self.behaviour.gather_responses(
+                [(MagicMock(), MagicMock())], n_responses=2
+            ).send(None)
+
+    @pytest.mark.parametrize("stopped, is_current", ((True, True), (False, False)))
+    def test_get_callback_gather_dropped(self, stopped: bool, is_current: bool) -> None:
+        """Test that the gathered responses are dropped when the behaviour has stopped or is not the current one."""
+        responses: Dict[str, Message] = {}
+        self.behaviour._AsyncBehaviour__stopped = stopped  # type: ignore
+        callback = self.behaviour.get_callback_gather("0", responses)
+        with mock.patch.object(self.behaviour, "handle_late_messages") as late_mock:
+            current_behaviour = self.behaviour if is_current else MagicMock()
+            callback(MagicMock(), cast(BaseBehaviour, current_behaviour))
+        assert not responses
+        assert late_mock.called is not is_current
+
     @mock.patch.object(
         BaseBehaviour, "_build_http_request_message", return_value=(None, None)
     )
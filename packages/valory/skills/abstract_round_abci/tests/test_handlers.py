@@ -34,6 +34,13 @@ from _pytest.logging import LogCaptureFixture
 from aea.configurations.data_types import PublicId
 from aea.protocols.base import Message
 
+from packages.valory.connections.abci.connection import get_direct_handler
+from packages.valory.connections.abci.tendermint.abci.types_pb2 import (  # type: ignore
+    Request,
+)
+from packages.valory.connections.abci.tendermint_encoder import (
+    _TendermintProtocolEncoder,
+)
 from packages.valory.protocols.abci import AbciMessage
 from packages.valory.protocols.abci.custom_types import (
     CheckTxType,
@@ -42,6 +49,8 @@ from packages.valory.protocols.abci.custom_types import (
     Evidences,
     Header,
     LastCommitInfo,
+    ResultType,
+    Snapshot,
     Timestamp,
     ValidatorUpdates,
 )
@@ -55,6 +64,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     OK_CODE,
     SignatureNotValidError,
     TransactionNotValidError,
+    VerifiedTransactionCache,
 )
 from packages.valory.skills.abstract_round_abci.dialogues import (
     AbciDialogue,
@@ -65,11 +75,19 @@ from packages.valory.skills.abstract_round_abci.dialogues import (
 from packages.valory.skills.abstract_round_abci.handlers import (
     ABCIRoundHandler,
     AbstractResponseHandler,
+    ApplySnapshotChunkResult,
     TendermintHandler,
     Transaction,
     exception_to_info_msg,
 )
+from packages.valory.skills.abstract_round_abci.metrics import AbciAppMetrics
 from packages.valory.skills.abstract_round_abci.models import TendermintRecoveryParams
+from packages.valory.skills.abstract_round_abci.persistence import (
+    AppSnapshot,
+    SNAPSHOT_FORMAT,
+    SnapshotError,
+    SnapshotStore,
+)
 from packages.valory.skills.abstract_round_abci.test_tools.rounds import DummyRound
 
 
@@ -150,6 +168,7 @@ class TestABCIRoundHandler:
             cast(AbciMessage, message), cast(AbciDialogue, dialogue)
         )
         assert response.performative == AbciMessage.Performative.RESPONSE_BEGIN_BLOCK
+        self.context.state.confirm_restored_snapshot.assert_called_once()
 
     @mock.patch.object(handlers, "Transaction")
     def test_check_tx(self, *_: Any) -> None:
@@ -166,6 +185,38 @@ class TestABCIRoundHandler:
         assert response.performative == AbciMessage.Performative.RESPONSE_CHECK_TX
         assert response.code == OK_CODE
 
+    @pytest.mark.parametrize("round_changed", (False, True))
+    def test_verified_tx_cache(self, round_changed: bool) -> None:
+        """Test that a transaction checked in the current round is not decoded and verified again when delivered."""
+        self.context.state.round_sequence.current_round_height = 1
+        check_tx, check_tx_dialogue = self.dialogues.create(
+            counterparty="",
+            performative=AbciMessage.Performative.REQUEST_CHECK_TX,
+            tx=b"tx",
+            type=CheckTxType(CheckTxTypeEnum.NEW),
+        )
+        deliver_tx, deliver_tx_dialogue = self.dialogues.create(
+            counterparty="",
+            performative=AbciMessage.Performative.REQUEST_DELIVER_TX,
+            tx=b"tx",
+        )
+        with mock.patch.object(handlers, "Transaction") as transaction_mock:
+            self.handler.check_tx(
+                cast(AbciMessage, check_tx), cast(AbciDialogue, check_tx_dialogue)
+            )
+            if round_changed:
+                self.context.state.round_sequence.current_round_height = 2
+            response = self.handler.deliver_tx(
+                cast(AbciMessage, deliver_tx), cast(AbciDialogue, deliver_tx_dialogue)
+            )
+
+        assert response.code == OK_CODE
+        expected_n_decodings = 2 if round_changed else 1
+        assert transaction_mock.decode.call_count == expected_n_decodings
+        decoded = transaction_mock.decode.return_value
+        assert decoded.verify.call_count == expected_n_decodings
+        self.context.state.round_sequence.deliver_tx.assert_called_with(decoded)
+
     @mock.patch.object(
         Transaction,
         "decode",
@@ -277,6 +328,19 @@ class TestABCIRoundHandler:
         )
         assert response.performative == AbciMessage.Performative.RESPONSE_COMMIT
 
+    @pytest.mark.parametrize("retain_height", (0, 42))
+    def test_commit_retain_height(self, retain_height: int) -> None:
+        """Test that the 'commit' handler method returns the retain height of the round sequence."""
+        self.context.state.round_sequence.retain_height = retain_height
+        message, dialogue = self.dialogues.create(
+            counterparty="",
+            performative=AbciMessage.Performative.REQUEST_COMMIT,
+        )
+        response = self.handler.commit(
+            cast(AbciMessage, message), cast(AbciDialogue, dialogue)
+        )
+        assert response.retain_height == retain_height
+
     def test_commit_negative(self) -> None:
         """Test the 'commit' handler method, negative case."""
         self.context.state.round_sequence.commit.side_effect = AddBlockError()
@@ -289,6 +353,321 @@ class TestABCIRoundHandler:
                 cast(AbciMessage, message), cast(AbciDialogue, dialogue)
             )
 
+    def _request(self, performative: AbciMessage.Performative, **kwargs: Any) -> Any:
+        """Send a request to the handler and get its response."""
+        message, dialogue = self.dialogues.create(
+            counterparty="", performative=performative, **kwargs
+        )
+        handler_method = getattr(self.handler, performative.value[len("request_") :])
+        return handler_method(cast(AbciMessage, message), cast(AbciDialogue, dialogue))
+
+    def _offered_snapshot(self) -> AppSnapshot:
+        """Persist a snapshot to the store of the handler's round sequence and get it."""
+        snapshot = AppSnapshot(
+            height=10,
+            app_hash="ab" * 32,
+            db=json.dumps(
+                {"db_data": {"0": {"test": [0] * 100}}, "slashing_config": ""}
+            ),
+            round_count=5,
+            current_round_id="round",
+            last_round_id=None,
+            current_round_height=2,
+            timestamp=datetime(2023, 1, 1).isoformat(),
+        )
+        store = SnapshotStore(":memory:")
+        store.save(snapshot)
+        self.context.state.round_sequence.snapshot_store = store
+        return snapshot
+
+    def test_state_sync(self) -> None:
+        """Test that a node state syncs from the snapshots offered by another node."""
+        snapshot = self._offered_snapshot()
+        self.handler.snapshot_chunk_size = 64
+        response = self._request(AbciMessage.Performative.REQUEST_LIST_SNAPSHOTS)
+        (offered,) = response.snapshots.snapshots
+        assert offered.height == snapshot.height
+        assert offered.format_ == SNAPSHOT_FORMAT
+        assert offered.chunks > 1
+        chunks = [
+            self._request(
+                AbciMessage.Performative.REQUEST_LOAD_SNAPSHOT_CHUNK,
+                height=offered.height,
+                format=offered.format_,
+                chunk_index=index,
+            ).chunk
+            for index in range(offered.chunks)
+        ]
+        assert b"".join(chunks).decode() == snapshot.serialize()
+
+        # a new node which state syncs
+        self.setup()
+        self.context.state.round_sequence.snapshot_store = None
+        response = self._request(
+            AbciMessage.Performative.REQUEST_APPLY_SNAPSHOT_CHUNK,
+            index=0,
+            chunk=chunks[0],
+            chunk_sender="sender",
+        )
+        assert response.result == ApplySnapshotChunkResult.ABORT.to_result()
+
+        response = self._request(
+            AbciMessage.Performative.REQUEST_OFFER_SNAPSHOT,
+            snapshot=offered,
+            app_hash=bytes.fromhex(snapshot.app_hash),
+        )
+        assert response.result.result_type == ResultType.ACCEPT
+
+        for index, chunk in enumerate(chunks):
+            # a corrupted chunk is fetched again from another sender
+            response = self._request(
+                AbciMessage.Performative.REQUEST_APPLY_SNAPSHOT_CHUNK,
+                index=index,
+                chunk=chunk[::-1],
+                chunk_sender="malicious",
+            )
+            assert response.result == ApplySnapshotChunkResult.RETRY.to_result()
+            assert response.refetch_chunks == (index,)
+            assert response.reject_senders == ("malicious",)
+
+            self.context.state.round_sequence.restore.assert_not_called()
+            response = self._request(
+                AbciMessage.Performative.REQUEST_APPLY_SNAPSHOT_CHUNK,
+                index=index,
+                chunk=chunk,
+                chunk_sender="sender",
+            )
+            assert response.result == ApplySnapshotChunkResult.ACCEPT.to_result()
+
+        self.context.state.round_sequence.restore.assert_called_once_with(snapshot)
+
+    @pytest.mark.parametrize(
+        "format_, n_chunks, expected_result",
+        (
+            (SNAPSHOT_FORMAT + 1, 1, ResultType.REJECT_FORMAT),
+            (SNAPSHOT_FORMAT, 2, ResultType.REJECT),
+        ),
+    )
+    def test_offer_snapshot_rejected(
+        self, format_: int, n_chunks: int, expected_result: ResultType
+    ) -> None:
+        """Test that snapshots of other formats or with inconsistent metadata are rejected."""
+        chunks = self._offered_snapshot().to_chunks()
+        offered = Snapshot(10, format_, n_chunks, chunks.hash, chunks.metadata)
+        response = self._request(
+            AbciMessage.Performative.REQUEST_OFFER_SNAPSHOT,
+            snapshot=offered,
+            app_hash=b"",
+        )
+        assert response.result.result_type == expected_result
+
+    @pytest.mark.parametrize("app_hash_matches", (True, False))
+    def test_apply_snapshot_rejected(self, app_hash_matches: bool) -> None:
+        """Test that a snapshot which cannot be restored is rejected."""
+        snapshot = self._offered_snapshot()
+        chunks = snapshot.to_chunks()
+        self.context.state.round_sequence.restore.side_effect = SnapshotError
+        offered = Snapshot(10, SNAPSHOT_FORMAT, 1, chunks.hash, chunks.metadata)
+        app_hash = bytes.fromhex(snapshot.app_hash) if app_hash_matches else b""
+        self._request(
+            AbciMessage.Performative.REQUEST_OFFER_SNAPSHOT,
+            snapshot=offered,
+            app_hash=app_hash,
+        )
+        response = self._request(
+            AbciMessage.Performative.REQUEST_APPLY_SNAPSHOT_CHUNK,
+            index=0,
+            chunk=chunks.chunks[0],
+            chunk_sender="sender",
+        )
+        assert response.result == ApplySnapshotChunkResult.REJECT_SNAPSHOT.to_result()
+        assert self.context.state.round_sequence.restore.called is app_hash_matches
+
+    def test_list_snapshots_chunked_once(self) -> None:
+        """Test that the offered snapshots are split into chunks only once, for all the requests of the other nodes."""
+        self._offered_snapshot()
+        with mock.patch.object(
+            AppSnapshot, "to_chunks", side_effect=AppSnapshot.to_chunks, autospec=True
+        ) as to_chunks:
+            for _ in range(2):
+                response = self._request(
+                    AbciMessage.Performative.REQUEST_LIST_SNAPSHOTS
+                )
+                (offered,) = response.snapshots.snapshots
+                self._request(
+                    AbciMessage.Performative.REQUEST_LOAD_SNAPSHOT_CHUNK,
+                    height=offered.height,
+                    format=offered.format_,
+                    chunk_index=0,
+                )
+        to_chunks.assert_called_once()
+
+    def test_apply_snapshot_chunk_result(self) -> None:
+        """Test that the results of `apply_snapshot_chunk` are sent with the values that Tendermint expects."""
+        assert [
+            result.to_result().result_type.value for result in ApplySnapshotChunkResult
+        ] == list(range(6))
+
+    def test_load_snapshot_chunk_unknown(self) -> None:
+        """Test that an empty chunk is returned for an unknown snapshot."""
+        self._offered_snapshot()
+        for height, format_, index in (
+            (9, SNAPSHOT_FORMAT, 0),
+            (10, 0, 0),
+            (10, SNAPSHOT_FORMAT, 1),
+        ):
+            response = self._request(
+                AbciMessage.Performative.REQUEST_LOAD_SNAPSHOT_CHUNK,
+                height=height,
+                format=format_,
+                chunk_index=index,
+            )
+            assert response.chunk == b""
+
+    def test_setup_registers_direct_handler(self) -> None:
+        """Test that the handler is registered as the direct handler of the ABCI connection while it is set up."""
+        self.handler.setup()
+        direct_handler = get_direct_handler(
+            self.context.agent_address, self.context.skill_id
+        )
+        assert direct_handler == self.handler.dispatch
+        self.handler.teardown()
+        assert (
+            get_direct_handler(self.context.agent_address, self.context.skill_id)
+            is None
+        )
+
+    @pytest.mark.parametrize("valid", (True, False))
+    @pytest.mark.parametrize(
+        "request_type, kwargs",
+        (
+            ("check_tx", dict(tx=b"tx", type=CheckTxType(CheckTxTypeEnum.NEW))),
+            ("deliver_tx", dict(tx=b"tx")),
+            ("end_block", dict(height=3)),
+            ("commit", {}),
+            ("flush", {}),
+            ("echo", dict(message="echo")),
+        ),
+    )
+    def test_dispatch(
+        self, request_type: str, kwargs: Dict[str, Any], valid: bool
+    ) -> None:
+        """Test that the requests dispatched directly are answered as their messages would be."""
+        self.context.state.round_sequence.retain_height = 1
+        side_effect = None if valid else SignatureNotValidError("invalid")
+        with mock.patch.object(Transaction, "decode", side_effect=side_effect):
+            response = self._request(
+                AbciMessage.Performative(f"request_{request_type}"), **kwargs
+            )
+            request = Request()
+            getattr(request, request_type).SetInParent()
+            for name, value in kwargs.items():
+                if name != "type":
+                    setattr(getattr(request, request_type), name, value)
+            direct_responses = self.handler.dispatch([request])
+
+        assert direct_responses == [_TendermintProtocolEncoder.process(response)]
+
+    def test_dispatch_begin_block(self) -> None:
+        """Test that a 'begin_block' request dispatched directly confirms the restored snapshot and begins the block."""
+        request = Request()
+        request.begin_block.header.chain_id = "chain_id"
+        request.begin_block.header.height = 2
+        request.begin_block.header.time.seconds = 1
+        (direct_response,) = self.handler.dispatch([request])
+
+        assert direct_response.WhichOneof("value") == "begin_block"
+        self.context.state.confirm_restored_snapshot.assert_called_once()
+        begin_block = self.context.state.round_sequence.begin_block
+        begin_block.assert_called_once()
+        header, evidences, last_commit_info = begin_block.call_args.args
+        assert (header.chain_id, header.height) == ("chain_id", 2)
+        assert header.time == Timestamp(1, 0)
+        assert evidences.byzantine_validators == []
+        assert last_commit_info.votes == []
+
+    def test_dispatch_not_answered(self) -> None:
+        """Test that the requests which are not sent for every block are not answered directly, nor the next ones."""
+        echo, info = Request(), Request()
+        echo.echo.message = "echo"
+        info.info.version = "version"
+        responses = self.handler.dispatch([echo, info, echo])
+        assert [response.echo.message for response in responses] == ["echo"]
+
+    def test_dispatch_verifies_transactions_in_batch(self) -> None:
+        """Test that the transactions of the requests dispatched together are verified in a batch beforehand."""
+        self.context.state.round_sequence.current_round_height = 1
+        requests = []
+        for request_type, tx in (
+            ("check_tx", b"tx_0"),
+            ("deliver_tx", b"tx_1"),
+            ("deliver_tx", b"tx_2"),
+        ):
+            request = Request()
+            getattr(request, request_type).tx = tx
+            requests.append(request)
+        transaction = MagicMock()
+        with mock.patch.object(
+            VerifiedTransactionCache, "verify_batch"
+        ) as verify_batch, mock.patch.object(
+            VerifiedTransactionCache, "get", return_value=transaction
+        ), mock.patch.object(
+            Transaction, "decode"
+        ) as decode:
+            responses = self.handler.dispatch(requests)
+            # a single transaction is not worth a batch
+            self.handler.dispatch(requests[:1])
+
+        verify_batch.assert_called_once_with(
+            [b"tx_0", b"tx_1", b"tx_2"],
+            self.context.default_ledger_id,
+            self.context.state.tx_verification_executor,
+        )
+        decode.assert_not_called()
+        assert [response.WhichOneof("value") for response in responses] == [
+            "check_tx",
+            "deliver_tx",
+            "deliver_tx",
+        ]
+
+    def test_metrics(self) -> None:
+        """Test that the answered requests and the committed blocks are recorded in the metrics."""
+        metrics = self.context.state.metrics = AbciAppMetrics()
+        round_sequence = self.context.state.round_sequence
+        round_sequence.height = 5
+        round_sequence.current_round_height = 1
+        round_sequence.current_round_id = "round_b"
+        round_sequence.abci_app.timeout_stats = {"size": 2}
+        round_sequence.abci_app.synchronized_data.db.size = 7
+        self.context.abci_dialogues.n_live_dialogues = 3
+
+        def transition() -> None:
+            """Transition to the next round on commit."""
+            round_sequence.current_round_height = 2
+
+        round_sequence.commit.side_effect = transition
+        message, _ = self.dialogues.create(
+            counterparty="", performative=AbciMessage.Performative.REQUEST_COMMIT
+        )
+        self.handler.handle(cast(AbciMessage, message))
+        request = Request()
+        request.commit.SetInParent()
+        self.handler.dispatch([request])
+        request.info.version = "version"
+        self.handler.dispatch([request])
+
+        assert metrics.abci_requests.get("commit") == 2
+        assert metrics.abci_request_duration.get_count("commit") == 2
+        assert metrics.abci_requests.get("info") == 0
+        assert metrics.commit_duration.get_count() == 2
+        assert metrics.app_hash_duration.get_count() == 2
+        assert metrics.height.get() == 5
+        # the round only changed on the first commit
+        assert metrics.round_transitions.get("round_b") == 1
+        assert metrics.pending_timeouts.get() == 2
+        assert metrics.db_values.get() == 7
+        assert metrics.live_dialogues.get() == 3
+
 
 class ConcreteResponseHandler(AbstractResponseHandler):
     """A concrete response handler for testing purposes."""
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the metrics.py module of the skill."""
+
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from packages.valory.skills.abstract_round_abci.metrics import (
+    AbciAppMetrics,
+    Counter,
+    DEFAULT_METRICS_HOST,
+    Gauge,
+    Histogram,
+    METRICS_CONTENT_TYPE,
+    METRICS_PATH,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+class TestMetrics:
+    """Test the metrics and their rendering in the Prometheus text format."""
+
+    def test_counter(self) -> None:
+        """Test that a counter is incremented per labels."""
+        counter = Counter("requests_total", "The requests.", ("type",))
+        counter.inc("commit")
+        counter.inc("commit", amount=2)
+        counter.inc('say "hi"\n')
+        assert counter.get("commit") == 3
+        assert counter.get("info") == 0
+        assert counter.render() == [
+            "# HELP requests_total The requests.",
+            "# TYPE requests_total counter",
+            'requests_total{type="commit"} 3.0',
+            'requests_total{type="say \\"hi\\"\\n"} 1.0',
+        ]
+
+    def test_gauge(self) -> None:
+        """Test that a gauge keeps the last value set."""
+        gauge = Gauge("height", "The height.")
+        assert gauge.get() is None
+        assert gauge.render() == ["# HELP height The height.", "# TYPE height gauge"]
+        gauge.set(3)
+        gauge.set(2)
+        assert gauge.get() == 2
+        assert gauge.render()[2:] == ["height 2"]
+
+    def test_histogram(self) -> None:
+        """Test that the observations of a histogram are rendered in cumulative buckets."""
+        histogram = Histogram("latency", "The latency.", ("type",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, "commit")
+        assert histogram.get_count("commit") == 4
+        assert histogram.get_count("info") == 0
+        assert histogram.render()[2:] == [
+            'latency_bucket{type="commit",le="0.1"} 2',
+            'latency_bucket{type="commit",le="1.0"} 3',
+            'latency_bucket{type="commit",le="+Inf"} 4',
+            'latency_sum{type="commit"} 3.65',
+            'latency_count{type="commit"} 4',
+        ]
+
+    def test_histogram_buckets_incorrect(self) -> None:
+        """Test that the buckets of a histogram need to be increasing."""
+        with pytest.raises(ValueError, match="must be increasing"):
+            Histogram("latency", "The latency.", buckets=(1, 0.1))
+
+    def test_labels_incorrect(self) -> None:
+        """Test that a value needs to be given for each label of a metric."""
+        with pytest.raises(ValueError, match="expects values for the labels"):
+            Counter("requests_total", "The requests.", ("type",)).inc()
+
+    def test_registry(self) -> None:
+        """Test that the metrics of a registry are rendered together, and that their names are unique."""
+        registry = MetricsRegistry()
+        registry.register(Gauge("height", "The height.")).set(1)
+        with pytest.raises(ValueError, match="already registered"):
+            registry.register(Counter("height", "The height."))
+        assert registry.render() == (
+            "# HELP height The height.\n# TYPE height gauge\nheight 1\n"
+        )
+
+    def test_abci_app_metrics(self) -> None:
+        """Test that all the metrics of the ABCI app are rendered."""
+        rendered = AbciAppMetrics().render()
+        for name in (
+            "abci_requests_total",
+            "abci_request_duration_seconds",
+            "abci_commit_duration_seconds",
+            "abci_app_hash_duration_seconds",
+            "round_sequence_height",
+            "round_sequence_round_transitions_total",
+            "abci_app_pending_timeouts",
+            "abci_app_db_values",
+            "abci_live_dialogues",
+            "behaviour_tick_duration_seconds",
+            "behaviour_outstanding_requests",
+        ):
+            assert f"# TYPE {name} " in rendered
+
+
+class TestMetricsServer:
+    """Test the `MetricsServer`."""
+
+    def test_serve(self) -> None:
+        """Test that the metrics are served on their path only, until the server is stopped."""
+        metrics = AbciAppMetrics()
+        server = MetricsServer(metrics, port=0)
+        server.start()
+        server.start()
+        url = f"http://{DEFAULT_METRICS_HOST}:{server.port}"
+        try:
+            metrics.height.set(42)
+            with urlopen(url + METRICS_PATH) as response:  # nosec
+                assert response.headers["Content-Type"] == METRICS_CONTENT_TYPE
+                assert response.read().decode() == metrics.render()
+            with pytest.raises(HTTPError, match="404"):
+                urlopen(url + "/other")  # nosec
+        finally:
+            server.stop()
+        assert not server.is_running
+        server.stop()
@@ -26,7 +26,9 @@ import json
 import logging
 import re
 from collections import OrderedDict
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -34,18 +36,26 @@ from time import sleep
 from typing import Any, Dict, List, Optional, Set, Tuple, Type, cast
 from unittest import mock
 from unittest.mock import MagicMock
+from urllib.request import urlopen
 
 import pytest
 from aea.exceptions import AEAEnforceError
+from aea_ledger_ethereum import EthereumCrypto
 from typing_extensions import Literal, TypedDict
 
 from packages.valory.skills.abstract_round_abci.base import (
     AbstractRound,
+    AppHashMode,
     BaseSynchronizedData,
     OffenceStatus,
     OffenseStatusEncoder,
     ROUND_COUNT_DEFAULT,
 )
+from packages.valory.skills.abstract_round_abci.metrics import (
+    DEFAULT_METRICS_HOST,
+    METRICS_PATH,
+    MetricsServer,
+)
 from packages.valory.skills.abstract_round_abci.models import (
     ApiSpecs,
     BaseParams,
@@ -68,6 +78,7 @@ from packages.valory.skills.abstract_round_abci.models import (
     _MetaSharedState,
     check_type,
 )
+from packages.valory.skills.abstract_round_abci.persistence import SnapshotStore
 from packages.valory.skills.abstract_round_abci.test_tools.abci_app import AbciAppTest
 from packages.valory.skills.abstract_round_abci.tests.conftest import (
     irrelevant_genesis_config,
@@ -385,8 +396,20 @@ class TestSharedState:
         SharedState(name="", skill_context=MagicMock())
 
     @staticmethod
-    def dummy_state_setup(shared_state: SharedState) -> None:
+    def dummy_state_setup(
+        shared_state: SharedState,
+        db_snapshots_path: Optional[str] = None,
+        metrics_port: Optional[int] = None,
+        tx_verification_workers: Optional[int] = None,
+        prune_tendermint_blocks: bool = False,
+    ) -> None:
         """Setup a shared state instance with dummy params."""
+        shared_state.context.params.block_retention = None
+        shared_state.context.params.prune_tendermint_blocks = prune_tendermint_blocks
+        shared_state.context.params.db_snapshots_path = db_snapshots_path
+        shared_state.context.params.metrics_port = metrics_port
+        shared_state.context.params.metrics_host = DEFAULT_METRICS_HOST
+        shared_state.context.params.tx_verification_workers = tx_verification_workers
         shared_state.context.params.setup_params = {
             "test": [],
             "all_participants": list(range(4)),
@@ -474,6 +497,114 @@ class TestSharedState:
         self.dummy_state_setup(shared_state)
         assert shared_state.initial_tm_configs == {i: None for i in range(4)}
 
+    def test_setup_from_snapshot(self, tmp_path: Path, *_: Any) -> None:
+        """Test that the setup resumes from the latest persisted snapshot."""
+        db_snapshots_path = str(tmp_path / "snapshots.db")
+        shared_state = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(shared_state, db_snapshots_path)
+        assert shared_state.round_sequence.height == 0
+
+        shared_state.round_sequence.abci_app._last_timestamp = datetime.now()
+        snapshot = replace(
+            shared_state.round_sequence.snapshot(),
+            height=10,
+            current_round_height=3,
+        )
+        store = SnapshotStore(db_snapshots_path)
+        store.save(snapshot)
+        store.close()
+
+        restarted = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(restarted, db_snapshots_path)
+        assert restarted.round_sequence.height == 10
+        assert restarted.round_sequence.current_round_height == 3
+        assert restarted.round_sequence.root_hash.hex() == snapshot.app_hash
+
+        # the snapshot is kept if the Tendermint node holds the blocks up to it, e.g., after a restart
+        restarted.check_restored_snapshot(10)
+        restarted.check_restored_snapshot(0)
+        assert restarted.round_sequence.height == 10
+
+        # the snapshot is kept if the node is behind it, but prunes its blocks, so the chain cannot be replayed
+        pruned = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(pruned, db_snapshots_path, prune_tendermint_blocks=True)
+        pruned.check_restored_snapshot(0)
+        assert pruned.round_sequence.height == 10
+        assert SnapshotStore(db_snapshots_path).latest() == snapshot
+
+        # the snapshot is discarded if the node is behind it, e.g., as its data were wiped
+        wiped = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(wiped, db_snapshots_path)
+        wiped.check_restored_snapshot(9)
+        assert wiped.round_sequence.height == 0
+        assert wiped.round_sequence.snapshot_store is not None
+        assert wiped.round_sequence.snapshot_store.latest() is None
+        wiped.check_restored_snapshot(0)
+        assert wiped.round_sequence.height == 0
+
+        # a snapshot which cannot be restored is discarded
+        store = SnapshotStore(db_snapshots_path)
+        store.save(replace(snapshot, height=11, app_hash="00"))
+        store.close()
+        discarded = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(discarded, db_snapshots_path)
+        assert discarded.round_sequence.height == 0
+        assert SnapshotStore(db_snapshots_path).latest() is None
+
+    def test_setup_metrics_server(self, *_: Any) -> None:
+        """Test that the metrics are served if a metrics port is configured, until the teardown."""
+        shared_state = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(shared_state, metrics_port=0)
+        server = cast(MetricsServer, shared_state._metrics_server)
+        assert server.is_running
+        shared_state.metrics.height.set(3)
+        url = f"http://{DEFAULT_METRICS_HOST}:{server.port}{METRICS_PATH}"
+        with urlopen(url) as response:  # nosec
+            assert "round_sequence_height 3" in response.read().decode()
+
+        # another agent cannot serve its metrics on the same port
+        other = SharedState(
+            name="", skill_context=MagicMock(is_abstract_component=False)
+        )
+        self.dummy_state_setup(other, metrics_port=server.port)
+        assert other._metrics_server is None
+        cast(MagicMock, other.context.logger).warning.assert_called_once()
+
+        shared_state.teardown()
+        assert shared_state._metrics_server is None
+        assert not server.is_running
+
+    def test_setup_tx_verification_workers(self, *_: Any) -> None:
+        """Test that the transactions are verified on worker processes if configured, until the teardown."""
+        skill_context = MagicMock(
+            is_abstract_component=False, default_ledger_id=EthereumCrypto.identifier
+        )
+        shared_state = SharedState(name="", skill_context=skill_context)
+        self.dummy_state_setup(shared_state)
+        assert shared_state.tx_verification_executor is None
+
+        self.dummy_state_setup(shared_state, tx_verification_workers=1)
+        executor = cast(ProcessPoolExecutor, shared_state.tx_verification_executor)
+        assert executor.submit(str, 3).result() == "3"
+        assert len(shared_state._tx_verification_warmups) == 1
+        shared_state.teardown()
+        assert not shared_state._tx_verification_warmups
+        assert shared_state.tx_verification_executor is None
+        with pytest.raises(RuntimeError, match="shutdown"):
+            executor.submit(str, 3)
+
     @pytest.mark.parametrize(
         "initial_tm_configs, address_input, exception, expected",
         (
@@ -521,6 +652,10 @@ class TestSharedState:
         """Test `get_validator_address` method."""
         shared_state = SharedState(name="", skill_context=MagicMock())
         with mock.patch.object(shared_state.context, "params") as mock_params:
+            mock_params.block_retention = None
+            mock_params.db_snapshots_path = None
+            mock_params.metrics_port = None
+            mock_params.tx_verification_workers = None
             mock_params.setup_params = {
                 "all_participants": ["0x0"],
             }
@@ -552,6 +687,10 @@ class TestSharedState:
     def test_synchronized_data_positive(self, *_: Any) -> None:
         """Test 'synchronized_data' property getter, negative case (not available)."""
         shared_state = SharedState(name="", skill_context=MagicMock())
+        shared_state.context.params.block_retention = None
+        shared_state.context.params.db_snapshots_path = None
+        shared_state.context.params.metrics_port = None
+        shared_state.context.params.tx_verification_workers = None
         shared_state.context.params.setup_params = {
             "test": [],
             "all_participants": [["0x0"]],
@@ -564,6 +703,10 @@ class TestSharedState:
         """Test 'synchronized_data' AbciAppDB."""
         shared_state = SharedState(name="", skill_context=MagicMock())
         with mock.patch.object(shared_state.context, "params") as mock_params:
+            mock_params.block_retention = None
+            mock_params.db_snapshots_path = None
+            mock_params.metrics_port = None
+            mock_params.tx_verification_workers = None
             mock_params.setup_params = {
                 "safe_contract_address": "0xsafe",
                 "oracle_contract_address": "0xoracle",
@@ -598,6 +741,10 @@ class TestSharedState:
         shared_state = SharedState(
             abci_app_cls=AbciAppTest, name="", skill_context=MagicMock()
         )
+        shared_state.context.params.block_retention = None
+        shared_state.context.params.db_snapshots_path = None
+        shared_state.context.params.metrics_port = None
+        shared_state.context.params.tx_verification_workers = None
         shared_state.context.params.setup_params = {
             "test": [],
             "all_participants": ["0x0"],
@@ -704,6 +851,110 @@ def test_base_params_model_initialization() -> None:
     BaseParams(**kwargs)
 
 
+@pytest.mark.parametrize(
+    "app_hash_mode, expected",
+    (
+        (None, AppHashMode.LEGACY),
+        ("legacy", AppHashMode.LEGACY),
+        ("merkle", AppHashMode.MERKLE),
+    ),
+)
+def test_base_params_app_hash_mode(
+    app_hash_mode: Optional[str], expected: AppHashMode
+) -> None:
+    """Test the optional `app_hash_mode` of the 'BaseParams(Model)' class."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    if app_hash_mode is not None:
+        kwargs["app_hash_mode"] = app_hash_mode
+    assert BaseParams(**kwargs).app_hash_mode == expected
+
+
+def test_base_params_app_hash_mode_incorrect() -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `app_hash_mode`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["app_hash_mode"] = "incorrect"
+    with pytest.raises(ValueError, match="'incorrect' is not a valid AppHashMode"):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("block_retention", (None, 1, 100))
+@pytest.mark.parametrize("prune_tendermint_blocks", (None, False, True))
+def test_base_params_block_retention(
+    block_retention: Optional[int], prune_tendermint_blocks: Optional[bool]
+) -> None:
+    """Test the optional block retention params of the 'BaseParams(Model)' class."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    if block_retention is not None:
+        kwargs["block_retention"] = block_retention
+    if prune_tendermint_blocks is not None:
+        kwargs["prune_tendermint_blocks"] = prune_tendermint_blocks
+    params = BaseParams(**kwargs)
+    assert params.block_retention == block_retention
+    assert params.prune_tendermint_blocks is bool(prune_tendermint_blocks)
+
+
+@pytest.mark.parametrize("block_retention", (0, -1, "100"))
+def test_base_params_block_retention_incorrect(block_retention: Any) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `block_retention`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["block_retention"] = block_retention
+    with pytest.raises(AEAEnforceError, match="'block_retention' must be a positive"):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("prune_tendermint_blocks", (1, "True"))
+def test_base_params_prune_tendermint_blocks_incorrect(
+    prune_tendermint_blocks: Any,
+) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `prune_tendermint_blocks`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["prune_tendermint_blocks"] = prune_tendermint_blocks
+    with pytest.raises(AEAEnforceError, match="'prune_tendermint_blocks' must be a"):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("compact_transactions", (1, "True"))
+def test_base_params_compact_transactions_incorrect(compact_transactions: Any) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `compact_transactions`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["compact_transactions"] = compact_transactions
+    with pytest.raises(AEAEnforceError, match="'compact_transactions' must be a"):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("tx_verification_workers", (0, -1, "4"))
+def test_base_params_tx_verification_workers_incorrect(
+    tx_verification_workers: Any,
+) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `tx_verification_workers`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["tx_verification_workers"] = tx_verification_workers
+    with pytest.raises(
+        AEAEnforceError, match="'tx_verification_workers' must be a positive"
+    ):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("db_snapshots_path", (1, True))
+def test_base_params_db_snapshots_path_incorrect(db_snapshots_path: Any) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `db_snapshots_path`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["db_snapshots_path"] = db_snapshots_path
+    with pytest.raises(AEAEnforceError, match="'db_snapshots_path' must be a"):
+        BaseParams(**kwargs)
+
+
+@pytest.mark.parametrize("db_snapshots_interval", (0, -1, "1"))
+def test_base_params_db_snapshots_interval_incorrect(
+    db_snapshots_interval: Any,
+) -> None:
+    """Test the 'BaseParams(Model)' class with an incorrect `db_snapshots_interval`."""
+    kwargs = BASE_DUMMY_PARAMS.copy()
+    kwargs["db_snapshots_interval"] = db_snapshots_interval
+    with pytest.raises(AEAEnforceError, match="'db_snapshots_interval' must be a"):
+        BaseParams(**kwargs)
+
+
 @pytest.mark.parametrize(
     "setup, error_text",
     (
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the persistence.py module of the skill."""
+
+import datetime
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict
+from unittest import mock
+
+import pytest
+
+from packages.valory.skills.abstract_round_abci.persistence import (
+    AppSnapshot,
+    MAX_SNAPSHOT_CLOCK_DRIFT,
+    SnapshotAssembler,
+    SnapshotError,
+    SnapshotStore,
+)
+
+
+SNAPSHOT = AppSnapshot(
+    height=1,
+    app_hash="00",
+    db='{"db_data": {"0": {}}, "slashing_config": ""}',
+    round_count=0,
+    current_round_id="round",
+    last_round_id=None,
+    current_round_height=0,
+    timestamp=datetime.datetime(2023, 1, 1).isoformat(),
+    validator_to_agent={"validator": "agent"},
+)
+
+
+class TestAppSnapshot:
+    """Test the `AppSnapshot` class."""
+
+    def test_serialization(self) -> None:
+        """Test that a snapshot can be serialized and deserialized."""
+        assert AppSnapshot.deserialize(SNAPSHOT.serialize()) == SNAPSHOT
+        assert SNAPSHOT.block_timestamp == datetime.datetime(2023, 1, 1)
+
+    @pytest.mark.parametrize("serialized", ("not json", '{"height": 1}', "[]"))
+    def test_deserialize_incorrect(self, serialized: str) -> None:
+        """Test that deserializing an invalid snapshot raises."""
+        with pytest.raises(SnapshotError, match="Could not deserialize snapshot"):
+            AppSnapshot.deserialize(serialized)
+
+    @pytest.mark.parametrize(
+        "changes, match",
+        (
+            ({"height": "1"}, "the field 'height' has an invalid value '1'"),
+            ({"round_count": True}, "the field 'round_count' has an invalid value"),
+            ({"last_round_id": 1}, "the field 'last_round_id' has an invalid value"),
+            ({"validator_to_agent": []}, "'validator_to_agent' has an invalid value"),
+            ({"current_round_height": -1}, "the heights cannot be negative"),
+            ({"validator_to_agent": {"validator": 1}}, "must be mapped to agent"),
+            (
+                {"slashing_enabled": True, "validator_to_agent": {}},
+                "slashing cannot be enabled without a mapping of the validators",
+            ),
+            ({"timestamp": "yesterday"}, "Invalid isoformat string"),
+        ),
+    )
+    def test_deserialize_invalid_fields(self, changes: Dict, match: str) -> None:
+        """Test that a snapshot with invalid fields, e.g., sent by another node, cannot be deserialized."""
+        invalid = replace(SNAPSHOT, **changes)
+        with pytest.raises(SnapshotError, match=match):
+            AppSnapshot.deserialize(invalid.serialize())
+
+    def test_deserialize_future_timestamp(self) -> None:
+        """Test that a snapshot with a timestamp beyond the allowed clock drift cannot be deserialized."""
+        timestamp = datetime.datetime.now() + MAX_SNAPSHOT_CLOCK_DRIFT * 2
+        invalid = replace(SNAPSHOT, timestamp=timestamp.isoformat())
+        with pytest.raises(SnapshotError, match="is in the future"):
+            AppSnapshot.deserialize(invalid.serialize())
+
+    def test_timestamp_time_zone(self) -> None:
+        """Test that the timestamp of a snapshot taken in another time zone is restored as a local time."""
+        local = datetime.datetime(2023, 1, 1)
+        utc = local.astimezone(datetime.timezone.utc)
+        assert utc.tzinfo is not None
+        snapshot = replace(SNAPSHOT, timestamp=utc.isoformat())
+        assert AppSnapshot.deserialize(snapshot.serialize()).block_timestamp == local
+
+
+class TestSnapshotAssembler:
+    """Test the `SnapshotAssembler` class."""
+
+    def test_assemble(self) -> None:
+        """Test that a snapshot is assembled back from its chunks, in any order."""
+        chunks = SNAPSHOT.to_chunks(chunk_size=16)
+        assert len(chunks.chunks) > 1
+        assembler = SnapshotAssembler(
+            chunks.height, len(chunks.chunks), chunks.hash, chunks.metadata
+        )
+        for index, chunk in reversed(list(enumerate(chunks.chunks))):
+            assert not assembler.is_complete
+            assert not assembler.add_chunk(index, chunk + b"0")
+            assert assembler.add_chunk(index, chunk)
+        assert not assembler.add_chunk(len(chunks.chunks), b"")
+        assert assembler.is_complete
+        assert assembler.assemble() == SNAPSHOT
+
+    def test_metadata_incorrect(self) -> None:
+        """Test that the metadata need to contain the hash of each chunk."""
+        chunks = SNAPSHOT.to_chunks()
+        with pytest.raises(SnapshotError, match="do not match its 2 chunks"):
+            SnapshotAssembler(chunks.height, 2, chunks.hash, chunks.metadata)
+
+    def test_assemble_incomplete(self) -> None:
+        """Test that a snapshot cannot be assembled before all its chunks arrive."""
+        chunks = SNAPSHOT.to_chunks()
+        assembler = SnapshotAssembler(chunks.height, 1, chunks.hash, chunks.metadata)
+        with pytest.raises(SnapshotError, match="before receiving all its chunks"):
+            assembler.assemble()
+
+    @pytest.mark.parametrize(
+        "height, hash_matches, match",
+        ((1, False, "does not match its hash"), (2, True, "was taken at height 1")),
+    )
+    def test_assemble_incorrect(
+        self, height: int, hash_matches: bool, match: str
+    ) -> None:
+        """Test that a snapshot which does not match the offer cannot be assembled."""
+        chunks = SNAPSHOT.to_chunks()
+        hash_ = chunks.hash if hash_matches else bytes(len(chunks.hash))
+        assembler = SnapshotAssembler(height, 1, hash_, chunks.metadata)
+        assembler.add_chunk(0, chunks.chunks[0])
+        with pytest.raises(SnapshotError, match=match):
+            assembler.assemble()
+
+
+class TestSnapshotStore:
+    """Test the `SnapshotStore` class."""
+
+    def test_save_latest(self, tmp_path: Path) -> None:
+        """Test that only the latest snapshots are kept, and that they survive reopening the store."""
+        path = str(tmp_path / "snapshots.db")
+        store = SnapshotStore(path, snapshots_to_keep=2)
+        assert store.latest() is None
+        for height in (3, 1, 2):
+            store.save(replace(SNAPSHOT, height=height))
+        assert store.latest() == replace(SNAPSHOT, height=3)
+        heights = store._connection.execute("SELECT height FROM snapshots").fetchall()
+        assert sorted(heights) == [(2,), (3,)]
+        assert store.all() == [replace(SNAPSHOT, height=h) for h in (3, 2)]
+        assert store.get(2) == replace(SNAPSHOT, height=2)
+        assert store.get(1) is None
+        store.close()
+
+        store = SnapshotStore(path)
+        assert store.latest() == replace(SNAPSHOT, height=3)
+        store.clear()
+        assert store.latest() is None
+        store.close()
+
+    def test_get_chunks(self) -> None:
+        """Test that each snapshot is split into chunks only once, until it is replaced or dropped."""
+        store = SnapshotStore(":memory:", snapshots_to_keep=2)
+        assert store.get_chunks(1) is None
+        store.save(SNAPSHOT)
+        with mock.patch.object(
+            AppSnapshot, "to_chunks", side_effect=AppSnapshot.to_chunks, autospec=True
+        ) as to_chunks:
+            chunks = store.get_chunks(1, chunk_size=16)
+            assert chunks is not None and len(chunks.chunks) > 1
+            assert store.get_chunks(1, chunk_size=16) is chunks
+            assert to_chunks.call_count == 1
+
+            # a snapshot saved at the same height, e.g., after a chain reset, is split again
+            store.save(replace(SNAPSHOT, round_count=1))
+            assert store.get_chunks(1, chunk_size=16) is not chunks
+            assert to_chunks.call_count == 2
+
+        # the chunks of the dropped snapshots are not kept
+        for height in (2, 3):
+            store.save(replace(SNAPSHOT, height=height))
+            store.get_chunks(height)
+        assert store.heights() == [3, 2]
+        assert [key[0] for key in store._chunks] == [2, 3]
+        store.clear()
+        assert not store._chunks and store.heights() == []
+
+    def test_snapshots_to_keep_incorrect(self) -> None:
+        """Test that at least one snapshot needs to be kept."""
+        with pytest.raises(ValueError, match="At least one snapshot must be kept"):
+            SnapshotStore(":memory:", snapshots_to_keep=0)
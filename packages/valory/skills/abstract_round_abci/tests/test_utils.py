@@ -19,29 +19,42 @@
 
 """Test the utils.py module of the skill."""
 
+import json
+import logging
+import pickle  # nosec
 from collections import defaultdict
+from copy import copy, deepcopy
+from hashlib import sha256
 from string import printable
-from typing import Any, Dict, List, Tuple, Type
+from typing import Any, Callable, Dict, List, Tuple, Type
 from unittest import mock
 
 import pytest
+from _pytest.logging import LogCaptureFixture
 from hypothesis import assume, given, settings
 from hypothesis import strategies as st
 
 from packages.valory.skills.abstract_round_abci.tests.conftest import profile_name
 from packages.valory.skills.abstract_round_abci.utils import (
     DEFAULT_TENDERMINT_P2P_PORT,
+    FrozenDict,
+    FrozenList,
     KeyType,
+    LazyPrettyFormat,
     MAX_UINT64,
+    MerkleTree,
     ValueType,
     VerifyDrand,
     consensus_threshold,
     filter_negative,
+    freeze,
     get_data_from_nested_dict,
     get_value_with_type,
     inverse,
     is_json_serializable,
     is_primitive_or_none,
+    merkle_leaf_hash,
+    merkle_node_hash,
     parse_tendermint_p2p_url,
 )
 
@@ -305,3 +318,135 @@ def test_inverse(
 ) -> None:
     """Test `inverse`."""
     assert inverse(dict_) == expected
+
+
+def test_lazy_pretty_format(caplog: LogCaptureFixture) -> None:
+    """Test that `LazyPrettyFormat` only formats the object if the record is emitted."""
+    obj = {"key": list(range(30))}
+    with mock.patch("pprint.pformat", return_value="formatted") as mock_pformat:
+        with caplog.at_level(logging.INFO):
+            logging.debug("object: %s", LazyPrettyFormat(obj))
+        mock_pformat.assert_not_called()
+        with caplog.at_level(logging.DEBUG):
+            logging.debug("object: %s", LazyPrettyFormat(obj))
+        mock_pformat.assert_called_with(obj)
+    assert "object: formatted" in caplog.text
+
+
+def _naive_merkle_root(leaves: List[bytes]) -> bytes:
+    """Compute a Merkle root recursively, from scratch."""
+    if len(leaves) == 1:
+        return leaves[0]
+    level = [
+        merkle_node_hash(*leaves[i : i + 2]) if i + 1 < len(leaves) else leaves[i]
+        for i in range(0, len(leaves), 2)
+    ]
+    return _naive_merkle_root(level)
+
+
+class TestMerkleTree:
+    """Test `MerkleTree`."""
+
+    def test_empty(self) -> None:
+        """Test the root of an empty tree."""
+        tree = MerkleTree()
+        assert len(tree) == 0
+        assert tree.leaves == ()
+        assert tree.root == sha256(b"").digest()
+
+    def test_domain_separation(self) -> None:
+        """Test that leaves cannot be confused with inner nodes."""
+        left, right = merkle_leaf_hash(b"left"), merkle_leaf_hash(b"right")
+        assert merkle_leaf_hash(left + right) != merkle_node_hash(left, right)
+
+    @given(
+        st.lists(st.binary(), min_size=1, max_size=40),
+        st.lists(st.tuples(st.integers(min_value=0), st.binary()), max_size=10),
+    )
+    def test_incremental(
+        self, data: List[bytes], updates: List[Tuple[int, bytes]]
+    ) -> None:
+        """Test that appending and updating leaves gives the same root as building the tree from scratch."""
+        leaves = [merkle_leaf_hash(item) for item in data]
+        tree = MerkleTree()
+        for i, leaf in enumerate(leaves):
+            tree.append(leaf)
+            assert tree.root == _naive_merkle_root(leaves[: i + 1])
+            assert tree.root == MerkleTree(leaves[: i + 1]).root
+
+        for index, item in updates:
+            index %= len(leaves)
+            leaves[index] = merkle_leaf_hash(item)
+            tree.update(index, leaves[index])
+            assert tree.root == _naive_merkle_root(leaves)
+
+        assert tree.leaves == tuple(leaves)
+        assert len(tree) == len(leaves)
+
+
+class TestFreeze:
+    """Test `freeze` and the frozen containers."""
+
+    value = {"a": [1, {"b": [2, 3]}], "c": (4, [5]), "d": "e"}
+
+    def test_freeze(self) -> None:
+        """Test that the frozen value is equivalent to the original one."""
+        frozen = freeze(self.value)
+        assert isinstance(frozen, FrozenDict)
+        assert isinstance(frozen["a"], FrozenList)
+        assert isinstance(frozen["a"][1], FrozenDict)
+        assert isinstance(frozen["c"], tuple)
+        assert isinstance(frozen["c"][1], FrozenList)
+        assert frozen == self.value
+        assert json.dumps(frozen, sort_keys=True) == json.dumps(
+            self.value, sort_keys=True
+        )
+
+    def test_freeze_frozen(self) -> None:
+        """Test that freezing an already frozen value does not copy it."""
+        frozen = freeze(self.value)
+        assert freeze(frozen) is frozen
+        assert copy(frozen) is frozen
+        assert deepcopy(frozen) is frozen
+
+    def test_pickle(self) -> None:
+        """Test that frozen values can be pickled."""
+        frozen = freeze(self.value)
+        unpickled = pickle.loads(pickle.dumps(frozen))  # nosec
+        assert unpickled == frozen
+        assert isinstance(unpickled, FrozenDict)
+        assert isinstance(unpickled["a"], FrozenList)
+
+    @pytest.mark.parametrize(
+        "mutation",
+        (
+            lambda frozen: frozen.update({"x": 1}),
+            lambda frozen: frozen.setdefault("x", 1),
+            lambda frozen: frozen.pop("a"),
+            lambda frozen: frozen.popitem(),
+            lambda frozen: frozen.clear(),
+            lambda frozen: frozen.__setitem__("a", 1),
+            lambda frozen: frozen.__delitem__("a"),
+            lambda frozen: frozen.__ior__({"x": 1}),
+            lambda frozen: frozen["a"].append(1),
+            lambda frozen: frozen["a"].extend([1]),
+            lambda frozen: frozen["a"].insert(0, 1),
+            lambda frozen: frozen["a"].pop(),
+            lambda frozen: frozen["a"].remove(1),
+            lambda frozen: frozen["a"].clear(),
+            lambda frozen: frozen["a"].sort(),
+            lambda frozen: frozen["a"].reverse(),
+            lambda frozen: frozen["a"].__setitem__(0, 1),
+            lambda frozen: frozen["a"].__delitem__(0),
+            lambda frozen: frozen["a"].__iadd__([1]),
+            lambda frozen: frozen["a"].__imul__(2),
+            lambda frozen: frozen["a"][1].update({"x": 1}),
+            lambda frozen: frozen["c"][1].append(1),
+        ),
+    )
+    def test_immutable(self, mutation: Callable[[Any], Any]) -> None:
+        """Test that the frozen values cannot be modified."""
+        frozen = freeze(self.value)
+        with pytest.raises(TypeError, match="object is immutable"):
+            mutation(frozen)
+        assert frozen == self.value
@@ -22,6 +22,7 @@
 import builtins
 import collections
 import dataclasses
+import pprint
 import sys
 import types
 import typing
@@ -502,3 +503,183 @@ def inverse(dict_: Dict[KeyType, ValueType]) -> Dict[ValueType, List[KeyType]]:
     for key, value in dict_.items():
         inverse_[value].append(key)
     return inverse_
+
+
+class LazyPrettyFormat:  # pylint: disable=too-few-public-methods
+    """
+    Pretty-format an object only when it is converted to a string.
+
+    Passed as an argument of a log call, e.g., `logger.debug("payload: %s", LazyPrettyFormat(payload))`,
+    the object is only formatted if the record is emitted, which is not the case on the hot paths at INFO level.
+    """
+
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj: Any) -> None:
+        """Initialize the lazy formatter."""
+        self._obj = obj
+
+    def __str__(self) -> str:
+        """Pretty-format the object."""
+        return pprint.pformat(self._obj)
+
+
+MERKLE_LEAF_PREFIX = b"\x00"
+MERKLE_NODE_PREFIX = b"\x01"
+
+
+def merkle_leaf_hash(data: bytes) -> bytes:
+    """Hash some data as a Merkle tree leaf, using a domain separation prefix."""
+    return sha256(MERKLE_LEAF_PREFIX + data).digest()
+
+
+def merkle_node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash two children of a Merkle tree node, using a domain separation prefix."""
+    return sha256(MERKLE_NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """
+    An incremental binary Merkle tree over a sequence of leaf hashes.
+
+    All the levels of the tree are kept in memory, so that appending a leaf or replacing an existing one
+    only recomputes the nodes on the path from that leaf to the root, i.e., `O(log n)` hashes.
+    A node without a sibling is promoted to the next level as is.
+    The root of an empty tree is the hash of the empty byte string.
+    """
+
+    def __init__(self, leaves: Optional[List[bytes]] = None) -> None:
+        """Initialize the tree, building it from the given leaf hashes."""
+        self._levels: List[List[bytes]] = [list(leaves or [])]
+        self._build()
+
+    def _build(self) -> None:
+        """Build all the levels of the tree from the leaves."""
+        del self._levels[1:]
+        level = self._levels[0]
+        while len(level) > 1:
+            level = [
+                merkle_node_hash(level[i], level[i + 1])
+                if i + 1 < len(level)
+                else level[i]
+                for i in range(0, len(level), 2)
+            ]
+            self._levels.append(level)
+
+    def __len__(self) -> int:
+        """Get the number of leaves."""
+        return len(self._levels[0])
+
+    @property
+    def leaves(self) -> Tuple[bytes, ...]:
+        """Get the leaf hashes."""
+        return tuple(self._levels[0])
+
+    @property
+    def root(self) -> bytes:
+        """Get the root of the tree."""
+        if not self._levels[0]:
+            return sha256(b"").digest()
+        return self._levels[-1][0]
+
+    def _propagate(self, index: int) -> None:
+        """Recompute the nodes on the path from the leaf at the given index to the root."""
+        depth = 0
+        while len(self._levels[depth]) > 1:
+            level = self._levels[depth]
+            if depth + 1 == len(self._levels):
+                self._levels.append([])
+            parent_level = self._levels[depth + 1]
+            sibling = index ^ 1
+            left_index = min(index, sibling)
+            parent = (
+                merkle_node_hash(level[left_index], level[left_index + 1])
+                if left_index + 1 < len(level)
+                else level[left_index]
+            )
+            parent_index = index // 2
+            if parent_index == len(parent_level):
+                parent_level.append(parent)
+            else:
+                parent_level[parent_index] = parent
+            index = parent_index
+            depth += 1
+
+    def append(self, leaf: bytes) -> None:
+        """Append a leaf hash to the tree."""
+        self._levels[0].append(leaf)
+        self._propagate(len(self._levels[0]) - 1)
+
+    def update(self, index: int, leaf: bytes) -> None:
+        """Replace the leaf hash at the given index."""
+        self._levels[0][index] = leaf
+        self._propagate(index)
+
+
+class _ImmutableMixin:  # pylint: disable=too-few-public-methods
+    """Mixin for immutable containers, which can be safely shared instead of copied."""
+
+    def _immutable(self, *_: Any, **__: Any) -> None:
+        """Raise an error on any attempt to modify the container."""
+        raise TypeError(f"'{type(self).__name__}' object is immutable")
+
+    def __copy__(self) -> Any:
+        """Return the object itself, as it cannot be modified."""
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
+        """Return the object itself, as it cannot be modified."""
+        return self
+
+
+class FrozenList(_ImmutableMixin, list):
+    """
+    An immutable list.
+
+    It is a subclass of `list`, so that it compares equal to lists and is json-serialized exactly like one.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _ImmutableMixin._immutable  # type: ignore
+    append = extend = insert = pop = remove = clear = _ImmutableMixin._immutable  # type: ignore
+    sort = reverse = _ImmutableMixin._immutable  # type: ignore
+
+    def __reduce__(self) -> Tuple[Type["FrozenList"], Tuple[List[Any]]]:
+        """Support pickling, as the default implementation relies on the mutating methods."""
+        return type(self), (list(self),)
+
+
+class FrozenDict(_ImmutableMixin, dict):
+    """
+    An immutable dictionary.
+
+    It is a subclass of `dict`, so that it compares equal to dictionaries and is json-serialized exactly like one.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _ImmutableMixin._immutable  # type: ignore
+    pop = popitem = clear = update = setdefault = _ImmutableMixin._immutable  # type: ignore
+
+    def __reduce__(self) -> Tuple[Type["FrozenDict"], Tuple[Dict[Any, Any]]]:
+        """Support pickling, as the default implementation relies on the mutating methods."""
+        return type(self), (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Get an immutable version of a json-serializable value.
+
+    Lists and dictionaries are recursively converted to `FrozenList` and `FrozenDict` respectively,
+    the items of tuples are frozen, and primitives are returned as is.
+    Values which have already been frozen are not copied again.
+
+    :param value: the value to freeze.
+    :return: the frozen value.
+    """
+    if isinstance(value, (FrozenList, FrozenDict)):
+        return value
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    return value
@@ -42,6 +42,10 @@ class TestModels:
     def test_setup() -> None:
         """Test `SharedState`'s `setup`."""
         shared_state = SharedState(name="", skill_context=MagicMock())
+        shared_state.context.params.block_retention = None
+        shared_state.context.params.db_snapshots_path = None
+        shared_state.context.params.metrics_port = None
+        shared_state.context.params.tx_verification_workers = None
         shared_state.context.params.setup_params = {"test": []}
         shared_state.setup()
         assert (
@@ -33,6 +33,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     CollectionRound,
     DeserializedCollection,
     TransactionNotValidError,
+    db_cached,
     get_name,
 )
 from packages.valory.skills.slashing_abci.payloads import (
@@ -97,6 +98,7 @@ class SynchronizedData(BaseSynchronizedData):
         return json.loads(timestamps)
 
     @property
+    @db_cached
     def participant_to_offence_reset(
         self,
     ) -> DeserializedCollection:  # pragma: no cover
@@ -50,6 +50,10 @@ class TestSharedState:
         shared_state: SharedState,
     ) -> None:
         """Test setup."""
+        shared_state.context.params.block_retention = None
+        shared_state.context.params.db_snapshots_path = None
+        shared_state.context.params.metrics_port = None
+        shared_state.context.params.tx_verification_workers = None
         shared_state.context.params.setup_params = {
             "test": [],
             "all_participants": [["0x0"]],
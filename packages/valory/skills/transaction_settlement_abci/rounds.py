@@ -41,6 +41,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     TransactionNotValidError,
     VALUE_NOT_PROVIDED,
     VotingRound,
+    db_cached,
     get_name,
 )
 from packages.valory.skills.abstract_round_abci.utils import filter_negative
@@ -95,6 +96,7 @@ class SynchronizedData(
     """
 
     @property
+    @db_cached
     def participant_to_signature(self) -> Mapping[str, SignaturePayload]:
         """Get the participant_to_signature."""
         serialized = self.db.get_strict("participant_to_signature")
@@ -228,6 +230,7 @@ class SynchronizedData(
         return cast(str, self.db.get_strict("most_voted_check_result"))
 
     @property
+    @db_cached
     def participant_to_check(
         self,
     ) -> Mapping[str, CheckTransactionHistoryPayload]:  # pragma: no cover
@@ -237,6 +240,7 @@ class SynchronizedData(
         return cast(Mapping[str, CheckTransactionHistoryPayload], deserialized)
 
     @property
+    @db_cached
     def participant_to_late_messages(
         self,
     ) -> Mapping[str, SynchronizeLateMessagesPayload]:  # pragma: no cover
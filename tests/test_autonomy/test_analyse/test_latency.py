@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the latency analytics."""
+
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from autonomy.analyse.logs.base import LOGS_DB, TIME_FORMAT
+from autonomy.analyse.logs.collection import FromDirectory
+from autonomy.analyse.logs.db import AgentLogsDB
+from autonomy.analyse.logs.latency import (
+    BEHAVIOURS,
+    CONSENSUS,
+    ROUNDS,
+    RoundTimeline,
+    STRAGGLERS,
+    percentile,
+)
+
+from tests.conftest import DATA_DIR
+
+
+LAG = timedelta(milliseconds=500)
+
+
+def _shift(match: "re.Match[str]") -> str:
+    """Shift a timestamp by the lag."""
+    timestamp = datetime.strptime(match.group(1), TIME_FORMAT) + LAG
+    return "[" + timestamp.strftime(TIME_FORMAT)[:-3] + "]"
+
+
+@pytest.mark.parametrize(
+    "values, percent, expected",
+    (
+        ([1.0], 99, 1.0),
+        ([3.0, 1.0, 2.0], 50, 2.0),
+        ([1.0, 2.0, 3.0, 4.0], 50, 2.5),
+        ([float(value) for value in range(101)], 95, 95.0),
+        ([0.0, 10.0], 99, 9.9),
+    ),
+)
+def test_percentile(values: list, percent: float, expected: float) -> None:
+    """Test computing percentiles."""
+    assert percentile(values, percent) == pytest.approx(expected)
+
+
+def test_round_timeline() -> None:
+    """Test aligning the logs of agents on their round transitions."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copy(DATA_DIR / "logs" / "aea_0.txt", temp_dir)
+        # the second agent goes through the same rounds, always half a second late
+        logs = (DATA_DIR / "logs" / "aea_0.txt").read_text()
+        Path(temp_dir, "aea_1.txt").write_text(
+            re.sub(r"^\[(\d+-\d+-\d+ \d+:\d+:\d+,\d+)\]", _shift, logs, flags=re.M)
+        )
+        collection = FromDirectory(directory=Path(temp_dir))
+        db_path = Path(temp_dir, LOGS_DB)
+        dbs = {}
+        for agent in ("aea_0", "aea_1"):
+            collection.ingest(agent, db_path)
+            dbs[agent] = AgentLogsDB(agent=agent, file=db_path)
+        timeline = RoundTimeline(dbs=dbs)
+
+        transitions = timeline.transitions()
+        assert len(transitions) == 2 * len(timeline.rounds)
+        for transition in transitions:
+            expected_lag = 0.5 if transition.agent == "aea_1" else 0.0
+            assert transition.entry_lag == pytest.approx(expected_lag)
+            assert transition.exit_lag == pytest.approx(expected_lag)
+
+        round_latencies = {stats.name: stats for stats in timeline.round_latencies()}
+        consensus = {stats.name: stats for stats in timeline.time_to_consensus()}
+        assert round_latencies.keys() == consensus.keys()
+        for round_name, stats in round_latencies.items():
+            assert stats.section == ROUNDS
+            assert consensus[round_name].section == CONSENSUS
+            # both agents take as long as each other to go through each round
+            assert stats.count == 2 * consensus[round_name].count
+            assert stats.mean == pytest.approx(consensus[round_name].mean)
+            assert stats.p50 <= stats.p95 <= stats.p99 <= stats.max
+
+        behaviour_latencies = timeline.behaviour_latencies()
+        assert len(behaviour_latencies) > 0
+        assert all(stats.section == BEHAVIOURS for stats in behaviour_latencies)
+
+        on_time, straggler = timeline.stragglers()
+        assert on_time.section == straggler.section == STRAGGLERS
+        assert (on_time.name, on_time.max, on_time.slowest) == ("aea_0", 0.0, 0)
+        assert straggler.name == "aea_1"
+        assert straggler.p50 == pytest.approx(0.5)
+        assert straggler.slowest == straggler.count == len(timeline.rounds)
+
+        assert len(timeline.latencies()) == sum(
+            map(
+                len,
+                (round_latencies, behaviour_latencies, consensus, (on_time, straggler)),
+            )
+        )
+        for db in dbs.values():
+            db.close()
@@ -19,10 +19,27 @@
 
 """Test log parser."""
 
+import re
+import shutil
 import tempfile
+from datetime import datetime
 from pathlib import Path
+from typing import Any, List, Match, Optional, Tuple, cast
 
-from autonomy.analyse.logs.collection import LogCollection
+import pytest
+
+from autonomy.analyse.logs.base import (
+    EXIT_ROUND_REGEX,
+    LOGS_DB,
+    LogRow,
+    TIME_FORMAT,
+    parse_timestamp,
+)
+from autonomy.analyse.logs.collection import FromDirectory, LogCollection
+from autonomy.analyse.logs.db import AgentLogsDB, required_substring
+from autonomy.cli.helpers.analyse import ParseLogs
+
+from tests.conftest import DATA_DIR
 
 
 LOGS = """[2023-09-26 06:27:56,015] [INFO] [agent] Entered in the 'check_transaction_history_behaviour' behaviour
@@ -70,3 +87,233 @@ def test_multiline_parse() -> None:
 
         for line in LOGS_CLEAN.split("\n"):
             assert line in parsed
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    ("2023-09-26 06:27:56,015", "2023-01-01 00:00:00,0", "1999-12-31 23:59:59,999999"),
+)
+def test_parse_timestamp(timestamp: str) -> None:
+    """Test that timestamps are parsed as with `datetime.strptime`."""
+    assert parse_timestamp(timestamp) == datetime.strptime(timestamp, TIME_FORMAT)
+
+
+def test_parse_edge_cases() -> None:
+    """Test parsing empty logs and logs which do not start with a log block."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file = Path(temp_dir, "log.txt")
+        file.write_text("")
+        assert list(LogCollection.parse(file=file)) == []
+
+        file.write_text("not a log block\n" + LOGS)
+        rows = list(LogCollection.parse(file=file))
+        assert len(rows) == 3
+        assert rows[0][0] == datetime(2023, 9, 26, 6, 27, 56, 15000)
+        assert rows[0][1:] == (
+            "INFO",
+            "Entered in the 'check_transaction_history_behaviour' behaviour\n",
+            0,
+            "agent_startup",
+            "check_transaction_history_behaviour",
+        )
+        assert rows[1][1] == "ERROR"
+        assert rows[1][2].endswith("target=1)\n")
+
+
+def test_insert_many_batches() -> None:
+    """Test that the rows are inserted in batches."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = AgentLogsDB(agent="aea_0", file=Path(temp_dir, LOGS_DB)).create()
+        rows = list(LogCollection.parse(file=DATA_DIR / "logs" / "aea_0.txt"))
+        db.insert_many(logs=iter(rows), batch_size=100)
+        assert db.n_inserted == len(rows)
+        assert db.select() == rows
+        db.close()
+
+
+def _select(parser: ParseLogs, agent: str, **filters: Any) -> List[LogRow]:
+    """Select the logs of an agent."""
+    selection = dict.fromkeys(
+        (
+            "start_time",
+            "end_time",
+            "log_level",
+            "period",
+            "round_name",
+            "behaviour_name",
+        )
+    )
+    selection.update(filters)
+    return list(parser.select([agent], **selection).results[agent])
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_create_tables_in_parallel(workers: int) -> None:
+    """Test that the logs of several agents are ingested by worker processes."""
+
+    logs = (DATA_DIR / "logs" / "aea_0.txt").read_text()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for agent in ("aea_0", "aea_1"):
+            Path(temp_dir, f"{agent}.txt").write_text(logs)
+
+        parser = ParseLogs().from_dir(logs_dir=Path(temp_dir))
+        parser.create_tables(workers=workers)
+        rows = _select(parser, "aea_0")
+        assert len(rows) > 0
+        assert rows == _select(parser, "aea_1")
+
+        # unchanged logs are not ingested again, unless the tables are reset
+        parser.create_tables(workers=workers)
+        parser.create_tables(reset=True, workers=workers)
+        assert _select(parser, "aea_0") == rows
+
+
+def test_incremental_ingestion() -> None:
+    """Test that only the logs appended since the last ingestion are ingested."""
+
+    logs = (DATA_DIR / "logs" / "aea_0.txt").read_text()
+    # split in the middle of the multi-line log block of the `LOGS`
+    split = LOGS.index("During handling")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file = Path(temp_dir, "aea_0.txt")
+        db_path = Path(temp_dir, LOGS_DB)
+        collection = FromDirectory(directory=Path(temp_dir))
+
+        file.write_text(logs + LOGS[:split])
+        n_rows = len(list(LogCollection.parse(file=file)))
+        assert collection.ingest("aea_0", db_path)[0] == n_rows
+        with file.open("a") as fp:
+            fp.write(LOGS[split:] + logs)
+        expected = list(LogCollection.parse(file=file))
+
+        # the last log block is ingested again, along with the appended ones
+        assert collection.ingest("aea_0", db_path)[0] == len(expected) - n_rows + 1
+        db = AgentLogsDB(agent="aea_0", file=db_path)
+        assert db.select() == expected
+        assert collection.ingest("aea_0", db_path)[0] == 0
+
+        # a rotated log file is ingested from scratch
+        file.write_text(LOGS)
+        collection.ingest("aea_0", db_path)
+        assert db.select() == list(LogCollection.parse(file=file))
+        db.close()
+
+
+@pytest.mark.parametrize(
+    "pattern, substring",
+    (
+        (".*Entered in the.*", "Entered in the"),
+        ("arrived block", "arrived block"),
+        ("a.b", None),
+        ("(?i)arrived", None),
+        ("arrived|entered", None),
+        ("ar?rived block", "rived block"),
+    ),
+)
+def test_required_substring(pattern: str, substring: Optional[str]) -> None:
+    """Test getting the substring which the messages matching a regex must contain."""
+    assert required_substring(pattern) == substring
+
+
+@pytest.mark.parametrize(
+    "include_regexes, exclude_regexes, contains",
+    (
+        ((".*Entered in the.*",), (), None),
+        ((".*Entered in the.*", "arrived block"), (), None),
+        (("(?i)entered",), (), None),
+        ((), (".*Entered in the.*",), None),
+        ((), (".*round.*", ".*period.*"), None),
+        ((".*Entered in the.*",), (".*round.*",), None),
+        ((), (), "round is done"),
+        ((), (), "[*]"),
+    ),
+)
+def test_select_in_database(
+    include_regexes: Tuple[str, ...],
+    exclude_regexes: Tuple[str, ...],
+    contains: Optional[str],
+) -> None:
+    """Test that the regexes and substrings filter the logs like they would in Python."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copy(DATA_DIR / "logs" / "aea_0.txt", temp_dir)
+        parser = ParseLogs().from_dir(logs_dir=Path(temp_dir))
+        parser.create_tables(workers=1)
+        rows = _select(parser, "aea_0")
+        expected = [
+            row
+            for row in rows
+            if (
+                len(include_regexes) == 0
+                or any(re.match(pattern, row[2]) for pattern in include_regexes)
+            )
+            and (
+                len(exclude_regexes) == 0
+                or any(not re.match(pattern, row[2]) for pattern in exclude_regexes)
+            )
+            and (contains is None or contains in row[2])
+        ]
+        parser.select(["aea_0"], *(None,) * 6, contains=contains)
+        selected = list(
+            parser.re_include(list(include_regexes))
+            .re_exclude(list(exclude_regexes))
+            .results["aea_0"]
+        )
+        assert selected == expected
+        assert 0 < len(selected) < len(rows) or contains == "[*]"
+
+
+def test_indexes() -> None:
+    """Test that the filtered columns are indexed and that the full-text index is used."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = AgentLogsDB(agent="aea_0", file=Path(temp_dir, LOGS_DB)).create()
+        plan = db.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM aea_0 WHERE round_name=?", ("round",)
+        ).fetchall()
+        assert "USING INDEX aea_0_round_name" in str(plan)
+        assert db.has_fts()
+        db.close()
+
+
+def test_transitions() -> None:
+    """Test that the round transitions are extracted at ingestion time."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copy(DATA_DIR / "logs" / "aea_0.txt", temp_dir)
+        collection = FromDirectory(directory=Path(temp_dir))
+        db_path = Path(temp_dir, LOGS_DB)
+        collection.ingest("aea_0", db_path)
+        db = AgentLogsDB(agent="aea_0", file=db_path)
+
+        rows = db.select()
+        expected = [
+            (period, *cast(Match, EXIT_ROUND_REGEX.match(message)).groups())
+            for _, _, message, period, _, _ in rows
+            if EXIT_ROUND_REGEX.match(message) is not None
+        ]
+        assert len(expected) > 0
+        assert db.execution_path() == expected
+        assert db.execution_path(period=1) == [
+            transition for transition in expected if transition[0] == 1
+        ]
+        entries = db.execution_path(with_entries=True, round_name="new_tokens")
+        assert (1, "new_tokens", None) in entries
+        assert (1, "new_tokens", "Event.DONE") in entries
+
+        durations = {
+            durations.round_name: durations for durations in db.round_durations()
+        }
+        new_tokens = durations["new_tokens"]
+        assert new_tokens.occurrences > 0
+        assert 0 <= new_tokens.min <= new_tokens.mean <= new_tokens.max
+
+        # the transitions of the last log block are extracted again when resuming
+        with Path(temp_dir, "aea_0.txt").open("a") as fp:
+            fp.write(LOGS)
+        collection.ingest("aea_0", db_path)
+        assert db.execution_path() == expected
+        assert db.round_durations() == list(durations.values())
+        db.close()
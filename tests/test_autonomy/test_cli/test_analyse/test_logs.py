@@ -21,7 +21,10 @@
 """Tests for the `autonomy analyse logs` command"""
 
 import contextlib
+import csv
+import json
 import os
+from pathlib import Path
 from typing import Tuple
 
 from autonomy.analyse.logs.base import LOGS_DB
@@ -34,6 +37,8 @@ from tests.test_autonomy.test_cli.base import BaseCliTest
 LOGS_DIR = DATA_DIR / "logs"
 LOGS_DB_FILE = LOGS_DIR / LOGS_DB
 
+CSV_HEADER = "section,name,count,mean,p50,p95,p99,max,slowest"
+
 AVAILABLE_ROUNDS = (
     "registration_startup",
     "new_tokens",
@@ -243,3 +248,73 @@ class TestAnalyseLogs(BaseLogAnalyserTest):
         )
         assert result.exit_code == 1, result.stdout
         assert "Cannot find agent log data in" in result.output
+
+
+class TestAnalyseLatency(BaseLogAnalyserTest):
+    """Test `autonomy analyse latency`"""
+
+    cli_options: Tuple[str, ...] = ("analyse", "latency")
+
+    def test_latencies_table(self) -> None:
+        """Test printing the latency distributions."""
+
+        result = self.run_cli(commands=("--from-dir", str(LOGS_DIR)))
+
+        assert result.exit_code == 0, result.stdout
+        assert "section" in result.output and "p95" in result.output
+        for section in ("round", "behaviour", "consensus"):
+            assert f"{section} " in result.output
+
+    def test_timeline_json(self, tmp_path: Path) -> None:
+        """Test exporting the aligned round transitions to JSON."""
+
+        output = tmp_path / "timeline.json"
+        result = self.run_cli(
+            commands=(
+                "--from-dir",
+                str(LOGS_DIR),
+                "-a",
+                "aea_0",
+                "--timeline",
+                "--format",
+                "json",
+                "--output",
+                str(output),
+            )
+        )
+
+        assert result.exit_code == 0, result.stdout
+        transitions = json.loads(output.read_text())
+        assert {transition["round_name"] for transition in transitions} == set(
+            AVAILABLE_ROUNDS
+        )
+        assert all(transition["agent"] == "aea_0" for transition in transitions)
+
+    def test_latencies_csv(self) -> None:
+        """Test printing the latency distributions as CSV."""
+
+        result = self.run_cli(commands=("--from-dir", str(LOGS_DIR), "--format", "csv"))
+
+        assert result.exit_code == 0, result.stdout
+        # the ingestion reports are mixed with the output
+        lines = result.stdout.splitlines()
+        rows = list(csv.DictReader(lines[lines.index(CSV_HEADER) :]))
+        assert {row["name"] for row in rows if row["section"] == "round"} == set(
+            AVAILABLE_ROUNDS
+        )
+
+    def test_unknown_agent(self) -> None:
+        """Test analysing the logs of an unknown agent."""
+
+        result = self.run_cli(commands=("--from-dir", str(LOGS_DIR), "-a", "aea_1"))
+
+        assert result.exit_code == 1, result.stdout
+        assert "Cannot find the logs of ['aea_1']" in result.output
+
+    def test_empty_logs_dir(self) -> None:
+        """Test analysing a directory without logs."""
+
+        result = self.run_cli(commands=("--from-dir", str(LOGS_DIR.parent)))
+
+        assert result.exit_code == 1, result.stdout
+        assert "Cannot find agent log data in" in result.output